@@ -16,9 +16,14 @@
 #
 
 """API views for CSV output."""
+import csv
+import io
 
+from django.http import StreamingHttpResponse
 from rest_framework_csv.renderers import CSVRenderer
 
+CSV_STREAM_BATCH_SIZE = 500
+
 
 class PaginatedCSVRenderer(CSVRenderer):
     """
@@ -34,3 +39,48 @@ class PaginatedCSVRenderer(CSVRenderer):
         if not isinstance(data, list):
             data = data.get(self.results_field, [])
         return super(PaginatedCSVRenderer, self).render(data, *args, **kwargs)
+
+
+def iter_csv(rows, batch_size=CSV_STREAM_BATCH_SIZE):
+    """Encode rows as CSV text in batches of lines.
+
+    Each row is flattened as CSVRenderer does, so nested values become
+    dotted columns. The rows are not held in memory, so unlike CSVRenderer
+    the header is not the union of the keys of every row. It is the sorted
+    keys of the first flattened row. Later rows leave missing columns empty
+    and drop columns that are not in the header. Rows of a single values()
+    query all have the same keys, so only nested values of differing shape
+    lose columns.
+
+    Args:
+        rows (iterable): Dictionaries with the same keys
+        batch_size (int): The number of rows encoded per chunk
+    Returns:
+        (generator): Chunks of CSV text
+
+    """
+    flatten_item = CSVRenderer().flatten_item
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header = None
+    for count, row in enumerate(rows, start=1):
+        row = flatten_item(row)
+        if header is None:
+            header = sorted(row)
+            writer.writerow(header)
+        writer.writerow([row.get(key) for key in header])
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class StreamingCSVResponse(StreamingHttpResponse):
+    """A response that streams flat rows as CSV."""
+
+    def __init__(self, rows, *args, **kwargs):
+        """Stream the rows with a CSV content type."""
+        kwargs.setdefault('content_type', 'text/csv; charset=utf-8')
+        super().__init__(iter_csv(rows), *args, **kwargs)
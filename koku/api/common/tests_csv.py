@@ -0,0 +1,67 @@
+#
+# Copyright 2018 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Test the API CSV module."""
+from decimal import Decimal
+
+from django.test import TestCase
+from rest_framework_csv.renderers import CSVRenderer
+
+from .csv import StreamingCSVResponse, iter_csv
+
+
+class IterCSVTest(TestCase):
+    """Tests for encoding rows as CSV chunks."""
+
+    def test_header_is_sorted_keys(self):
+        """Test that the header is the sorted keys of the first row."""
+        rows = [{'date': '2019-06-01', 'cost': Decimal('1.5'), 'account': None}]
+        result = ''.join(iter_csv(rows))
+        self.assertEqual(result, 'account,cost,date\r\n,1.5,2019-06-01\r\n')
+
+    def test_nested_values_are_flattened(self):
+        """Test that nested values are written to dotted columns as CSVRenderer does."""
+        rows = [
+            {'date': '2019-06-01', 'tags': {'app': 'a', 'env': 'prod'}, 'nodes': ['n1', 'n2']},
+            {'date': '2019-06-02', 'tags': {'app': 'b', 'env': 'dev'}, 'nodes': ['n3', 'n4']},
+        ]
+        result = ''.join(iter_csv(rows))
+        self.assertEqual(result.split('\r\n')[0], 'date,nodes.0,nodes.1,tags.app,tags.env')
+        self.assertEqual(result.encode('utf-8'), CSVRenderer().render(rows))
+
+    def test_header_is_fixed_by_first_row(self):
+        """Test that later rows fill the first row's columns only."""
+        rows = [{'a': 1, 'b': 2}, {'a': 3}, {'a': 4, 'c': 5}]
+        result = ''.join(iter_csv(rows))
+        self.assertEqual(result, 'a,b\r\n1,2\r\n3,\r\n4,\r\n')
+
+    def test_rows_are_batched(self):
+        """Test that rows are yielded in batches."""
+        rows = ({'value': index} for index in range(5))
+        chunks = list(iter_csv(rows, batch_size=2))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(''.join(chunks).split('\r\n')[:-1],
+                         ['value', '0', '1', '2', '3', '4'])
+
+    def test_no_rows(self):
+        """Test that no rows produce no output."""
+        self.assertEqual(list(iter_csv([])), [])
+
+    def test_streaming_response(self):
+        """Test the response content type and content."""
+        response = StreamingCSVResponse(iter([{'a': 1}]))
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        self.assertEqual(b''.join(response.streaming_content), b'a\r\n1\r\n')
@@ -23,6 +23,7 @@ from rest_framework.response import Response
 
 from .pagination import (PATH_INFO,
                          ReportPagination,
+                         ReportQueryPagination,
                          ReportRankedPagination,
                          StandardResultsSetPagination)
 
@@ -201,3 +202,41 @@ class ReportRankedPaginationTest(TestCase):
         """Test that the queryset is unaltered."""
         data = self.paginator.paginate_queryset(self.data, self.paginator.request)
         self.assertEqual(data.get('data', []), self.data.get('data', []))
+
+
+class ReportQueryPaginationTest(TestCase):
+    """Tests for report API pagination done in the query."""
+
+    def setUp(self):
+        """Set up each test case."""
+        self.paginator = ReportQueryPagination()
+        self.paginator.count = 10
+        self.paginator.request = Mock
+        self.paginator.request.META = {}
+        self.paginator.request.query_params = {}
+
+        self.data = {
+            'total': {},
+            'data': [
+                {
+                    'usage': 1,
+                    'cost': 2
+                },
+                {
+                    'usage': 2,
+                    'cost': 4
+                }
+            ]
+        }
+
+    def test_get_count(self):
+        """Test that the precomputed count is returned."""
+        self.assertEqual(self.paginator.get_count(self.data), 10)
+
+    def test_paginate_queryset(self):
+        """Test that the already paginated queryset is unaltered."""
+        self.paginator.request.query_params = {'limit': 1, 'offset': 2}
+        data = self.paginator.paginate_queryset(self.data, self.paginator.request)
+        self.assertEqual(data.get('data', []), self.data.get('data', []))
+        self.assertEqual(self.paginator.limit, 1)
+        self.assertEqual(self.paginator.offset, 2)
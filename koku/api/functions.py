@@ -24,3 +24,11 @@ class JSONBObjectKeys(Func):
     function = 'jsonb_object_keys'
     template = '%(function)s(%(expressions)s)'
     arity = 1
+
+
+class Unnest(Func):
+    """Helper to expand an array into a set of rows."""
+
+    function = 'unnest'
+    template = '%(function)s(%(expressions)s)'
+    arity = 1
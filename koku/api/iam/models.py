@@ -94,3 +94,6 @@ class Tenant(TenantMixin):
 
     # Delete all schemas when a tenant is removed
     auto_drop_schema = True
+
+    # Incremented by masu whenever the tenant's report data changes
+    data_version = models.BigIntegerField(default=0)
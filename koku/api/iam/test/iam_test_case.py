@@ -19,6 +19,7 @@ from base64 import b64encode
 from json import dumps as json_dumps
 from unittest.mock import Mock
 
+from django.core.cache import caches
 from django.db import connection
 from django.test import TestCase
 from faker import Faker
@@ -56,6 +57,11 @@ class IamTestCase(TestCase):
         cls.tenant.delete()
         super().tearDownClass()
 
+    def setUp(self):
+        """Set up each test."""
+        super().setUp()
+        caches['default'].clear()
+
     @classmethod
     def _create_customer_data(cls):
         """Create customer data."""
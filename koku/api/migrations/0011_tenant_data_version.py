@@ -0,0 +1,18 @@
+# Generated by Django 2.2.1 on 2019-06-10 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_costmodelmetricsmap'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenant',
+            name='data_version',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
@@ -76,6 +76,7 @@ class QueryHandler(object):
         self.start_datetime = None
         self.end_datetime = None
         self._max_rank = 0
+        self.page_count = None
 
         self._get_timeframe()
 
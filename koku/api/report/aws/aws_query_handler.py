@@ -95,38 +95,38 @@ class AWSReportQueryHandler(ReportQueryHandler):
 
         return output
 
-    def _build_sum(self, query):
-        """Build the sum results for the query."""
-        sum_units = {}
-        query_sum = self.initialize_totals()
+    def _build_sum(self, query, query_data):
+        """Build the sum results for the query.
+
+        Args:
+            query (QuerySet): The ungrouped query for the full time scope
+            query_data (QuerySet): The grouped query annotated with totals
+        Returns:
+            (list): The grouped rows
+            (dict): The packed totals
+
+        """
         cost_units_fallback = self._mapper.report_type_map.get('cost_units_fallback')
         usage_units_fallback = self._mapper.report_type_map.get('usage_units_fallback')
         count_units_fallback = self._mapper.report_type_map.get('count_units_fallback')
-        if query.exists():
-            sum_annotations = {
-                'cost_units': Coalesce(self._mapper.cost_units_key, Value(cost_units_fallback))
-            }
-            if self._mapper.usage_units_key:
-                units_fallback = self._mapper.report_type_map.get('usage_units_fallback')
-                sum_annotations['usage_units'] = Coalesce(self._mapper.usage_units_key, Value(units_fallback))
-            sum_query = query.annotate(**sum_annotations)
-            units_value = sum_query.values('cost_units').first().get('cost_units', cost_units_fallback)
-            sum_units = {'cost_units': units_value}
+        report_annotations = self._mapper.report_type_map.get('annotations', {})
+
+        query_data, query_sum = self.get_query_totals(query, query_data)
+        sum_units = {'cost_units': cost_units_fallback}
+        if query_data:
+            sum_units['cost_units'] = query_data[0].get('cost_units', cost_units_fallback)
             if self._mapper.usage_units_key:
-                units_value = sum_query.values('usage_units').first().get('usage_units', usage_units_fallback)
-                sum_units['usage_units'] = units_value
-            if self._mapper.report_type_map.get('annotations', {}).get('count_units'):
-                sum_units['count_units'] = count_units_fallback
-            query_sum = self.calculate_total(**sum_units)
-        else:
-            sum_units['cost_units'] = cost_units_fallback
-            if self._mapper.report_type_map.get('annotations', {}).get('count_units'):
-                sum_units['count_units'] = count_units_fallback
-            if self._mapper.report_type_map.get('annotations', {}).get('usage_units'):
-                sum_units['usage_units'] = usage_units_fallback
-            query_sum.update(sum_units)
-            self._pack_data_object(query_sum, **self._mapper.PACK_DEFINITIONS)
-        return query_sum
+                sum_units['usage_units'] = query_data[0].get('usage_units', usage_units_fallback)
+        elif report_annotations.get('usage_units'):
+            sum_units['usage_units'] = usage_units_fallback
+        if 'count' in query_sum:
+            query_sum['count'] = self.count_resources(query)
+        if report_annotations.get('count_units'):
+            sum_units['count_units'] = count_units_fallback
+
+        query_sum.update(sum_units)
+        self._pack_data_object(query_sum, **self._mapper.PACK_DEFINITIONS)
+        return query_data, query_sum
 
     def execute_query(self):
         """Execute query and return provided data.
@@ -135,9 +135,7 @@ class AWSReportQueryHandler(ReportQueryHandler):
             (Dict): Dictionary response of query params, data, and total
 
         """
-        data = []
-
-        q_table = self._mapper.query_table
+        q_table = self.query_table
         with tenant_context(self.tenant):
             query = q_table.objects.filter(self.query_filter)
             query_data = query.annotate(**self.annotations)
@@ -152,7 +150,12 @@ class AWSReportQueryHandler(ReportQueryHandler):
                 query_data = query_data.annotate(account_alias=Coalesce(
                     F(self._mapper.provider_map.get('alias')), 'usage_account_id'))
 
-            query_sum = self._build_sum(query)
+            if self.is_csv_stream:
+                self.query_data = self.stream_query_data(query_data, query_order_by)
+                self.query_sum = {}
+                return self._format_query_response()
+
+            query_data = self.annotate_totals(query_data)
 
             if self._limit:
                 rank_order = getattr(F(self.order_field), self.order_direction)()
@@ -163,29 +166,18 @@ class AWSReportQueryHandler(ReportQueryHandler):
                 )
                 query_data = query_data.annotate(rank=rank_by_total)
                 query_order_by.insert(1, 'rank')
-                query_data = self._ranked_list(query_data)
+                query_data = self._ranked_query(query_data)
+
+            query_data, query_sum = self._build_sum(query, query_data)
 
             if self._delta:
                 query_data = self.add_deltas(query_data, query_sum)
 
-            is_csv_output = self._accept_type and 'text/csv' in self._accept_type
-
             query_data, query_group_by = self.strip_label_column_name(
                 query_data,
                 query_group_by
             )
-            query_data = self.order_by(query_data, query_order_by)
-
-            if is_csv_output:
-                if self._limit:
-                    data = self._ranked_list(list(query_data))
-                else:
-                    data = list(query_data)
-            else:
-                groups = copy.deepcopy(query_group_by)
-                groups.remove('date')
-                data = self._apply_group_by(list(query_data), groups)
-                data = self._transform_data(query_group_by, 0, data)
+            data = self._format_data(query_data, query_group_by, query_order_by)
 
         key_order = list(['units'] + list(annotations.keys()))
         ordered_total = {total_key: query_sum[total_key]
@@ -196,36 +188,17 @@ class AWSReportQueryHandler(ReportQueryHandler):
         self.query_data = data
         return self._format_query_response()
 
-    def calculate_total(self, **units):
-        """Calculate aggregated totals for the query.
+    def count_resources(self, query):
+        """Count the distinct resources for the query.
 
         Args:
-            units (dict): The units dictionary
+            query (QuerySet): The ungrouped query for the full time scope
 
         Returns:
-            (dict) The aggregated totals for the query
+            (int) The number of distinct resource ids
 
         """
-        q_table = self._mapper.query_table
-        query_group_by = ['date'] + self._get_group_by()
-        query = q_table.objects.filter(self.query_filter)
-        query_data = query.annotate(**self.annotations)
-        query_data = query_data.values(*query_group_by)
-        aggregates = self._mapper.report_type_map.get('aggregates')
-        counts = None
-
-        if 'count' in aggregates:
-            resource_ids = query_data.annotate(
-                resource_id=Func(F('resource_ids'), function='unnest')
-            ).values_list('resource_id', flat=True).distinct()
-            counts = len(resource_ids)
-
-        total_query = query.aggregate(**aggregates)
-        for unit_key, unit_value in units.items():
-            total_query[unit_key] = unit_value
-
-        if counts:
-            total_query['count'] = counts
-        self._pack_data_object(total_query, **self._mapper.PACK_DEFINITIONS)
-
-        return total_query
+        resource_ids = query.annotate(
+            resource_id=Func(F('resource_ids'), function='unnest')
+        ).values_list('resource_id', flat=True).distinct()
+        return resource_ids.count()
@@ -0,0 +1,89 @@
+#
+# Copyright 2019 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Response cache for Reports."""
+import hashlib
+import json
+import logging
+
+from django.core.cache import caches
+
+from api.utils import DateHelper
+from koku.env import ENVIRONMENT
+
+LOG = logging.getLogger(__name__)
+CACHE_PREFIX = 'report'
+
+
+def get_cache_ttl():
+    """Return the number of seconds a cached report is kept."""
+    return int(ENVIRONMENT.get_value('REPORT_CACHE_TTL', default='3600'))
+
+
+def get_access_fingerprint(access):
+    """Create a stable fingerprint of a user's RBAC access.
+
+    Args:
+        access (dict): The user access dictionary
+    Returns:
+        (str): A digest of the access dictionary
+
+    """
+    serialized = json.dumps(access, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+def get_cache_key(request, tenant, provider, report):
+    """Create the cache key for a report request.
+
+    The key is scoped to the tenant's data version, so any change to the
+    tenant's summary data makes all of its previously cached reports
+    unreachable. The current date is included because time scopes are
+    relative to today.
+
+    Args:
+        request (Request): The HTTP request object
+        tenant (Tenant): The tenant the report is generated for
+        provider (String): Provider name (e.g. 'aws' or 'ocp')
+        report (String): Report name (e.g. 'cost', 'cpu', 'memory')
+    Returns:
+        (str): The cache key
+
+    """
+    query_params = sorted((key, sorted(values)) for key, values in request.GET.lists())
+    key_parts = [
+        request.path,
+        json.dumps(query_params),
+        request.META.get('HTTP_ACCEPT', ''),
+        get_access_fingerprint(request.user.access),
+        str(DateHelper().today.date()),
+    ]
+    digest = hashlib.sha256('|'.join(key_parts).encode('utf-8')).hexdigest()
+    return ':'.join([CACHE_PREFIX, tenant.schema_name, str(tenant.data_version),
+                     provider, report, digest])
+
+
+def get_cached_report(cache_key):
+    """Return the cached report data or None."""
+    report = caches['default'].get(cache_key)
+    if report is not None:
+        LOG.debug(f'Report cache hit: {cache_key}')
+    return report
+
+
+def set_cached_report(cache_key, report):
+    """Store report data in the cache."""
+    caches['default'].set(cache_key, report, get_cache_ttl())
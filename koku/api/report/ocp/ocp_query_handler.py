@@ -117,10 +117,7 @@ class OCPReportQueryHandler(ReportQueryHandler):
             (Dict): Dictionary response of query params, data, and total
 
         """
-        query_sum = self.initialize_totals()
-        data = []
-
-        q_table = self._mapper.query_table
+        q_table = self.query_table
         with tenant_context(self.tenant):
             query = q_table.objects.filter(self.query_filter)
             if self.query_exclusions:
@@ -139,17 +136,23 @@ class OCPReportQueryHandler(ReportQueryHandler):
                 query_data = query_data.annotate(cluster_alias=Coalesce('cluster_alias',
                                                                         'cluster_id'))
 
-            if self._limit and group_by_value:
+            if self.is_csv_stream:
+                query_data = self.stream_query_data(query_data, query_order_by)
+                self.query_data, _ = self.get_cluster_capacity(query_data)
+                self.query_sum = {}
+                return self._format_query_response()
+
+            query_data = self.annotate_totals(query_data)
+
+            is_ranked = self._limit and group_by_value
+            if is_ranked:
                 rank_by_total = self.get_rank_window_function(group_by_value)
                 query_data = query_data.annotate(rank=rank_by_total)
                 query_order_by.insert(1, 'rank')
-                query_data = self._ranked_list(query_data)
+                query_data = self._ranked_query(query_data)
 
             # Populate the 'total' section of the API response
-            if query.exists():
-                aggregates = self._mapper.report_type_map.get('aggregates')
-                metric_sum = query.aggregate(**aggregates)
-                query_sum = {key: metric_sum.get(key) for key in aggregates}
+            query_data, query_sum = self.get_query_totals(query, query_data)
 
             query_data, total_capacity = self.get_cluster_capacity(query_data)
             if total_capacity:
@@ -157,26 +160,12 @@ class OCPReportQueryHandler(ReportQueryHandler):
 
             if self._delta:
                 query_data = self.add_deltas(query_data, query_sum)
-            is_csv_output = self._accept_type and 'text/csv' in self._accept_type
 
             query_data, query_group_by = self.strip_label_column_name(
                 query_data,
                 query_group_by
             )
-            query_data = self.order_by(query_data, query_order_by)
-
-            if is_csv_output:
-                if self._limit:
-                    data = self._ranked_list(list(query_data))
-                else:
-                    data = list(query_data)
-            else:
-                # Pass in a copy of the group by without the added
-                # tag column name prefix
-                groups = copy.deepcopy(query_group_by)
-                groups.remove('date')
-                data = self._apply_group_by(list(query_data), groups)
-                data = self._transform_data(query_group_by, 0, data)
+            data = self._format_data(query_data, query_group_by, query_order_by)
 
         sum_init = {'cost_units': self._mapper.cost_units_key}
         if self._mapper.usage_units_key:
@@ -233,7 +222,7 @@ class OCPReportQueryHandler(ReportQueryHandler):
         total_capacity = Decimal(0)
         capacity_by_cluster = defaultdict(Decimal)
 
-        q_table = self._mapper.query_table
+        q_table = self.query_table
         query = q_table.objects.filter(self.query_filter)
         query_group_by = ['usage_start', 'cluster_id']
 
@@ -245,12 +234,17 @@ class OCPReportQueryHandler(ReportQueryHandler):
                 total_capacity += entry.get(cap_key, 0)
 
         if self.resolution == 'monthly':
-            for row in query_data:
+            def add_capacity(row):
                 cluster_id = row.get('cluster')
                 if cluster_id:
                     row[cap_key] = capacity_by_cluster.get(cluster_id, Decimal(0))
                 else:
                     row[cap_key] = total_capacity
+                return row
+
+            query_data = map(add_capacity, query_data)
+            if not self.is_csv_stream:
+                query_data = list(query_data)
 
         return query_data, {cap_key: total_capacity}
 
@@ -15,8 +15,6 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 """OCP Query Handling for Reports."""
-import copy
-
 from django.db.models import F, Window
 from django.db.models.functions import (Coalesce, RowNumber)
 from tenant_schemas.utils import tenant_context
@@ -60,10 +58,7 @@ class OCPAWSReportQueryHandler(AWSReportQueryHandler):
             (Dict): Dictionary response of query params, data, and total
 
         """
-        query_sum = self.initialize_totals()
-        data = []
-
-        q_table = self._mapper.query_table
+        q_table = self.query_table
         with tenant_context(self.tenant):
             query = q_table.objects.filter(self.query_filter)
             query_data = query.annotate(**self.annotations)
@@ -83,6 +78,13 @@ class OCPAWSReportQueryHandler(AWSReportQueryHandler):
                 query_data = query_data.annotate(cluster_alias=Coalesce('cluster_alias',
                                                                         'cluster_id'))
 
+            if self.is_csv_stream:
+                self.query_data = self.stream_query_data(query_data, query_order_by)
+                self.query_sum = {}
+                return self._format_query_response()
+
+            query_data = self.annotate_totals(query_data)
+
             if self._limit:
                 rank_order = getattr(F(self.order_field), self.order_direction)()
                 rank_by_total = Window(
@@ -92,23 +94,17 @@ class OCPAWSReportQueryHandler(AWSReportQueryHandler):
                 )
                 query_data = query_data.annotate(rank=rank_by_total)
                 query_order_by.insert(1, 'rank')
-                query_data = self._ranked_list(query_data)
+                query_data = self._ranked_query(query_data)
 
-            if query.exists():
-                aggregates = self._mapper.report_type_map.get('aggregates')
-                metric_sum = query.aggregate(**aggregates)
-                query_sum = {key: metric_sum.get(key) for key in aggregates}
+            query_data, query_sum = self.get_query_totals(query, query_data)
 
             if self._delta:
                 query_data = self.add_deltas(query_data, query_sum)
 
-            is_csv_output = self._accept_type and 'text/csv' in self._accept_type
-
             query_data, query_group_by = self.strip_label_column_name(
                 query_data,
                 query_group_by
             )
-            query_data = self.order_by(query_data, query_order_by)
             cost_units_value = self._mapper.report_type_map.get('cost_units_fallback', 'USD')
             usage_units_value = self._mapper.report_type_map.get('usage_units_fallback')
             count_units_value = self._mapper.report_type_map.get('count_units_fallback')
@@ -119,16 +115,7 @@ class OCPAWSReportQueryHandler(AWSReportQueryHandler):
                 if self._mapper.report_type_map.get('annotations', {}).get('count_units'):
                     count_units_value = query_data[0].get('count_units')
 
-            if is_csv_output:
-                if self._limit:
-                    data = self._ranked_list(list(query_data))
-                else:
-                    data = list(query_data)
-            else:
-                groups = copy.deepcopy(query_group_by)
-                groups.remove('date')
-                data = self._apply_group_by(list(query_data), groups)
-                data = self._transform_data(query_group_by, 0, data)
+            data = self._format_data(query_data, query_group_by, query_order_by)
 
         init_order_keys = []
         query_sum['cost_units'] = cost_units_value
@@ -16,6 +16,7 @@
 #
 """Query Handling for Reports."""
 import copy
+import datetime
 import logging
 import random
 import string
@@ -24,21 +25,64 @@ from decimal import Decimal, DivisionByZero, InvalidOperation
 from itertools import groupby
 from urllib.parse import quote_plus
 
-from django.db.models import CharField, Count, DecimalField, F, Max, Q, Sum, Value
+from dateutil import relativedelta
+from django.db import connections
+from django.db.models import Aggregate, CharField, Count, DecimalField, F, Func, Max, Q, Sum, Value
 from django.db.models.expressions import ExpressionWrapper, OrderBy, RawSQL
 from django.db.models.functions import Coalesce
 from providers.provider_access import ProviderAccessor
+from tenant_schemas.utils import tenant_context
 
 from api.query_filter import QueryFilter, QueryFilterCollection
 from api.query_handler import QueryHandler
+from api.report.shaping import compile_packer, shape_report_data
 from reporting.models import (AWSCostEntryLineItemDailySummary,
+                              AWSCostEntryLineItemMonthlySummary,
                               CostSummary,
+                              MonthlyCostSummary,
                               OCPAWSCostLineItemDailySummary,
                               OCPAWSCostLineItemProjectDailySummary,
                               OCPStorageLineItemDailySummary,
-                              OCPUsageLineItemDailySummary)
+                              OCPUsageLineItemDailySummary,
+                              OCPUsageLineItemMonthlySummary)
 
 LOG = logging.getLogger(__name__)
+TOTAL_PREFIX = 'grand_total_'
+PAGE_COLUMN = 'in_page'
+CSV_STREAM_CHUNK_SIZE = 2000
+
+
+class WindowTotal(Func):
+    """Aggregate an aggregate over every grouped row of a query.
+
+    Wraps a per-group aggregate, e.g. SUM(SUM(cost)) OVER (), so that each
+    grouped row also carries the total over all groups.
+    """
+
+    template = '%(function)s(%(expressions)s) OVER ()'
+    window_functions = {'COUNT': 'SUM', 'MAX': 'MAX', 'MIN': 'MIN'}
+
+    def __init__(self, expression, **extra):
+        """Pick the window function matching the wrapped aggregate."""
+        function = getattr(self.get_aggregate(expression), 'function', 'SUM')
+        super().__init__(expression, function=self.window_functions.get(function, 'SUM'), **extra)
+
+    @staticmethod
+    def get_aggregate(expression):
+        """Find the aggregate wrapped by an expression."""
+        aggregate = expression
+        while not isinstance(aggregate, Aggregate) and aggregate.get_source_expressions():
+            aggregate = aggregate.get_source_expressions()[0]
+        return aggregate
+
+    @classmethod
+    def is_supported(cls, expression):
+        """Check if the total over groups can be taken from the group values.
+
+        A distinct aggregate can not be totaled over groups, a value present
+        in several groups would be counted once per group.
+        """
+        return not getattr(cls.get_aggregate(expression), 'distinct', False)
 
 
 def strip_tag_prefix(tag):
@@ -115,9 +159,14 @@ class ProviderMap(object):
                 }
             },
             'group_by_options': ['service', 'account', 'region', 'az', 'product_family'],
+            'monthly_options': ['service', 'account', 'region', 'az'],
             'tag_column': 'tags',
             'report_type': {
                 'costs': {
+                    'tables': {
+                        'query': AWSCostEntryLineItemDailySummary,
+                        'monthly': AWSCostEntryLineItemMonthlySummary
+                    },
                     'aggregates': {
                         'infrastructure_cost': Sum('unblended_cost'),
                         'derived_cost': Sum(Value(0, output_field=DecimalField())),
@@ -246,11 +295,13 @@ class ProviderMap(object):
                 },
             },
             'group_by_options': ['cluster', 'project', 'node'],
+            'monthly_options': ['cluster', 'project', 'node', 'infrastructures'],
             'tag_column': 'pod_labels',
             'report_type': {
                 'costs': {
                     'tables': {
-                        'query': CostSummary
+                        'query': CostSummary,
+                        'monthly': MonthlyCostSummary
                     },
                     'aggregates': {
                         'infrastructure_cost': Sum(F('infra_cost')),
@@ -310,7 +361,8 @@ class ProviderMap(object):
                 },
                 'costs_by_project': {
                     'tables': {
-                        'query': CostSummary
+                        'query': CostSummary,
+                        'monthly': MonthlyCostSummary
                     },
                     'aggregates': {
                         'infrastructure_cost': Sum(F('project_infra_cost')),
@@ -465,6 +517,7 @@ class ProviderMap(object):
             'start_date': 'usage_start',
             'tables': {
                 'query': OCPUsageLineItemDailySummary,
+                'monthly': OCPUsageLineItemMonthlySummary,
             },
         },
         {
@@ -767,6 +820,23 @@ class ProviderMap(object):
         default = self._provider_map.get('tables').get('query')
         return report_table if report_table else default
 
+    @property
+    def monthly_table(self):
+        """Return the monthly rollup table for the report type or None.
+
+        A report type that names its own tables only uses a rollup it
+        names itself.
+        """
+        report_tables = self._report_type_map.get('tables')
+        if report_tables:
+            return report_tables.get('monthly')
+        return self._provider_map.get('tables').get('monthly')
+
+    @property
+    def monthly_options(self):
+        """Return the filter and group by keys the monthly rollup can answer."""
+        return self._provider_map.get('monthly_options', [])
+
     @property
     def report_type_map(self):
         """Return the report-type map property."""
@@ -813,9 +883,13 @@ class ReportQueryHandler(QueryHandler):
         self._group_by = None
         self._tag_keys = []
         self._access = {}
+        self._page_limit = None
+        self._page_offset = 0
+        self._stream_csv = False
         if kwargs:
             # view parameters
-            elements = ['accept_type', 'delta', 'report_type', 'tag_keys', 'access']
+            elements = ['accept_type', 'delta', 'report_type', 'tag_keys', 'access',
+                        'page_limit', 'page_offset', 'stream_csv']
             for key, value in kwargs.items():
                 if key in elements:
                     setattr(self, f'_{key}', value)
@@ -838,6 +912,46 @@ class ReportQueryHandler(QueryHandler):
 
         self.query_filter = self._get_filter()
         self.query_exclusions = self._get_exclusions()
+        self.query_page_window = self._get_page_window()
+
+    @property
+    def is_csv_stream(self):
+        """Return whether the report rows are streamed as CSV.
+
+        Ranked and delta reports post-process the full result set, so they
+        are rendered from memory.
+        """
+        is_csv_output = self._accept_type and 'text/csv' in self._accept_type
+        return bool(self._stream_csv and is_csv_output and not self._limit and not self._delta)
+
+    @property
+    def query_table(self):
+        """Return the table the report is served from.
+
+        Whole month queries at monthly resolution are answered from the
+        monthly rollup when every filter and group by can be answered by it.
+        """
+        monthly_table = self._mapper.monthly_table
+        if monthly_table and self._can_use_monthly_table():
+            return monthly_table
+        return self._mapper.query_table
+
+    def _can_use_monthly_table(self):
+        """Determine if the query parameters are covered by the monthly rollup."""
+        is_whole_month = self.resolution == 'monthly' and self.time_scope_units == 'month'
+        if not is_whole_month or self._delta:
+            return False
+        ignored = ('time_scope_value', 'time_scope_units', 'resolution', 'limit', 'offset')
+        keys = [key for key in self.query_parameters.get('filter', {}) if key not in ignored]
+        keys.extend(self.query_parameters.get('group_by', {}).keys())
+        options = self._mapper.monthly_options
+        for key in keys:
+            for prefix in ('and:', 'or:'):
+                if key.startswith(prefix):
+                    key = key[len(prefix):]
+            if key not in options:
+                return False
+        return True
 
     def initialize_totals(self):
         """Initialize the total response column values."""
@@ -846,6 +960,137 @@ class ReportQueryHandler(QueryHandler):
             query_sum[value] = 0
         return query_sum
 
+    def _get_window_aggregates(self):
+        """Split the total aggregates by whether a window can compute them.
+
+        Returns:
+            (dict): The aggregates totaled by window functions
+            (dict): The distinct aggregates
+
+        """
+        aggregates = self._mapper.report_type_map.get('aggregates')
+        window_aggregates, distinct_aggregates = {}, {}
+        for key, aggregate in aggregates.items():
+            if WindowTotal.is_supported(aggregate):
+                window_aggregates[key] = aggregate
+            else:
+                distinct_aggregates[key] = aggregate
+        return window_aggregates, distinct_aggregates
+
+    def annotate_totals(self, query_data):
+        """Annotate grouped rows with the totals over all groups.
+
+        The totals are computed by window functions so the grouped data and
+        the totals are returned by a single query. A page of the grouped
+        rows is selected around this query, so the totals cover the full
+        time scope. Distinct aggregates are left to get_query_totals.
+
+        Args:
+            query_data (QuerySet): The grouped query
+        Returns:
+            (QuerySet): The grouped query with total columns
+
+        """
+        aggregates, _ = self._get_window_aggregates()
+        totals = {f'{TOTAL_PREFIX}{key}': WindowTotal(aggregate)
+                  for key, aggregate in aggregates.items()}
+        return query_data.annotate(**totals)
+
+    def get_query_totals(self, query, query_data):
+        """Separate the totals from the grouped rows.
+
+        Rows outside of the requested page only carry the totals and are
+        dropped. Distinct aggregates are computed over the ungrouped query.
+
+        Args:
+            query (QuerySet): The ungrouped query for the full time scope
+            query_data (QuerySet|list): The grouped query annotated with totals,
+                or its ranked rows
+        Returns:
+            (list): The grouped rows of the page
+            (dict): The totals
+
+        """
+        aggregates, distinct_aggregates = self._get_window_aggregates()
+        query_sum = self.initialize_totals()
+        if not isinstance(query_data, list):
+            query_data = self._fetch_page(query_data)
+
+        page_data = []
+        for row in query_data:
+            for key in aggregates:
+                value = row.pop(f'{TOTAL_PREFIX}{key}')
+                if value is not None:
+                    query_sum[key] = value
+            if row.pop(PAGE_COLUMN, True):
+                page_data.append(row)
+
+        if distinct_aggregates:
+            query_sum.update(query.aggregate(**distinct_aggregates))
+        return page_data, query_sum
+
+    def _get_page_sql(self, sql, params, columns, date_column):
+        """Select the requested page of date buckets around a grouped query.
+
+        The page is selected after the window totals of the grouped query
+        are computed. One row outside of the page is kept to carry the
+        totals when the page is empty.
+
+        Args:
+            sql (str): The grouped query
+            params (tuple): The parameters of the grouped query
+            columns (list): Names for the columns of the grouped query
+            date_column (str): The column holding the date bucket
+        Returns:
+            (str): The page query, with an additional in page column
+            (tuple): The parameters of the page query
+
+        """
+        start, end = self.query_page_window
+        page_sql = f"""
+            WITH grouped ({', '.join(columns)}) AS ({sql})
+            SELECT grouped.*, true AS {PAGE_COLUMN}
+            FROM grouped
+            WHERE {date_column} >= %s AND {date_column} < %s
+            UNION ALL
+            (
+                SELECT grouped.*, false AS {PAGE_COLUMN}
+                FROM grouped
+                WHERE NOT ({date_column} >= %s AND {date_column} < %s)
+                LIMIT 1
+            )
+        """
+        return page_sql, (*params, start, end, start, end)
+
+    def _fetch_page(self, query_data):
+        """Fetch the grouped rows of the requested page.
+
+        Args:
+            query_data (QuerySet): The grouped query annotated with totals
+        Returns:
+            (list): The grouped rows, with an in page column when paginated
+
+        """
+        if self.query_page_window is None:
+            return list(query_data)
+
+        query = query_data.query
+        compiler = query.get_compiler(using=query_data.db)
+        sql, params = compiler.as_sql()
+        names = [*query.extra_select, *query.values_select, *query.annotation_select]
+        columns = [f'col{index}' for index in range(len(names))]
+        page_sql, page_params = self._get_page_sql(sql, params, columns, columns[names.index('date')])
+
+        with connections[query_data.db].cursor() as cursor:
+            cursor.execute(page_sql, page_params)
+            rows = cursor.fetchall()
+
+        fields = [select[0] for select in compiler.select[0:compiler.col_count]]
+        converters = compiler.get_converters(fields)
+        if converters:
+            rows = compiler.apply_converters(rows, converters)
+        return [dict(zip([*names, PAGE_COLUMN], row)) for row in rows]
+
     def get_tag_filter_keys(self):
         """Get tag keys from filter arguments."""
         tag_filters = []
@@ -1077,6 +1322,42 @@ class ReportQueryHandler(QueryHandler):
         LOG.debug(f'_get_exclusions: {composed_exclusions}')
         return composed_exclusions
 
+    def _get_page_window(self):
+        """Determine the date bucket window of the requested page.
+
+        Report data is paginated by date bucket, so a page limit and offset
+        translate into a window on the date of the grouped rows. Ranked and
+        CSV responses are paginated from the full result set.
+
+        Returns:
+            (tuple): start and end of the page, or None when pagination is
+                done in memory or the page holds the whole time scope
+
+        """
+        is_csv_output = self._accept_type and 'text/csv' in self._accept_type
+        is_ranked = 'offset' in self.query_parameters.get('filter', {})
+        if self._page_limit is None or is_csv_output or is_ranked:
+            return None
+
+        self.page_count = len(self.time_interval)
+        if self._page_offset == 0 and self._page_limit >= self.page_count:
+            return None
+
+        page_end = self._page_offset + self._page_limit
+        self.time_interval = self.time_interval[self._page_offset:page_end]
+
+        if self.time_interval:
+            start = self.time_interval[0]
+            if self.resolution == 'monthly':
+                end = self.time_interval[-1] + relativedelta.relativedelta(months=1)
+            else:
+                end = self.time_interval[-1] + datetime.timedelta(days=1)
+        else:
+            start = end = self.start_datetime
+
+        LOG.debug(f'_get_page_window: {start} - {end}')
+        return start, end
+
     def _get_group_by(self):
         """Create list for group_by parameters."""
         group_by = []
@@ -1243,6 +1524,77 @@ class ReportQueryHandler(QueryHandler):
 
         return out_data
 
+    def _format_data(self, query_data, query_group_by, order_fields):
+        """Format report rows as flat CSV rows or the nested response data.
+
+        Args:
+            query_data (list): The report rows
+            query_group_by (list): 'date' followed by the group by keys
+            order_fields (list): The list of dictionary keys to order by
+        Returns:
+            (list): The report data
+
+        """
+        is_csv_output = self._accept_type and 'text/csv' in self._accept_type
+        if not is_csv_output:
+            return self._shape_data(query_data, query_group_by, order_fields)
+
+        query_data = self.order_by(query_data, order_fields)
+        if self._limit:
+            return self._ranked_list(list(query_data))
+        return list(query_data)
+
+    def stream_query_data(self, query_data, order_fields):
+        """Iterate over the report rows through a server-side cursor.
+
+        The rows are ordered by the database and fetched in chunks, so the
+        report is never held in memory. The query runs when the returned
+        generator is first consumed.
+
+        Args:
+            query_data (QuerySet): The grouped report query
+            order_fields (list): The list of fields to order by
+        Returns:
+            (generator): The flat report rows
+
+        """
+        tag_column = self._mapper.tag_column
+        ordering = [field.replace('tag:', f'{tag_column}__') for field in order_fields]
+        query_data = query_data.order_by(*ordering)
+
+        def rows():
+            with tenant_context(self.tenant):
+                for row in query_data.iterator(chunk_size=CSV_STREAM_CHUNK_SIZE):
+                    yield self.strip_label_column_name([row], [])[0][0]
+
+        return rows()
+
+    def _shape_data(self, query_data, query_group_by, order_fields):
+        """Order and group report rows into the nested response data.
+
+        This produces the output of order_by, _apply_group_by and
+        _transform_data with a single sort and a single pass over the rows.
+
+        Args:
+            query_data (list): The report rows
+            query_group_by (list): 'date' followed by the group by keys
+            order_fields (list): The list of dictionary keys to order by
+        Returns:
+            (list): The nested report data
+
+        """
+        dates = [self.date_to_string(item) for item in self.time_interval]
+        group_by = [group for group in query_group_by if group != 'date']
+        pack = compile_packer(self._mapper.PACK_DEFINITIONS)
+
+        def pack_row(row):
+            """Pack a row for the response, dropping its rank."""
+            if self._limit and row.get('rank'):
+                del row['rank']
+            return pack(row)
+
+        return shape_report_data(query_data, dates, group_by, order_fields, pack_row)
+
     def order_by(self, data, order_fields):
         """Order a list of dictionaries by dictionary keys.
 
@@ -1343,8 +1695,134 @@ class ReportQueryHandler(QueryHandler):
 
         return self.unpack_date_grouped_data(rank_limited_data)
 
-    # needs refactoring, but disabling pylint's complexity check for now.
-    def _perform_rank_summation(self, entry, is_offset):    # noqa: C901
+    def _ranked_query(self, query_data):
+        """Limit a ranked query to the top ranks and an Others row per date.
+
+        The rank limiting and the summation of the remaining ranks are done
+        in the database so only the rows that are returned by the API are
+        fetched. The Others row takes its non-summed values from the rank 1
+        row of its date, as _perform_rank_summation does.
+
+        Args:
+            query_data (QuerySet): A values query annotated with a rank per date
+        Returns:
+            List(Dict): List of data points meeting the rank criteria
+
+        """
+        query = query_data.query
+        compiler = query.get_compiler(using=query_data.db)
+        sql, params = compiler.as_sql()
+        names = [*query.extra_select, *query.values_select, *query.annotation_select]
+        columns = {name: f'col{index}' for index, name in enumerate(names)}
+        rank = columns['rank']
+        date = columns['date']
+
+        group_by = self._get_group_by()
+        labels = set(group_by) | {'account_alias', 'cluster', 'cluster_alias'}
+        sum_columns = [name for name in self._mapper.sum_columns if name in columns]
+
+        other_columns = []
+        for name in names:
+            if name == 'rank':
+                other_columns.append('%s')
+            elif name in labels:
+                other_columns.append('NULL')
+            elif name in sum_columns:
+                other_columns.append(f'others.{columns[name]}')
+            else:
+                other_columns.append(f'first_rank.{columns[name]}')
+        sums = ', '.join(f'COALESCE(SUM({columns[name]}), 0) AS {columns[name]}'
+                         for name in sum_columns)
+        ranked_sql = f"""
+            WITH ranked ({', '.join(columns.values())}) AS ({sql})
+            SELECT ranked.*,
+                false AS is_others,
+                0 AS others_count,
+                (SELECT max({rank}) FROM ranked) AS max_rank
+            FROM ranked
+            WHERE {rank} > %s AND {rank} <= %s
+            UNION ALL
+            SELECT {', '.join(other_columns)},
+                true AS is_others,
+                others.others_count,
+                (SELECT max({rank}) FROM ranked) AS max_rank
+            FROM ranked AS first_rank
+            JOIN (
+                SELECT {date}, {sums + ', ' if sums else ''}count(*) AS others_count
+                FROM ranked
+                WHERE NOT ({rank} > %s AND {rank} <= %s)
+                GROUP BY {date}
+            ) AS others ON first_rank.{date} = others.{date}
+            WHERE first_rank.{rank} = 1
+        """
+        window = [self._offset, self._limit + self._offset]
+        ranked_params = (*params, *window, self._limit + 1, *window)
+        if self.query_page_window is not None:
+            ranked_columns = [*columns.values(), 'is_others', 'others_count', 'max_rank']
+            ranked_sql, ranked_params = self._get_page_sql(ranked_sql, ranked_params, ranked_columns, date)
+
+        with connections[query_data.db].cursor() as cursor:
+            cursor.execute(ranked_sql, ranked_params)
+            rows = cursor.fetchall()
+
+        fields = [select[0] for select in compiler.select[0:compiler.col_count]]
+        converters = compiler.get_converters(fields)
+        if converters:
+            rows = compiler.apply_converters(rows, converters)
+        return self._ranked_rows(rows, names, group_by)
+
+    def _ranked_rows(self, rows, names, group_by):
+        """Convert the rows of a ranked query to data points.
+
+        Args:
+            rows (list): Rows of the ranked query
+            names (list): Names of the grouped query columns
+            group_by (list): The group by parameters
+        Returns:
+            List(Dict): List of data points, with the Others rows labeled
+
+        """
+        is_offset = 'offset' in self.query_parameters.get('filter', {})
+        ranked_list = []
+        for row in rows:
+            is_others, num_others, max_rank = row[len(names):len(names) + 3]
+            self.max_rank = max_rank
+            data = dict(zip(names, row))
+            if self.query_page_window is not None:
+                data[PAGE_COLUMN] = row[-1]
+            if is_others:
+                if is_offset:
+                    continue
+                self._label_others(data, num_others, group_by)
+            ranked_list.append(data)
+        return ranked_list
+
+    def _label_others(self, other, num_others, group_by):
+        """Label the group by columns of an Others data point."""
+        others_label = '{} Others'.format(num_others)
+
+        if num_others == 1:
+            others_label = '{} Other'.format(num_others)
+
+        for group in group_by:
+            other[group] = others_label
+
+        if 'account' in group_by:
+            other['account_alias'] = others_label
+
+        if 'cluster' in group_by:
+            other['cluster_alias'] = others_label
+            exclusions = []
+        else:
+            # delete these labels from the Others category if we're not
+            # grouping by cluster.
+            exclusions = ['cluster', 'cluster_alias']
+
+        for exclude in exclusions:
+            if exclude in other:
+                del other[exclude]
+
+    def _perform_rank_summation(self, entry, is_offset):
         """Do the actual rank limiting for rank_list."""
         other = None
         ranked_list = []
@@ -1362,34 +1840,9 @@ class ReportQueryHandler(QueryHandler):
                     other_sums[column] += data.get(column) if data.get(column) else 0
 
         if other is not None and others_list and not is_offset:
-            num_others = len(others_list)
-            others_label = '{} Others'.format(num_others)
-
-            if num_others == 1:
-                others_label = '{} Other'.format(num_others)
-
             other.update(other_sums)
             other['rank'] = self._limit + 1
-            group_by = self._get_group_by()
-
-            for group in group_by:
-                other[group] = others_label
-
-            if 'account' in group_by:
-                other['account_alias'] = others_label
-
-            if 'cluster' in group_by:
-                other['cluster_alias'] = others_label
-                exclusions = []
-            else:
-                # delete these labels from the Others category if we're not
-                # grouping by cluster.
-                exclusions = ['cluster', 'cluster_alias']
-
-            for exclude in exclusions:
-                if exclude in other:
-                    del other[exclude]
-
+            self._label_others(other, len(others_list), self._get_group_by())
             ranked_list.append(other)
 
         return ranked_list
@@ -1481,7 +1934,7 @@ class ReportQueryHandler(QueryHandler):
         """
         delta_group_by = ['date'] + self._get_group_by()
         delta_filter = self._get_filter(delta=True)
-        q_table = self._mapper.query_table
+        q_table = self.query_table
         previous_query = q_table.objects.filter(delta_filter)
         previous_dict = self._create_previous_totals(previous_query,
                                                      delta_group_by)
@@ -1505,7 +1958,14 @@ class ReportQueryHandler(QueryHandler):
         delta_field = self._mapper._report_type_map.get('delta_key').get(self._delta)
         prev_total_sum = previous_query.aggregate(value=delta_field)
         if self.resolution == 'daily':
-            dates = [entry.get('date') for entry in query_data]
+            if self.query_page_window is None:
+                dates = [entry.get('date') for entry in query_data]
+            else:
+                # The page only holds some of the dates in the time scope
+                dates = list(q_table.objects.filter(self.query_filter)
+                             .annotate(date=self.date_trunc('usage_start'))
+                             .values_list('date', flat=True)
+                             .distinct())
             prev_total_filters = self._get_previous_totals_filter(dates)
             if prev_total_filters:
                 prev_total_sum = previous_query\
@@ -1535,11 +1995,16 @@ class ReportQueryHandler(QueryHandler):
         tag_column = self._mapper.tag_column
         val_to_strip = tag_column + '__'
         new_data = []
+        stripped_keys = {}
         for entry in data:
+            if not any(val_to_strip in key for key in entry):
+                new_data.append(entry)
+                continue
             new_entry = {}
             for key, value in entry.items():
-                key = key.replace(val_to_strip, '')
-                new_entry[key] = value
+                if key not in stripped_keys:
+                    stripped_keys[key] = key.replace(val_to_strip, '')
+                new_entry[stripped_keys[key]] = value
 
             new_data.append(new_entry)
 
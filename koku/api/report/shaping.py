@@ -0,0 +1,218 @@
+#
+# Copyright 2019 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Columnar shaping of grouped report data."""
+from decimal import Decimal
+
+NUMERIC_ORDERING = ['date', 'rank', 'delta', 'delta_percent',
+                    'total', 'usage', 'request', 'limit',
+                    'cost', 'infrastructure_cost', 'derived_cost']
+NUMBER_TYPES = (int, float, Decimal)
+
+
+class Descending:
+    """Invert the ordering of a sort key component."""
+
+    __slots__ = ('key',)
+
+    def __init__(self, key):
+        """Wrap a sort key."""
+        self.key = key
+
+    def __lt__(self, other):
+        """Order greater keys first."""
+        return other.key < self.key
+
+    def __eq__(self, other):
+        """Compare the wrapped keys."""
+        return self.key == other.key
+
+
+def _numeric_column(values, descending):
+    """Return the sort keys of a column ordered with nulls last.
+
+    Nulls are ordered first when descending, as a reversed sort would.
+    """
+    has_null = None in values
+    if descending and all(isinstance(value, NUMBER_TYPES) for value in values if value is not None):
+        if not has_null:
+            return [-value for value in values]
+        return [(value is not None, 0 if value is None else -value) for value in values]
+    keys = [(value is None, value) for value in values] if has_null else values
+    return [Descending(key) for key in keys] if descending else keys
+
+
+def sort_key_column(rows, order_field):
+    """Build the sort keys of one order field for every row.
+
+    Null and missing string values are replaced with 'no-<field>' in the
+    rows, as ReportQueryHandler.order_by does.
+
+    Args:
+        rows (list): The report rows
+        order_field (str): An order field, prefixed with '-' for descending
+    Returns:
+        (list): A sort key per row
+
+    """
+    field = order_field.replace('delta', 'delta_percent')
+    descending = '-' in field
+    field = field.replace('-', '')
+    if field in NUMERIC_ORDERING or 'tag:' in field:
+        if 'tag:' in field:
+            field = field[4:]
+        return _numeric_column([row[field] for row in rows], descending)
+
+    missing = 'no-{}'.format(field)
+    keys = []
+    for row in rows:
+        value = row.get(field)
+        if not value:
+            value = row[field] = missing
+        keys.append(value.lower())
+    return [Descending(key) for key in keys] if descending else keys
+
+
+def sort_order(rows, order_fields):
+    """Return the row indexes in report order.
+
+    The rows are sorted once on a composite key of all order fields. The
+    date is left out because rows are bucketed by date afterwards.
+
+    Args:
+        rows (list): The report rows
+        order_fields (list): The order fields, highest priority first
+    Returns:
+        (list): Row indexes in sorted order
+
+    """
+    columns = [sort_key_column(rows, field) for field in order_fields
+               if field.replace('-', '') != 'date']
+    if not columns:
+        return range(len(rows))
+    keys = columns[0] if len(columns) == 1 else list(zip(*columns))
+    return sorted(range(len(rows)), key=keys.__getitem__)
+
+
+def compile_packer(pack_definitions):
+    """Build a function that packs row values into value and units objects.
+
+    Args:
+        pack_definitions (dict): The pack definitions of ProviderMap
+    Returns:
+        (callable): Packs a row in place and returns it
+
+    """
+    definitions = [(pack_def.get('units'), tuple(pack_def.get('keys')))
+                   for pack_def in pack_definitions.values()]
+
+    def pack(row):
+        """Pack the values of a row that have units."""
+        for units_key, keys in definitions:
+            units = row.get(units_key)
+            if units is None:
+                continue
+            for key in keys:
+                value = row.get(key)
+                if value is not None:
+                    row[key] = {'value': value, 'units': units}
+            del row[units_key]
+        return row
+
+    return pack
+
+
+def _child_label(groups, index):
+    """Return the label of the children of a group level."""
+    if index + 1 < len(groups):
+        return groups[index + 1] + 's'
+    return 'values'
+
+
+def _group_node(children, parent, parent_label, group, key, child_label, is_leaf):
+    """Return the group node of a key, creating it in its parent if needed."""
+    label = key if key is not None else 'no-{}'.format(group)
+    node = {group: label, child_label: []}
+    parent[parent_label].append(node)
+    child = node if is_leaf else (node, {})
+    children[key] = child
+    return child
+
+
+def _place_rows(rows, order, buckets, group_by, pack_row):
+    """Place ordered rows into their date bucket and group nodes."""
+    groups = ['date'] + list(group_by)
+    last_level = len(group_by)
+    values_label = _child_label(groups, last_level)
+    if not group_by:
+        for index in order:
+            row = rows[index]
+            bucket = buckets.get(row.get('date'))
+            if bucket is not None:
+                bucket[0][values_label].append(pack_row(row))
+        return
+
+    branches = [(group, _child_label(groups, level - 1), _child_label(groups, level))
+                for level, group in enumerate(group_by[:-1], start=1)]
+    last_group = group_by[-1]
+    last_parent_label = _child_label(groups, last_level - 1)
+    for index in order:
+        row = rows[index]
+        bucket = buckets.get(row.get('date'))
+        if bucket is None:
+            continue
+        node, children = bucket
+        for group, parent_label, child_label in branches:
+            key = row.get(group)
+            child = children.get(key)
+            if child is None:
+                child = _group_node(children, node, parent_label, group, key, child_label, False)
+            node, children = child
+        key = row.get(last_group)
+        leaf = children.get(key)
+        if leaf is None:
+            leaf = _group_node(children, node, last_parent_label, last_group, key, values_label, True)
+        if key is None:
+            row[last_group] = leaf[last_group]
+        leaf[values_label].append(pack_row(row))
+
+
+def shape_report_data(rows, dates, group_by, order_fields, pack_row):
+    """Shape report rows into the nested date and group by structure.
+
+    The rows are sorted once and then placed into their date bucket and
+    group in a single pass.
+
+    Args:
+        rows (list): The report rows, each with a 'date' key
+        dates (list): The date strings of the report buckets, in output order
+        group_by (list): The group by keys, outermost first
+        order_fields (list): The order fields, highest priority first
+        pack_row (callable): Packs the values of a row into objects
+    Returns:
+        (list): The nested report data
+
+    """
+    label = _child_label(['date'] + list(group_by), 0)
+    data = []
+    buckets = {}
+    for date in dates:
+        node = {'date': date, label: []}
+        buckets[date] = (node, {})
+        data.append(node)
+
+    _place_rows(rows, sort_order(rows, order_fields), buckets, group_by, pack_row)
+    return data
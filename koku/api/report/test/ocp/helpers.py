@@ -18,24 +18,28 @@
 import hashlib
 import math
 import random
+from collections import defaultdict
 from decimal import Decimal
 from uuid import uuid4
 
 from dateutil.relativedelta import relativedelta
+from django.contrib.postgres.fields import JSONField
 from django.db import connection
-from django.db.models import CharField, DecimalField, ExpressionWrapper, F, Max, Sum, Value
-from django.db.models.functions import Coalesce
+from django.db.models import CharField, DecimalField, ExpressionWrapper, F, Func, Max, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
 from faker import Faker
 from tenant_schemas.utils import tenant_context
 
 from api.utils import DateHelper
 from reporting.models import (CostSummary,
+                              MonthlyCostSummary,
                               OCPStorageLineItem,
                               OCPStorageLineItemDaily,
                               OCPStorageLineItemDailySummary,
                               OCPUsageLineItem,
                               OCPUsageLineItemDaily,
                               OCPUsageLineItemDailySummary,
+                              OCPUsageLineItemMonthlySummary,
                               OCPUsageReport,
                               OCPUsageReportPeriod)
 from reporting_common.models import CostUsageReportManifest, CostUsageReportStatus
@@ -167,6 +171,8 @@ class OCPReportDataGenerator:
             self._populate_cost_summary_table()
             self._populate_charge_info()
             self._populate_storage_charge_info()
+            self._populate_monthly_summary_table()
+            self._populate_monthly_cost_summary_table()
             self._populate_pod_label_summary_table()
             self._populate_volume_claim_label_summary_table()
             self._populate_volume_label_summary_table()
@@ -177,6 +183,8 @@ class OCPReportDataGenerator:
             for table in (OCPUsageLineItem,
                           OCPUsageLineItemDaily,
                           OCPUsageLineItemDailySummary,
+                          OCPUsageLineItemMonthlySummary,
+                          MonthlyCostSummary,
                           OCPStorageLineItem,
                           OCPStorageLineItemDaily,
                           OCPStorageLineItemDailySummary,
@@ -463,6 +471,65 @@ class OCPReportDataGenerator:
             summary = CostSummary(**entry)
             summary.save()
 
+    def _populate_monthly_summary_table(self):
+        """Populate the monthly rollup of the daily summary table."""
+        OCPUsageLineItemMonthlySummary.objects.all().delete()
+        usage_fields = [
+            'pod_usage_cpu_core_hours',
+            'pod_request_cpu_core_hours',
+            'pod_limit_cpu_core_hours',
+            'pod_charge_cpu_core_hours',
+            'pod_usage_memory_gigabyte_hours',
+            'pod_request_memory_gigabyte_hours',
+            'pod_limit_memory_gigabyte_hours',
+            'pod_charge_memory_gigabyte_hours',
+        ]
+        capacity_fields = [
+            'cluster_capacity_cpu_core_hours',
+            'cluster_capacity_memory_gigabyte_hours',
+            'total_capacity_cpu_core_hours',
+            'total_capacity_memory_gigabyte_hours',
+        ]
+
+        daily_capacity = OCPUsageLineItemDailySummary.objects\
+            .annotate(month=TruncMonth('usage_start'))\
+            .values('month', 'usage_start', 'cluster_id')\
+            .annotate(**{field: Max(field) for field in capacity_fields})
+        capacity = defaultdict(lambda: defaultdict(Decimal))
+        for entry in daily_capacity:
+            for field in capacity_fields:
+                capacity[(entry['month'], entry['cluster_id'])][field] += entry[field] or 0
+
+        entries = OCPUsageLineItemDailySummary.objects\
+            .annotate(month=TruncMonth('usage_start'))\
+            .values('month', 'cluster_id', 'cluster_alias', 'namespace', 'node')\
+            .annotate(usage_end=Max('usage_end'),
+                      **{field: Sum(field) for field in usage_fields})
+        for entry in entries:
+            month = entry.pop('month')
+            summary = OCPUsageLineItemMonthlySummary(usage_start=month, **entry,
+                                                     **capacity[(month, entry['cluster_id'])])
+            summary.save()
+
+    def _populate_monthly_cost_summary_table(self):
+        """Populate the monthly rollup of the cost summary table."""
+        MonthlyCostSummary.objects.all().delete()
+        cost_fields = [
+            'pod_charge_cpu_core_hours',
+            'pod_charge_memory_gigabyte_hours',
+            'persistentvolumeclaim_charge_gb_month',
+            'infra_cost',
+            'project_infra_cost',
+        ]
+        entries = CostSummary.objects\
+            .annotate(month=TruncMonth('usage_start'))\
+            .values('month', 'cluster_id', 'cluster_alias', 'namespace', 'node')\
+            .annotate(usage_end=Max('usage_end'),
+                      **{field: Sum(field) for field in cost_fields})
+        for entry in entries:
+            summary = MonthlyCostSummary(usage_start=entry.pop('month'), **entry)
+            summary.save()
+
     def create_storage_line_items(self, report_period, report):
         """Create OCP hourly usage line items."""
         vol_gb = random.randint(4, 32)
@@ -531,7 +598,10 @@ class OCPReportDataGenerator:
             'cluster_alias'
         ]
         annotations = {
-            'volume_labels': Coalesce(F('persistentvolume_labels'), F('persistentvolumeclaim_labels')),
+            # persistentvolumeclaim_labels values win in the merge, as in the summary SQL
+            'volume_labels': Func(F('persistentvolume_labels'), F('persistentvolumeclaim_labels'),
+                                  template='(%(expressions)s)', arg_joiner=' || ',
+                                  output_field=JSONField()),
             'persistentvolumeclaim_capacity_gigabyte': ExpressionWrapper(
                 F('persistentvolumeclaim_capacity_bytes') * math.pow(2, -30),
                 output_field=DecimalField()
@@ -559,17 +629,26 @@ class OCPReportDataGenerator:
     def _populate_pod_label_summary_table(self):
         """Populate pod label key and values."""
         raw_sql = """
-            INSERT INTO reporting_ocpusagepodlabel_summary
+            INSERT INTO reporting_ocpusagepodlabel_summary (
+                key, values, usage_start, usage_end, cluster_id, namespace
+            )
             SELECT l.key,
-                array_agg(DISTINCT l.value) as values
+                array_agg(DISTINCT l.value) as values,
+                l.usage_start,
+                l.usage_start,
+                l.cluster_id,
+                l.namespace
             FROM (
                 SELECT key,
-                    value
+                    value,
+                    date(li.usage_start) as usage_start,
+                    li.cluster_id,
+                    li.namespace
                 FROM reporting_ocpusagelineitem_daily AS li,
                     jsonb_each_text(li.pod_labels) labels
             ) l
-            GROUP BY l.key
-            ON CONFLICT (key) DO UPDATE
+            GROUP BY l.key, l.usage_start, l.cluster_id, l.namespace
+            ON CONFLICT (key, usage_start, cluster_id, namespace) DO UPDATE
             SET values = EXCLUDED.values
         """
 
@@ -577,19 +656,28 @@ class OCPReportDataGenerator:
             cursor.execute(raw_sql)
 
     def _populate_volume_claim_label_summary_table(self):
-        """Populate pod label key and values."""
+        """Populate volume claim label key and values."""
         raw_sql = """
-            INSERT INTO reporting_ocpstoragevolumeclaimlabel_summary
+            INSERT INTO reporting_ocpstoragevolumeclaimlabel_summary (
+                key, values, usage_start, usage_end, cluster_id, namespace
+            )
             SELECT l.key,
-                array_agg(DISTINCT l.value) as values
+                array_agg(DISTINCT l.value) as values,
+                l.usage_start,
+                l.usage_start,
+                l.cluster_id,
+                l.namespace
             FROM (
                 SELECT key,
-                    value
-                FROM reporting_ocpusagelineitem_daily AS li,
-                    jsonb_each_text(li.pod_labels) labels
+                    value,
+                    date(li.usage_start) as usage_start,
+                    li.cluster_id,
+                    li.namespace
+                FROM reporting_ocpstoragelineitem_daily AS li,
+                    jsonb_each_text(li.persistentvolumeclaim_labels) labels
             ) l
-            GROUP BY l.key
-            ON CONFLICT (key) DO UPDATE
+            GROUP BY l.key, l.usage_start, l.cluster_id, l.namespace
+            ON CONFLICT (key, usage_start, cluster_id, namespace) DO UPDATE
             SET values = EXCLUDED.values
         """
 
@@ -597,19 +685,28 @@ class OCPReportDataGenerator:
             cursor.execute(raw_sql)
 
     def _populate_volume_label_summary_table(self):
-        """Populate pod label key and values."""
+        """Populate volume label key and values."""
         raw_sql = """
-            INSERT INTO reporting_ocpstoragevolumelabel_summary
+            INSERT INTO reporting_ocpstoragevolumelabel_summary (
+                key, values, usage_start, usage_end, cluster_id, namespace
+            )
             SELECT l.key,
-                array_agg(DISTINCT l.value) as values
+                array_agg(DISTINCT l.value) as values,
+                l.usage_start,
+                l.usage_start,
+                l.cluster_id,
+                l.namespace
             FROM (
                 SELECT key,
-                    value
-                FROM reporting_ocpusagelineitem_daily AS li,
-                    jsonb_each_text(li.pod_labels) labels
+                    value,
+                    date(li.usage_start) as usage_start,
+                    li.cluster_id,
+                    li.namespace
+                FROM reporting_ocpstoragelineitem_daily AS li,
+                    jsonb_each_text(li.persistentvolume_labels) labels
             ) l
-            GROUP BY l.key
-            ON CONFLICT (key) DO UPDATE
+            GROUP BY l.key, l.usage_start, l.cluster_id, l.namespace
+            ON CONFLICT (key, usage_start, cluster_id, namespace) DO UPDATE
             SET values = EXCLUDED.values
         """
 
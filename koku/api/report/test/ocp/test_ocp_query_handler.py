@@ -15,6 +15,7 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 """Test the Report Queries."""
+import types
 from collections import defaultdict
 from decimal import Decimal
 from unittest.mock import patch
@@ -31,7 +32,11 @@ from api.report.test.ocp.helpers import OCPReportDataGenerator
 from api.report.test.ocp_aws.helpers import OCPAWSReportDataGenerator
 from api.tags.ocp.queries import OCPTagQueryHandler
 from api.utils import DateHelper
-from reporting.models import CostSummary, OCPUsageLineItemDailySummary
+from reporting.models import (CostSummary,
+                              MonthlyCostSummary,
+                              OCPStorageLineItemDailySummary,
+                              OCPUsageLineItemDailySummary,
+                              OCPUsageLineItemMonthlySummary)
 
 
 class OCPReportQueryHandlerTest(IamTestCase):
@@ -111,6 +116,192 @@ class OCPReportQueryHandlerTest(IamTestCase):
         total = query_output.get('total')
         self.assertEqual(total.get('cost', {}).get('value'), current_totals.get('cost'))
 
+    def test_execute_query_paginated(self):
+        """Test that only the requested page of dates is queried."""
+        query_params = {}
+        handler = OCPReportQueryHandler(
+            query_params,
+            '',
+            self.tenant,
+            **{'report_type': 'cpu', 'page_limit': 3, 'page_offset': 2}
+        )
+        self.assertEqual(handler.page_count, 10)
+        self.assertEqual(len(handler.time_interval), 3)
+
+        aggregates = handler._mapper.report_type_map.get('aggregates')
+        current_totals = self.get_totals_by_time_scope(aggregates)
+        query_output = handler.execute_query()
+        total = query_output.get('total')
+        self.assertEqual(total.get('usage', {}).get('value'), current_totals.get('usage'))
+
+        expected_dates = [handler.date_to_string(date) for date in handler.time_interval]
+        dates = [entry.get('date') for entry in query_output.get('data')]
+        self.assertEqual(dates, expected_dates)
+
+    def test_execute_query_paginated_past_end(self):
+        """Test that an offset past the time scope returns no data."""
+        handler = OCPReportQueryHandler(
+            {},
+            '',
+            self.tenant,
+            **{'report_type': 'cpu', 'page_limit': 5, 'page_offset': 20}
+        )
+        aggregates = handler._mapper.report_type_map.get('aggregates')
+        current_totals = self.get_totals_by_time_scope(aggregates)
+        query_output = handler.execute_query()
+        self.assertEqual(query_output.get('data'), [])
+        total = query_output.get('total')
+        self.assertEqual(total.get('usage', {}).get('value'), current_totals.get('usage'))
+
+    def test_execute_query_page_holds_time_scope(self):
+        """Test that no page filter is used when the page holds every date."""
+        handler = OCPReportQueryHandler(
+            {},
+            '',
+            self.tenant,
+            **{'report_type': 'cpu', 'page_limit': 100, 'page_offset': 0}
+        )
+        self.assertEqual(handler.page_count, 10)
+        self.assertEqual(len(handler.time_interval), 10)
+        self.assertIsNone(handler.query_page_window)
+
+    def test_execute_query_csv_not_paginated(self):
+        """Test that CSV output is not paginated by the query."""
+        handler = OCPReportQueryHandler(
+            {},
+            '',
+            self.tenant,
+            **{'report_type': 'cpu', 'page_limit': 3, 'page_offset': 0,
+               'accept_type': 'text/csv'}
+        )
+        self.assertIsNone(handler.page_count)
+        self.assertIsNone(handler.query_page_window)
+
+    def test_execute_query_csv_stream(self):
+        """Test that streamed CSV rows match the CSV rows built in memory."""
+        kwargs = {'report_type': 'cpu', 'accept_type': 'text/csv'}
+        handler = OCPReportQueryHandler({}, '', self.tenant, **kwargs)
+        self.assertFalse(handler.is_csv_stream)
+        expected = handler.execute_query().get('data')
+
+        handler = OCPReportQueryHandler({}, '', self.tenant, stream_csv=True, **kwargs)
+        self.assertTrue(handler.is_csv_stream)
+        query_output = handler.execute_query()
+        self.assertIsInstance(query_output.get('data'), types.GeneratorType)
+        result = list(query_output.get('data'))
+
+        def row_key(row):
+            return sorted((key, str(value)) for key, value in row.items())
+
+        self.assertEqual(sorted(result, key=row_key), sorted(expected, key=row_key))
+        dates = [row.get('date') for row in result]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+
+    def test_csv_stream_not_used_for_ranked_reports(self):
+        """Test that ranked CSV reports are not streamed."""
+        query_params = {'filter': {'limit': 1}, 'group_by': {'project': ['*']}}
+        handler = OCPReportQueryHandler(query_params, '?filter[limit]=1&group_by[project]=*', self.tenant,
+                                        stream_csv=True,
+                                        **{'report_type': 'cpu', 'accept_type': 'text/csv'})
+        self.assertFalse(handler.is_csv_stream)
+
+    def test_ranked_query_matches_ranked_list(self):
+        """Test that rank limiting in SQL matches rank limiting in Python."""
+        query_params = {'filter': {'resolution': 'daily',
+                                   'time_scope_value': -1,
+                                   'time_scope_units': 'month',
+                                   'limit': 1},
+                        'group_by': {'project': ['*']}}
+        handler = OCPReportQueryHandler(
+            query_params,
+            '?filter[limit]=1&group_by[project]=*',
+            self.tenant,
+            **{'report_type': 'cpu'}
+        )
+        group_by_value = handler._get_group_by()
+        clustered_group_by = handler._get_cluster_group_by(['date'] + group_by_value)
+        with tenant_context(self.tenant):
+            query_data = OCPUsageLineItemDailySummary.objects\
+                .filter(handler.query_filter)\
+                .annotate(**handler.annotations)\
+                .values(*clustered_group_by)\
+                .annotate(**handler.report_annotations)\
+                .annotate(rank=handler.get_rank_window_function(group_by_value))
+            expected = handler._ranked_list(list(query_data))
+            ranked = handler._ranked_query(query_data)
+
+        def sort_key(row):
+            return (row['date'], row['rank'])
+
+        self.assertTrue(any('Other' in row['project'] for row in ranked))
+        self.assertEqual(sorted(ranked, key=sort_key), sorted(expected, key=sort_key))
+
+    def test_query_table_monthly_rollup(self):
+        """Test that whole month queries are served from the monthly rollups."""
+        query_params = {'filter': {'resolution': 'monthly',
+                                   'time_scope_value': -1,
+                                   'time_scope_units': 'month'},
+                        'group_by': {'project': ['*']}}
+        expected = {'cpu': OCPUsageLineItemMonthlySummary,
+                    'memory': OCPUsageLineItemMonthlySummary,
+                    'costs': MonthlyCostSummary,
+                    'costs_by_project': MonthlyCostSummary,
+                    'volume': OCPStorageLineItemDailySummary}
+        for report_type, table in expected.items():
+            handler = OCPReportQueryHandler(
+                query_params,
+                '?group_by[project]=*',
+                self.tenant,
+                **{'report_type': report_type}
+            )
+            self.assertEqual(handler.query_table, table)
+
+    def test_query_table_falls_back_to_daily(self):
+        """Test that queries the rollup cannot answer use the daily summary."""
+        base_filter = {'resolution': 'monthly',
+                       'time_scope_value': -1,
+                       'time_scope_units': 'month'}
+        daily_params = [
+            {'filter': {'resolution': 'daily',
+                        'time_scope_value': -1,
+                        'time_scope_units': 'month'}},
+            {'filter': {'resolution': 'monthly',
+                        'time_scope_value': -10,
+                        'time_scope_units': 'day'}},
+            {'filter': base_filter, 'group_by': {'tag:app': ['*']}},
+            {'filter': dict(base_filter, pod=['*'])},
+            {'filter': base_filter, 'delta': 'usage'},
+        ]
+        for query_params in daily_params:
+            handler = OCPReportQueryHandler(
+                query_params,
+                '',
+                self.tenant,
+                **{'report_type': 'cpu'}
+            )
+            self.assertEqual(handler.query_table, OCPUsageLineItemDailySummary)
+
+    def test_execute_query_monthly_rollup(self):
+        """Test that totals from the monthly rollup match the daily summary."""
+        query_params = {'filter': {'resolution': 'monthly',
+                                   'time_scope_value': -1,
+                                   'time_scope_units': 'month'},
+                        'group_by': {'node': ['*']}}
+        handler = OCPReportQueryHandler(
+            query_params,
+            '?group_by[node]=*',
+            self.tenant,
+            **{'report_type': 'cpu'}
+        )
+        self.assertEqual(handler.query_table, OCPUsageLineItemMonthlySummary)
+        aggregates = handler._mapper.report_type_map.get('aggregates')
+        current_totals = self.get_totals_by_time_scope(aggregates, self.this_month_filter)
+        query_output = handler.execute_query()
+        total = query_output.get('total')
+        self.assertEqual(total.get('usage', {}).get('value'), current_totals.get('usage'))
+        self.assertEqual(total.get('request', {}).get('value'), current_totals.get('request'))
+        self.assertEqual(total.get('cost', {}).get('value'), current_totals.get('cost'))
+
     def test_get_cluster_capacity_monthly_resolution(self):
         """Test that cluster capacity returns a full month's capacity."""
         query_params = {'filter': {'resolution': 'monthly',
@@ -21,8 +21,11 @@ from unittest.mock import patch
 from urllib.parse import quote_plus, urlencode
 
 from dateutil import relativedelta
+from django.core.cache import caches
+from django.db import connection
 from django.db.models import Count, F, Sum
 from django.http import HttpRequest, QueryDict
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.request import Request
@@ -281,6 +284,25 @@ class OCPReportViewTest(IamTestCase):
                 self.assertTrue('usage' in values)
                 self.assertTrue('request' in values)
 
+    def test_execute_query_ocp_costs_single_report_query(self):
+        """Test that the rows and totals of a report page come from one query."""
+        url = reverse('reports-openshift-costs')
+        client = APIClient()
+        totals = []
+        for params in ('', '?limit=3&offset=2'):
+            with self.subTest(params=params):
+                caches['default'].clear()
+                with CaptureQueriesContext(connection) as context:
+                    response = client.get(url + params, **self.headers)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                report_queries = [query for query in context.captured_queries
+                                  if 'reporting_ocpcosts_summary' in query['sql']]
+                self.assertEqual(len(report_queries), 1)
+                totals.append(response.json().get('meta', {}).get('total'))
+
+        # The totals of a page cover the full time scope
+        self.assertEqual(totals[0], totals[1])
+
     def test_costs_api_has_units(self):
         """Test that the costs API returns units."""
         url = reverse('reports-openshift-costs')
@@ -113,6 +113,7 @@ class OCPAWSReportDataGenerator(OCPReportDataGenerator):
             for node in self.nodes
         ]
         with tenant_context(self.tenant):
+            self.bill, _ = AWSCostEntryBill.objects.get_or_create(**self.aws_info.bill)
             for i, period in enumerate(self.period_ranges):
                 for report_date in self.report_ranges[i]:
                     self._populate_ocp_aws_cost_line_item_daily_summary(report_date)
@@ -174,6 +175,7 @@ class OCPAWSReportDataGenerator(OCPReportDataGenerator):
 
     def _populate_aws_daily_table(self):
         included_fields = [
+            'cost_entry_bill_id',
             'cost_entry_product_id',
             'cost_entry_pricing_id',
             'cost_entry_reservation_id',
@@ -282,6 +284,7 @@ class OCPAWSReportDataGenerator(OCPReportDataGenerator):
                     'product_code': aws_product.get('service_code'),
                     'product_family': aws_product.get('product_family'),
                     'instance_type': instance_type,
+                    'cost_entry_bill': self.bill,
                     'usage_account_id': self.usage_account_id,
                     'account_alias': None,
                     'availability_zone': az,
@@ -326,6 +329,7 @@ class OCPAWSReportDataGenerator(OCPReportDataGenerator):
                     'product_code': aws_product.get('service_code'),
                     'product_family': aws_product.get('product_family'),
                     'instance_type': instance_type,
+                    'cost_entry_bill': self.bill,
                     'usage_account_id': self.usage_account_id,
                     'account_alias': None,
                     'availability_zone': az,
@@ -341,17 +345,27 @@ class OCPAWSReportDataGenerator(OCPReportDataGenerator):
     def _populate_aws_tag_summary(self):
         """Populate the AWS tag summary table."""
         raw_sql = """
-            INSERT INTO reporting_awstags_summary
+            INSERT INTO reporting_awstags_summary (
+                key, values, usage_start, usage_end, cost_entry_bill_id, usage_account_id, account_alias_id
+            )
             SELECT l.key,
-                array_agg(DISTINCT l.value) as values
+                array_agg(DISTINCT l.value) as values,
+                l.usage_start,
+                l.usage_start,
+                l.cost_entry_bill_id,
+                l.usage_account_id,
+                max(l.account_alias_id)
             FROM (
                 SELECT key,
-                    value
+                    value,
+                    date(li.usage_start) as usage_start,
+                    li.cost_entry_bill_id,
+                    li.usage_account_id, li.account_alias_id
                 FROM reporting_ocpawscostlineitem_daily_summary AS li,
                     jsonb_each_text(li.tags) labels
             ) l
-            GROUP BY l.key
-            ON CONFLICT (key) DO UPDATE
+            GROUP BY l.key, l.usage_start, l.cost_entry_bill_id, l.usage_account_id
+            ON CONFLICT (key, usage_start, cost_entry_bill_id, usage_account_id) DO UPDATE
             SET values = EXCLUDED.values
         """
 
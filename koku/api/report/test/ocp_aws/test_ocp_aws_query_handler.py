@@ -121,6 +121,25 @@ class OCPAWSQueryHandlerTest(IamTestCase):
 
         self.assertEqual(total.get('total'), current_totals.get('total'))
 
+    def test_execute_sum_query_instance_types_count_distinct(self):
+        """Test that an instance used on several days is counted once in the total."""
+        with tenant_context(self.tenant):
+            instance_days = OCPAWSCostLineItemDailySummary.objects\
+                .filter(instance_type__isnull=False, **self.ten_day_filter)\
+                .values('resource_id', 'usage_start')\
+                .distinct()
+            resource_ids = {row.get('resource_id') for row in instance_days}
+        self.assertEqual(len(resource_ids), 1)
+        self.assertGreater(len(instance_days), 1)
+
+        query_params = {'filter': {'resolution': 'daily', 'time_scope_value': -10,
+                                   'time_scope_units': 'day'}}
+        handler = OCPAWSReportQueryHandler(query_params, '', self.tenant,
+                                           **{'report_type': 'instance_type'})
+        query_output = handler.execute_query()
+        total = query_output.get('total')
+        self.assertEqual(total.get('count', {}).get('value'), 1)
+
     def test_execute_query_current_month_daily(self):
         """Test execute_query for current month on daily breakdown."""
         query_params = {'filter':
@@ -24,9 +24,9 @@ from django.db.models import Count, F, Sum
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
-from rest_framework_csv.renderers import CSVRenderer
 from tenant_schemas.utils import tenant_context
 
+from api.common.csv import StreamingCSVResponse
 from api.iam.serializers import UserSerializer
 from api.iam.test.iam_test_case import IamTestCase
 from api.query_handler import TruncDayString
@@ -614,11 +614,10 @@ class OCPAWSReportViewTest(IamTestCase):
         client = APIClient(HTTP_ACCEPT='text/csv')
 
         response = client.get(url, **self.headers)
-        response.render()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.accepted_media_type, 'text/csv')
-        self.assertIsInstance(response.accepted_renderer, CSVRenderer)
+        self.assertIsInstance(response, StreamingCSVResponse)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
 
     def test_execute_query_ocp_aws_costs_group_by_project(self):
         """Test that grouping by project filters data."""
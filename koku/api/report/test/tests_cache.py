@@ -0,0 +1,76 @@
+#
+# Copyright 2019 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Test the report response cache."""
+from unittest.mock import Mock
+
+from django.http import HttpRequest, QueryDict
+
+from api.iam.test.iam_test_case import IamTestCase
+from api.report.cache import (get_access_fingerprint,
+                              get_cache_key,
+                              get_cached_report,
+                              set_cached_report)
+
+
+class ReportCacheTest(IamTestCase):
+    """Tests for the report response cache."""
+
+    def _create_request(self, query_string, access=None):
+        """Create a request with the given query string and access."""
+        request = HttpRequest()
+        request.path = '/api/v1/reports/aws/costs/'
+        request.GET = QueryDict(query_string)
+        request.user = Mock(access=access)
+        return request
+
+    def test_cache_key_ignores_param_order(self):
+        """Test that query parameter order does not change the key."""
+        first = self._create_request('filter[resolution]=daily&group_by[account]=*')
+        second = self._create_request('group_by[account]=*&filter[resolution]=daily')
+        self.assertEqual(get_cache_key(first, self.tenant, 'aws', 'costs'),
+                         get_cache_key(second, self.tenant, 'aws', 'costs'))
+
+    def test_cache_key_changes_with_data_version(self):
+        """Test that a new data version changes the key."""
+        request = self._create_request('group_by[account]=*')
+        key = get_cache_key(request, self.tenant, 'aws', 'costs')
+        self.tenant.data_version += 1
+        self.assertNotEqual(key, get_cache_key(request, self.tenant, 'aws', 'costs'))
+
+    def test_cache_key_changes_with_access(self):
+        """Test that different RBAC access changes the key."""
+        access = {'aws.account': {'read': ['123456']}}
+        unrestricted = self._create_request('group_by[account]=*')
+        restricted = self._create_request('group_by[account]=*', access=access)
+        self.assertNotEqual(get_cache_key(unrestricted, self.tenant, 'aws', 'costs'),
+                            get_cache_key(restricted, self.tenant, 'aws', 'costs'))
+
+    def test_access_fingerprint_is_stable(self):
+        """Test that equal access dictionaries have the same fingerprint."""
+        first = {'aws.account': {'read': ['1']}, 'openshift.cluster': {'read': ['*']}}
+        second = {'openshift.cluster': {'read': ['*']}, 'aws.account': {'read': ['1']}}
+        self.assertEqual(get_access_fingerprint(first), get_access_fingerprint(second))
+
+    def test_get_set_cached_report(self):
+        """Test that a stored report is returned from the cache."""
+        request = self._create_request('group_by[account]=*')
+        key = get_cache_key(request, self.tenant, 'aws', 'costs')
+        self.assertIsNone(get_cached_report(key))
+
+        report = {'meta': {'count': 1}, 'data': []}
+        set_cached_report(key, report)
+        self.assertEqual(get_cached_report(key), report)
@@ -26,7 +26,7 @@ from urllib.parse import quote_plus
 from django.contrib.postgres.aggregates import ArrayAgg
 from django.db import connection
 from django.db.models import Count, DateTimeField, Max, Sum, Value
-from django.db.models.functions import Cast, Concat
+from django.db.models.functions import Cast, Concat, TruncMonth
 from django.test import TestCase
 from faker import Faker
 from tenant_schemas.utils import tenant_context
@@ -44,6 +44,7 @@ from reporting.models import (AWSAccountAlias,
                               AWSCostEntryLineItem,
                               AWSCostEntryLineItemDaily,
                               AWSCostEntryLineItemDailySummary,
+                              AWSCostEntryLineItemMonthlySummary,
                               AWSCostEntryPricing,
                               AWSCostEntryProduct)
 
@@ -492,6 +493,7 @@ class ReportQueryTest(IamTestCase):
 
     def _populate_daily_table(self):
         included_fields = [
+            'cost_entry_bill_id',
             'cost_entry_product_id',
             'cost_entry_pricing_id',
             'cost_entry_reservation_id',
@@ -565,20 +567,53 @@ class ReportQueryTest(IamTestCase):
             summary.save()
             self.current_month_total += entry['unblended_cost']
 
+    def _populate_monthly_summary_table(self):
+        AWSCostEntryLineItemMonthlySummary.objects.all().delete()
+        included_fields = [
+            'month',
+            'cost_entry_bill_id',
+            'usage_account_id',
+            'account_alias_id',
+            'product_code',
+            'availability_zone',
+            'region',
+            'currency_code'
+        ]
+        entries = AWSCostEntryLineItemDailySummary.objects\
+            .annotate(month=TruncMonth('usage_start'))\
+            .values(*included_fields)\
+            .annotate(usage_end=Max('usage_end'),
+                      unblended_cost=Sum('unblended_cost'))
+        for entry in entries:
+            summary = AWSCostEntryLineItemMonthlySummary(usage_start=entry.pop('month'), **entry)
+            summary.save()
+
     def _populate_tag_summary_table(self):
         """Populate pod label key and values."""
         raw_sql = """
-            INSERT INTO reporting_awstags_summary
+            INSERT INTO reporting_awstags_summary (
+                key, values, usage_start, usage_end, cost_entry_bill_id, usage_account_id, account_alias_id
+            )
             SELECT l.key,
-                array_agg(DISTINCT l.value) as values
+                array_agg(DISTINCT l.value) as values,
+                l.usage_start,
+                l.usage_start,
+                l.cost_entry_bill_id,
+                l.usage_account_id,
+                max(aa.id)
             FROM (
                 SELECT key,
-                    value
+                    value,
+                    date(li.usage_start) as usage_start,
+                    li.cost_entry_bill_id,
+                    li.usage_account_id
                 FROM reporting_awscostentrylineitem_daily AS li,
                     jsonb_each_text(li.tags) labels
             ) l
-            GROUP BY l.key
-            ON CONFLICT (key) DO UPDATE
+            LEFT JOIN reporting_awsaccountalias AS aa
+                ON l.usage_account_id = aa.account_id
+            GROUP BY l.key, l.usage_start, l.cost_entry_bill_id, l.usage_account_id
+            ON CONFLICT (key, usage_start, cost_entry_bill_id, usage_account_id) DO UPDATE
             SET values = EXCLUDED.values
         """
 
@@ -639,8 +674,40 @@ class ReportQueryTest(IamTestCase):
 
             self._populate_daily_table()
             self._populate_daily_summary_table()
+            self._populate_monthly_summary_table()
             self._populate_tag_summary_table()
 
+    def test_query_table_monthly_rollup(self):
+        """Test that whole month cost queries use the monthly rollup."""
+        query_params = {'filter': {'resolution': 'monthly',
+                                   'time_scope_value': -1,
+                                   'time_scope_units': 'month'},
+                        'group_by': {'account': ['*']}}
+        handler = AWSReportQueryHandler(query_params, '?group_by[account]=*', self.tenant,
+                                        **{'report_type': 'costs'})
+        self.assertEqual(handler.query_table, AWSCostEntryLineItemMonthlySummary)
+
+        query_output = handler.execute_query()
+        total = query_output.get('total')
+        self.assertEqual(total.get('cost', {}).get('value'), self.current_month_total)
+
+    def test_query_table_monthly_rollup_fallback(self):
+        """Test that queries the rollup cannot answer use the daily summary."""
+        base_filter = {'resolution': 'monthly',
+                       'time_scope_value': -1,
+                       'time_scope_units': 'month'}
+        cases = [
+            ({'filter': base_filter, 'group_by': {'product_family': ['*']}}, 'costs'),
+            ({'filter': base_filter, 'group_by': {'tag:app': ['*']}}, 'costs'),
+            ({'filter': dict(base_filter, resolution='daily')}, 'costs'),
+            ({'filter': base_filter}, 'instance_type'),
+            ({'filter': base_filter}, 'storage'),
+        ]
+        for query_params, report_type in cases:
+            handler = AWSReportQueryHandler(query_params, '', self.tenant,
+                                            **{'report_type': report_type})
+            self.assertEqual(handler.query_table, AWSCostEntryLineItemDailySummary)
+
     def test_transform_null_group(self):
         """Test transform data with null group value."""
         handler = AWSReportQueryHandler({}, '', self.tenant,
@@ -1647,8 +1714,8 @@ class ReportQueryTest(IamTestCase):
 
         self.assertEqual(actual, expected)
 
-    def test_calculate_total(self):
-        """Test that calculated totals return correctly."""
+    def test_build_sum(self):
+        """Test that totals calculated with the grouped data return correctly."""
         query_params = {
             'filter': {
                 'resolution': 'monthly',
@@ -1664,7 +1731,15 @@ class ReportQueryTest(IamTestCase):
         )
         expected_units = 'USD'
         with tenant_context(self.tenant):
-            result = handler.calculate_total(**{'cost_units': expected_units})
+            query = AWSCostEntryLineItemDailySummary.objects.filter(handler.query_filter)
+            query_data = query.annotate(**handler.annotations)\
+                .values('date', 'account')\
+                .annotate(**handler._mapper.report_type_map.get('annotations'))
+            query_data = handler.annotate_totals(query_data)
+            rows, result = handler._build_sum(query, query_data)
+
+        for row in rows:
+            self.assertNotIn('grand_total_cost', row)
 
         self.assertEqual(result.get('cost', {}).get('value'), self.current_month_total)
         self.assertEqual(result.get('cost', {}).get('units'), expected_units)
@@ -0,0 +1,126 @@
+#
+# Copyright 2019 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Test the report response shaping."""
+import copy
+import random
+from decimal import Decimal
+
+from api.iam.test.iam_test_case import IamTestCase
+from api.report.ocp.ocp_query_handler import OCPReportQueryHandler
+from api.report.shaping import compile_packer, shape_report_data, sort_order
+
+
+class ShapeReportDataTest(IamTestCase):
+    """Tests for shaping report rows into the nested response."""
+
+    def setUp(self):
+        """Set up the handler used to compare with the legacy shaping."""
+        super().setUp()
+        self.handler = OCPReportQueryHandler({}, '', self.tenant, **{'report_type': 'cpu'})
+        self.dates = [self.handler.date_to_string(item) for item in self.handler.time_interval]
+
+    def _make_rows(self, count, projects=5, nodes=4, seed=42):
+        """Create report rows with a unique group key per date."""
+        generator = random.Random(seed)
+        keys = [(f'project_{project}', f'node_{node}' if node else None)
+                for project in range(projects) for node in range(nodes)]
+        rows = []
+        for index in range(count):
+            date = self.dates[index % len(self.dates)]
+            project, node = keys[(index // len(self.dates)) % len(keys)]
+            rows.append({
+                'date': date,
+                'project': project,
+                'node': node,
+                'usage': Decimal(generator.randint(0, 1000)),
+                'cost': Decimal(generator.randint(0, 1000)),
+                'usage_units': 'Core-Hours',
+                'cost_units': 'USD',
+            })
+        return rows
+
+    def _legacy_shape(self, rows, group_by, order_fields):
+        """Shape rows with order_by, _apply_group_by and _transform_data."""
+        query_group_by = ['date'] + group_by
+        data = self.handler.order_by(rows, order_fields)
+        data = self.handler._apply_group_by(list(data), copy.deepcopy(group_by))
+        return self.handler._transform_data(query_group_by, 0, data)
+
+    def _shape(self, rows, group_by, order_fields):
+        """Shape rows with shape_report_data."""
+        packer = compile_packer(self.handler._mapper.PACK_DEFINITIONS)
+        return shape_report_data(rows, self.dates, group_by, order_fields, packer)
+
+    def assert_matches_legacy(self, rows, group_by, order_fields):
+        """Assert that both shaping paths produce the same output."""
+        expected = self._legacy_shape(copy.deepcopy(rows), group_by, order_fields)
+        result = self._shape(copy.deepcopy(rows), group_by, order_fields)
+        self.assertEqual(result, expected)
+
+    def test_matches_legacy_without_group_by(self):
+        """Test shaping rows that are not grouped."""
+        rows = [{key: value for key, value in row.items() if key not in ('project', 'node')}
+                for row in self._make_rows(len(self.dates) * 3)]
+        self.assert_matches_legacy(rows, [], ['-date', '-usage'])
+
+    def test_matches_legacy_single_group(self):
+        """Test shaping rows grouped by a single key."""
+        rows = [{key: value for key, value in row.items() if key != 'node'}
+                for row in self._make_rows(len(self.dates) * 5, nodes=1)]
+        self.assert_matches_legacy(rows, ['project'], ['-date', '-cost'])
+
+    def test_matches_legacy_nested_groups(self):
+        """Test shaping rows grouped by nested keys with null labels."""
+        rows = self._make_rows(len(self.dates) * 20)
+        self.assert_matches_legacy(rows, ['project', 'node'], ['-date', 'project', 'node'])
+
+    def test_matches_legacy_descending_string_order(self):
+        """Test shaping rows ordered by a descending string field."""
+        rows = self._make_rows(len(self.dates) * 20)
+        self.assert_matches_legacy(rows, ['node', 'project'], ['-date', '-node', 'project'])
+
+    def test_null_group_labels(self):
+        """Test that null group keys are labeled as missing."""
+        rows = self._make_rows(len(self.dates) * 4, projects=1)
+        result = self._shape(rows, ['node'], ['-date', 'node'])
+        nodes = [node.get('node') for node in result[0].get('nodes')]
+        self.assertIn('no-node', nodes)
+        for node in result[0].get('nodes'):
+            for value in node.get('values'):
+                self.assertEqual(value.get('node'), node.get('node'))
+
+    def test_rows_outside_the_interval_are_dropped(self):
+        """Test that rows dated outside the time interval are not placed."""
+        rows = self._make_rows(len(self.dates))
+        rows.append(dict(rows[0], date='1970-01-01'))
+        result = self._shape(rows, ['project'], ['-date', '-usage'])
+        self.assertEqual([item.get('date') for item in result], self.dates)
+        placed = sum(len(project.get('values')) for item in result for project in item.get('projects'))
+        self.assertEqual(placed, len(self.dates))
+
+    def test_sort_order_nulls_last(self):
+        """Test that null numeric values sort after numbers when ascending."""
+        rows = [{'usage': 2}, {'usage': None}, {'usage': 1}]
+        self.assertEqual(list(sort_order(rows, ['usage'])), [2, 0, 1])
+        self.assertEqual(list(sort_order(rows, ['-usage'])), [1, 0, 2])
+
+    def test_compile_packer(self):
+        """Test that the packer matches _pack_data_object."""
+        row = self._make_rows(1)[0]
+        expected = self.handler._pack_data_object(copy.deepcopy(row), **self.handler._mapper.PACK_DEFINITIONS)
+        packer = compile_packer(self.handler._mapper.PACK_DEFINITIONS)
+        self.assertEqual(packer(row), expected)
@@ -15,6 +15,8 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 """Test the Report views."""
+import csv
+import io
 from unittest.mock import patch
 
 from django.http import HttpRequest, QueryDict
@@ -25,8 +27,12 @@ from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
 from rest_framework.test import APIClient
 from rest_framework_csv.renderers import CSVRenderer
+from tenant_schemas.utils import tenant_context
 
-from api.common.pagination import ReportPagination, ReportRankedPagination
+from api.common.csv import StreamingCSVResponse
+from api.common.pagination import (ReportPagination,
+                                   ReportQueryPagination,
+                                   ReportRankedPagination)
 from api.iam.serializers import UserSerializer
 from api.iam.test.iam_test_case import IamTestCase
 from api.models import User
@@ -36,9 +42,11 @@ from api.report.view import (_convert_units,
                              _find_unit,
                              _generic_report,
                              get_paginator,
+                             get_tag_keys,
                              process_query_parameters,
                              process_tag_query_params)
-from api.utils import UnitConverter
+from api.utils import DateHelper, UnitConverter
+from reporting.models import OCPUsagePodLabelSummary
 
 
 class ReportViewTest(IamTestCase):
@@ -232,28 +240,43 @@ class ReportViewTest(IamTestCase):
         client = APIClient(HTTP_ACCEPT='text/csv')
 
         response = client.get(url, **self.headers)
-        response.render()
+        content = b''.join(response.streaming_content).decode('utf-8')
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.accepted_media_type, 'text/csv')
-        self.assertIsInstance(response.accepted_renderer, CSVRenderer)
+        self.assertIsInstance(response, StreamingCSVResponse)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        rows = list(csv.DictReader(io.StringIO(content)))
+        for row in rows:
+            self.assertIn('date', row)
+            self.assertIn('cost', row)
 
     def test_get_instance_csv(self):
         """Test CSV output of inventory instance reports."""
         url = reverse('reports-aws-instance-type')
         client = APIClient(HTTP_ACCEPT='text/csv')
         response = client.get(url, content_type='text/csv', **self.headers)
-        response.render()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.accepted_media_type, 'text/csv')
-        self.assertIsInstance(response.accepted_renderer, CSVRenderer)
+        self.assertIsInstance(response, StreamingCSVResponse)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
 
     def test_get_storage_csv(self):
         """Test CSV output of inventory storage reports."""
         url = reverse('reports-aws-storage')
         client = APIClient(HTTP_ACCEPT='text/csv')
         response = client.get(url, content_type='text/csv', **self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response, StreamingCSVResponse)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+
+    def test_get_ranked_costs_csv(self):
+        """Test that ranked CSV output is rendered from memory."""
+        qs = 'group_by%5Baccount%5D=%2A&filter%5Blimit%5D=2'
+        url = reverse('reports-aws-costs') + '?' + qs
+        client = APIClient(HTTP_ACCEPT='text/csv')
+
+        response = client.get(url, **self.headers)
         response.render()
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -407,3 +430,32 @@ class ReportViewTest(IamTestCase):
         paginator = get_paginator(params, 0)
 
         self.assertIsInstance(paginator, ReportRankedPagination)
+
+    def test_get_paginator_for_query_pagination(self):
+        """Test that the query paginator is returned with the page count."""
+        params = {}
+        paginator = get_paginator(params, 0, page_count=10)
+
+        self.assertIsInstance(paginator, ReportQueryPagination)
+        self.assertEqual(paginator.count, 10)
+
+    def test_get_tag_keys_in_report_time_scope(self):
+        """Test that only tag keys of the report time scopes are listed."""
+        dh = DateHelper()
+        stale_start = dh.previous_month(dh.previous_month(dh.last_month_start))
+        with tenant_context(self.tenant):
+            for key, usage_start in (('recent', dh.this_month_start), ('stale', stale_start)):
+                OCPUsagePodLabelSummary.objects.create(key=key,
+                                                       values=['value'],
+                                                       usage_start=usage_start,
+                                                       usage_end=usage_start,
+                                                       cluster_id='cluster',
+                                                       namespace='namespace')
+        django_request = HttpRequest()
+        request = Request(django_request)
+        request.user = User.objects.get(username=self.user_data['username'])
+
+        tag_keys = get_tag_keys(request, OCPUsagePodLabelSummary)
+        self.assertIn('tag:recent', tag_keys)
+        self.assertIn('or:tag:recent', tag_keys)
+        self.assertNotIn('tag:stale', tag_keys)
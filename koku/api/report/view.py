@@ -17,6 +17,7 @@
 
 """View for Reports."""
 import logging
+from collections import defaultdict
 
 from django.utils.translation import ugettext as _
 from pint.errors import DimensionalityError, UndefinedUnitError
@@ -26,22 +27,27 @@ from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
 from tenant_schemas.utils import tenant_context
 
-from api.common.pagination import ReportPagination, ReportRankedPagination
+from api.common.csv import StreamingCSVResponse
+from api.common.pagination import (ReportPagination,
+                                   ReportQueryPagination,
+                                   ReportRankedPagination)
 from api.models import Tenant, User
 from api.report.aws.aws_query_handler import AWSReportQueryHandler
 from api.report.aws.serializers import QueryParamSerializer
+from api.report.cache import get_cache_key, get_cached_report, set_cached_report
 from api.report.ocp.ocp_query_handler import OCPReportQueryHandler
 from api.report.ocp.serializers import (OCPCostQueryParamSerializer,
                                         OCPInventoryQueryParamSerializer)
 from api.report.ocp_aws.ocp_aws_query_handler import OCPAWSReportQueryHandler
 from api.report.ocp_aws.serializers import OCPAWSQueryParamSerializer
+from api.report.queries import ReportQueryHandler
 from api.tags.aws.queries import AWSTagQueryHandler
 from api.tags.ocp.queries import OCPTagQueryHandler
 from api.tags.ocp_aws.queries import OCPAWSTagQueryHandler
 from api.tags.serializers import (AWSTagsQueryParamSerializer,
                                   OCPAWSTagsQueryParamSerializer,
                                   OCPTagsQueryParamSerializer)
-from api.utils import UnitConverter
+from api.utils import DateHelper, UnitConverter
 from reporting.provider.aws.models import AWSTagsSummary
 from reporting.provider.ocp.models import (OCPStorageVolumeClaimLabelSummary,
                                            OCPStorageVolumeLabelSummary,
@@ -180,13 +186,20 @@ class ClassMapper(object):
 
 
 def get_tag_keys(request, summary_model):
-    """Get a list of tag keys to validate filters."""
+    """Get a list of tag keys to validate filters.
+
+    Only the keys of the time scopes a report can read are listed. The
+    widest is two months back, the previous month's delta.
+    """
     tenant = get_tenant(request.user)
+    dh = DateHelper()
+    start = dh.previous_month(dh.last_month_start)
     with tenant_context(tenant):
-        tags = summary_model.objects.values('key')
-        tag_list = [':'.join(['tag', tag.get('key')]) for tag in tags]
-        tag_list.extend([':'.join(['and:tag', tag.get('key')]) for tag in tags])
-        tag_list.extend([':'.join(['or:tag', tag.get('key')]) for tag in tags])
+        tags = list(summary_model.objects.filter(usage_start__gte=start)
+                    .values_list('key', flat=True).distinct())
+        tag_list = [':'.join(['tag', key]) for key in tags]
+        tag_list.extend([':'.join(['and:tag', key]) for key in tags])
+        tag_list.extend([':'.join(['or:tag', key]) for key in tags])
 
     return tag_list
 
@@ -240,11 +253,14 @@ def process_tag_query_params(query_params, tag_keys):
     return param_tag_keys
 
 
-def get_paginator(filter_query_params, count):
+def get_paginator(filter_query_params, count, page_count=None):
     """Determine which paginator to use based on query params."""
     if 'offset' in filter_query_params:
         paginator = ReportRankedPagination()
         paginator.count = count
+    elif page_count is not None:
+        paginator = ReportQueryPagination()
+        paginator.count = page_count
     else:
         paginator = ReportPagination()
     return paginator
@@ -311,45 +327,62 @@ def _fill_in_missing_units(unit):
     return __unit_filler
 
 
+def _find_totals(data):
+    """Find the total values in a JSON structured report.
+
+    Args:
+        data (list,dict): The report
+
+    Returns:
+        (list) (container, value key, units key) of every total
+
+    """
+    totals = []
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            stack.extend(item)
+        elif isinstance(item, dict):
+            for key, value in item.items():
+                if key != 'total':
+                    stack.append(value)
+                elif isinstance(value, dict):
+                    totals.append((value, 'value', 'units'))
+                else:
+                    totals.append((item, 'total', 'units'))
+    return totals
+
+
 def _convert_units(converter, data, to_unit):
     """Convert the units in a JSON structured report.
 
+    The totals are collected in one pass and converted in batches of the
+    same source unit.
+
     Args:
         converter (api.utils.UnitConverter) Object doing unit conversion
-        data (list,dict): The current block of the report being converted
+        data (list,dict): The report being converted
         to_unit (str): The unit type to convert to
 
     Returns:
         (dict) The final return will be the unit converted report
 
     """
-    suffix = None
-    if isinstance(data, list):
-        for entry in data:
-            _convert_units(converter, entry, to_unit)
-    elif isinstance(data, dict):
-        for key in data:
-            if key == 'total' and isinstance(data[key], dict):
-                total = data[key]
-                value = total.get('value')
-                from_unit = total.get('units', '')
-                if '-Mo' in from_unit:
-                    from_unit, suffix = from_unit.split('-')
-                new_value = converter.convert_quantity(value, from_unit, to_unit)
-                total['value'] = new_value.magnitude
-                new_unit = to_unit + '-' + suffix if suffix else to_unit
-                total['units'] = new_unit
-            elif key == 'total' and not isinstance(data[key], dict):
-                total = data[key]
-                from_unit = data.get('units', '')
-                if '-Mo' in from_unit:
-                    from_unit, suffix = from_unit.split('-')
-                new_value = converter.convert_quantity(total, from_unit, to_unit)
-                data['total'] = new_value.magnitude
-                new_unit = to_unit + '-' + suffix if suffix else to_unit
-                data['units'] = new_unit
-            else:
-                _convert_units(converter, data[key], to_unit)
+    totals_by_unit = defaultdict(list)
+    for container, value_key, units_key in _find_totals(data):
+        totals_by_unit[container.get(units_key, '')].append((container, value_key, units_key))
+
+    for from_unit, totals in totals_by_unit.items():
+        new_unit = to_unit
+        if '-Mo' in from_unit:
+            from_unit, suffix = from_unit.split('-')
+            new_unit = to_unit + '-' + suffix
+        values = converter.convert_many([container[value_key] for container, value_key, _ in totals],
+                                        from_unit, to_unit)
+        for (container, value_key, units_key), value in zip(totals, values):
+            container[value_key] = value
+            container[units_key] = new_unit
 
     return data
 
@@ -368,6 +401,10 @@ def _generic_report(request, provider, report):
     """
     LOG.debug(f'API: {request.path} USER: {request.user.username}')
     tenant = get_tenant(request.user)
+    cache_key = get_cache_key(request, tenant, provider, report)
+    cached_report = get_cached_report(cache_key)
+    if cached_report is not None:
+        return Response(cached_report)
 
     cm = ClassMapper()
     provider_query_hdlr = cm.query_handler(provider, report)
@@ -393,15 +430,42 @@ def _generic_report(request, provider, report):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+    page_request = ReportPagination()
     handler = provider_query_hdlr(params,
                                   url_data,
                                   tenant,
                                   accept_type=request.META.get('HTTP_ACCEPT'),
                                   report_type=report,
                                   tag_keys=tag_keys,
-                                  access=request.user.access)
+                                  access=request.user.access,
+                                  page_limit=page_request.get_limit(request),
+                                  page_offset=page_request.get_offset(request),
+                                  stream_csv='units' not in params)
     output = handler.execute_query()
+    return _report_response(request, handler, output, params, cache_key)
+
+
+def _report_response(request, handler, output, params, cache_key):
+    """Build the response for an executed report query.
+
+    Args:
+        request (Request): The HTTP request object
+        handler (QueryHandler): The query handler that executed the query
+        output (Dict): The query output
+        params (Dict): The validated query parameters
+        cache_key (String): The key the paginated report is cached under
+
+    Returns:
+        (Response): The streamed CSV report or the paginated report
+
+    """
+    if isinstance(handler, ReportQueryHandler) and handler.is_csv_stream:
+        return StreamingCSVResponse(output['data'])
+
     max_rank = handler.max_rank
+    page_count = None
+    if isinstance(handler, ReportQueryHandler):
+        page_count = handler.page_count
 
     if 'units' in params:
         from_unit = _find_unit()(output['data'])
@@ -415,7 +479,9 @@ def _generic_report(request, provider, report):
                 error = {'details': _('Unit conversion failed.')}
                 raise ValidationError(error)
 
-    paginator = get_paginator(params.get('filter', {}), max_rank)
+    paginator = get_paginator(params.get('filter', {}), max_rank, page_count)
     paginated_result = paginator.paginate_queryset(output, request)
     LOG.debug(f'DATA: {output}')
-    return paginator.get_paginated_response(paginated_result)
+    response = paginator.get_paginated_response(paginated_result)
+    set_cached_report(cache_key, response.data)
+    return response
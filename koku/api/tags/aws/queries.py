@@ -16,11 +16,10 @@
 #
 """AWS Tag Query Handling."""
 from api.tags.queries import TagQueryHandler
-from reporting.models import AWSCostEntryLineItemDailySummary
+from reporting.models import AWSTagsSummary
 
 
 class AWSTagQueryHandler(TagQueryHandler):
     """Handles tag queries and responses for AWS."""
 
-    data_sources = [{'db_table': AWSCostEntryLineItemDailySummary,
-                     'db_column': 'tags'}]
+    data_sources = [{'db_table': AWSTagsSummary}]
@@ -16,16 +16,17 @@
 #
 """OCP Tag Query Handling."""
 from api.tags.queries import TagQueryHandler
-from reporting.models import OCPStorageLineItemDailySummary
-from reporting.models import OCPUsageLineItemDailySummary
+from reporting.models import (OCPStorageVolumeClaimLabelSummary,
+                              OCPStorageVolumeLabelSummary,
+                              OCPUsagePodLabelSummary)
 
 
 class OCPTagQueryHandler(TagQueryHandler):
     """Handles tag queries and responses for OCP."""
 
-    data_sources = [{'db_table': OCPUsageLineItemDailySummary,
-                     'db_column': 'pod_labels',
+    data_sources = [{'db_table': OCPUsagePodLabelSummary,
                      'type': 'pod'},
-                    {'db_table': OCPStorageLineItemDailySummary,
-                     'db_column': 'volume_labels',
+                    {'db_table': OCPStorageVolumeLabelSummary,
+                     'type': 'storage'},
+                    {'db_table': OCPStorageVolumeClaimLabelSummary,
                      'type': 'storage'}]
@@ -18,10 +18,10 @@
 import copy
 import logging
 
-from django.db.models import Q
+from django.db.models import CharField, Q
 from tenant_schemas.utils import tenant_context
 
-from api.functions import JSONBObjectKeys
+from api.functions import JSONBObjectKeys, Unnest
 from api.query_filter import QueryFilter, QueryFilterCollection
 from api.query_handler import QueryHandler
 
@@ -56,7 +56,8 @@ class TagQueryHandler(QueryHandler):
                }
 
         db_table = (Object) the model object containing tags
-        db_column = (str) the field on the model containing tags
+        db_column = (str) [optional] the JSON field on the model containing tags,
+                    without it db_table is a tag summary with key and values fields
         type = (str) [optional] the type of tagging information, used for filtering
 
     Example:
@@ -65,8 +66,7 @@ class TagQueryHandler(QueryHandler):
             data_sources = [{'db_table': MyFirstTagModel,
                              'db_column': 'awesome_tags',
                              'type': 'awesome'},
-                            {'db_table': MySecondTagModel,
-                             'db_column': 'schwifty_tags',
+                            {'db_table': MyTagSummaryModel,
                              'type': 'neato'}]
 
     """
@@ -181,70 +181,57 @@ class TagQueryHandler(QueryHandler):
 
         return composed_filter
 
+    def _get_sources(self):
+        """Return the data sources matching the type filter."""
+        type_filter = self.parameter_filter.get('type')
+        return [source for source in self.data_sources
+                if not type_filter or type_filter == source.get('type')]
+
     def get_tag_keys(self, filters=True):
         """Get a list of tag keys to validate filters."""
-        type_filter = self.parameter_filter.get('type')
-        tag_keys = []
+        tag_keys = set()
         with tenant_context(self.tenant):
-            for source in self.data_sources:
+            for source in self._get_sources():
                 tag_keys_query = source.get('db_table').objects
                 if filters is True:
                     tag_keys_query = tag_keys_query.filter(self.query_filter)
 
-                if type_filter and type_filter != source.get('type'):
-                    continue
-
-                tag_keys_query = tag_keys_query.annotate(tag_keys=JSONBObjectKeys(source.get('db_column')))\
-                    .values('tag_keys')\
-                    .distinct()\
-                    .all()
-                tag_keys_query = [tag.get('tag_keys') for tag in tag_keys_query]
-                for tag_key in tag_keys_query:
-                    tag_keys.append(tag_key)
-
-        return list(set(tag_keys))
+                db_column = source.get('db_column')
+                if db_column:
+                    tag_keys_query = tag_keys_query.annotate(tag_keys=JSONBObjectKeys(db_column))\
+                        .values_list('tag_keys', flat=True)
+                else:
+                    tag_keys_query = tag_keys_query.values_list('key', flat=True)
+                tag_keys.update(tag_keys_query.distinct())
 
-    @staticmethod
-    def _get_dictionary_for_key(dictionary_list, key):
-        """Get dictionary matching key from list of dictionaries."""
-        for di in dictionary_list:
-            if key in di.get('key'):
-                return di
-        return None
+        return list(tag_keys)
 
     def get_tags(self):
         """Get a list of tags and values to validate filters."""
-        type_filter = self.parameter_filter.get('type')
-
-        merged_data = []
+        merged_data = {}
         with tenant_context(self.tenant):
-            tag_keys = []
-            for source in self.data_sources:
-                if type_filter and type_filter != source.get('type'):
-                    continue
-
-                tag_keys = source.get('db_table').objects\
-                    .filter(self.query_filter)\
-                    .values(source.get('db_column'))\
-                    .distinct()\
-                    .all()
-                tag_keys = [tag.get(source.get('db_column')) for tag in tag_keys]
-
-                for item in tag_keys:
-                    for key, value in item.items():
-                        key_dict = TagQueryHandler._get_dictionary_for_key(merged_data, key)
-                        if not key_dict:
-                            new_dict = {}
-                            new_dict['key'] = key
-                            new_dict['values'] = [value]
-                            if source.get('type'):
-                                new_dict['type'] = source.get('type')
-                            merged_data.append(new_dict)
-                        else:
-                            if value not in key_dict.get('values'):
-                                key_dict['values'].append(value)
-                                key_dict['values'].sort()
-        return merged_data
+            for source in self._get_sources():
+                tag_query = source.get('db_table').objects.filter(self.query_filter)
+                db_column = source.get('db_column')
+                if db_column:
+                    tag_pairs = (pair for tags in tag_query.values_list(db_column, flat=True).distinct()
+                                 for pair in tags.items())
+                else:
+                    tag_pairs = tag_query.annotate(value=Unnest('values', output_field=CharField()))\
+                        .values_list('key', 'value')\
+                        .distinct()
+
+                for key, value in tag_pairs:
+                    key_dict = merged_data.get(key)
+                    if key_dict is None:
+                        key_dict = merged_data[key] = {'key': key, 'values': set()}
+                        if source.get('type'):
+                            key_dict['type'] = source.get('type')
+                    key_dict['values'].add(value)
+
+        for key_dict in merged_data.values():
+            key_dict['values'] = sorted(key_dict['values'])
+        return list(merged_data.values())
 
     def execute_query(self):
         """Execute query and return provided data.
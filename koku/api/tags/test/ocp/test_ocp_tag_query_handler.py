@@ -324,3 +324,36 @@ class OCPTagQueryHandlerTest(IamTestCase):
 
         result = handler.get_tag_keys(filters=False)
         self.assertEqual(sorted(result), sorted(tag_keys))
+
+    def test_get_tags_matches_daily_summary_labels(self):
+        """Test that tag values from the label summary match the daily summary labels."""
+        query_params = {'filter': {'resolution': 'monthly',
+                                   'time_scope_value': -2,
+                                   'time_scope_units': 'month',
+                                   'type': 'pod'},
+                        }
+        query_string = '?filter[resolution]=monthly&' + \
+                       'filter[time_scope_value]=-2&' + \
+                       'filter[time_scope_units]=month&' + \
+                       'filter[type]=pod&'
+        handler = OCPTagQueryHandler(
+            query_params,
+            query_string,
+            self.tenant,
+            **{}
+        )
+
+        expected = {}
+        with tenant_context(self.tenant):
+            labels = OCPUsageLineItemDailySummary.objects\
+                .filter(handler.query_filter)\
+                .values_list('pod_labels', flat=True)
+            for label in labels:
+                for key, value in label.items():
+                    expected.setdefault(key, set()).add(value)
+
+        result = handler.get_tags()
+        self.assertEqual({tag.get('key'): tag.get('values') for tag in result},
+                         {key: sorted(values) for key, values in expected.items()})
+        for tag in result:
+            self.assertEqual(tag.get('type'), 'pod')
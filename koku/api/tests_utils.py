@@ -18,6 +18,7 @@
 
 import datetime
 import random
+from decimal import Decimal
 
 import pint
 from dateutil.relativedelta import relativedelta
@@ -25,7 +26,7 @@ from django.test import TestCase
 from django.utils import timezone
 from pint.errors import UndefinedUnitError
 
-from api.utils import DateHelper, UnitConverter
+from api.utils import DateHelper, UnitConverter, get_unit_registry
 
 
 class DateHelperTest(TestCase):
@@ -189,3 +190,25 @@ class APIUtilsUnitConverterTest(TestCase):
 
         self.assertEqual(result.units, to_unit)
         self.assertEqual(result.magnitude, expected_value)
+
+    def test_registry_is_shared(self):
+        """Test that converters share one unit registry."""
+        self.assertIs(UnitConverter().unit_registry, self.converter.unit_registry)
+        self.assertIs(self.converter.unit_registry, get_unit_registry())
+
+    def test_conversion_factor_is_memoized(self):
+        """Test that conversion factors are computed once."""
+        UnitConverter.conversion_factors.pop(('gigabyte', 'byte'), None)
+        factor = self.converter.get_conversion_factor('gigabyte', 'byte')
+        self.assertEqual(factor, 1E9)
+        self.assertEqual(UnitConverter.conversion_factors[('gigabyte', 'byte')], factor)
+
+    def test_convert_many(self):
+        """Test that many values are converted with one factor."""
+        values = [random.randint(1, 9), 1.5, Decimal('2.25'), None]
+        result = self.converter.convert_many(values, 'gigabyte', 'byte')
+        expected = [self.converter.convert_quantity(value, 'gigabyte', 'byte').magnitude
+                    for value in values[:2]]
+        self.assertEqual(result[:2], expected)
+        self.assertEqual(result[2], Decimal('2250000000'))
+        self.assertIsNone(result[3])
@@ -19,6 +19,8 @@
 
 import calendar
 import datetime
+from decimal import Decimal
+from functools import lru_cache
 
 import pint
 from django.utils import timezone
@@ -197,12 +199,25 @@ class DateHelper():
         return num_days
 
 
+@lru_cache(maxsize=1)
+def get_unit_registry():
+    """Return the process wide unit registry.
+
+    Building a registry parses pint's definitions file, so it is built
+    once on first use and shared.
+    """
+    return pint.UnitRegistry()
+
+
 class UnitConverter:
     """Utility class to do unit conversion."""
 
+    # (from_unit, to_unit) -> multiplicative factor, shared by all instances
+    conversion_factors = {}
+
     def __init__(self):
         """Initialize the UnitConverter."""
-        self.unit_registry = pint.UnitRegistry()
+        self.unit_registry = get_unit_registry()
         self.Quantity = self.unit_registry.Quantity
 
     def validate_unit(self, unit):
@@ -253,3 +268,47 @@ class UnitConverter:
         from_unit = self.validate_unit(from_unit)
         to_unit = self.validate_unit(to_unit)
         return self.Quantity(value, from_unit).to(to_unit)
+
+    def get_conversion_factor(self, from_unit, to_unit):
+        """Return the factor converting from_unit magnitudes to to_unit.
+
+        Args:
+            from_unit (str): The starting unit to convert from
+            to_unit (str): The ending unit to convert to
+
+        Returns:
+            (float) The magnitude of one from_unit in to_unit
+
+        """
+        key = (from_unit, to_unit)
+        factor = self.conversion_factors.get(key)
+        if factor is None:
+            factor = self.convert_quantity(1, from_unit, to_unit).magnitude
+            self.conversion_factors[key] = factor
+        return factor
+
+    def convert_many(self, values, from_unit, to_unit):
+        """Convert magnitudes between comparable units.
+
+        Args:
+            values (list): Magnitudes in from_unit, None is kept as None
+            from_unit (str): The starting unit to convert from
+            to_unit (str): The ending unit to convert to
+
+        Returns:
+            (list) The magnitudes in to_unit
+
+        """
+        factor = self.get_conversion_factor(from_unit, to_unit)
+        decimal_factor = None
+        converted = []
+        for value in values:
+            if value is None:
+                converted.append(value)
+            elif isinstance(value, Decimal):
+                if decimal_factor is None:
+                    decimal_factor = Decimal(str(factor))
+                converted.append(value * decimal_factor)
+            else:
+                converted.append(value * factor)
+        return converted
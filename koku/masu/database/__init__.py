@@ -22,6 +22,7 @@ AWS_CUR_TABLE_MAP = {
     'line_item': 'reporting_awscostentrylineitem',
     'line_item_daily': 'reporting_awscostentrylineitem_daily',
     'line_item_daily_summary': 'reporting_awscostentrylineitem_daily_summary',
+    'line_item_monthly_summary': 'reporting_awscostentrylineitem_monthly_summary',
     'product': 'reporting_awscostentryproduct',
     'pricing': 'reporting_awscostentrypricing',
     'reservation': 'reporting_awscostentryreservation',
@@ -36,13 +37,16 @@ OCP_REPORT_TABLE_MAP = {
     'line_item': 'reporting_ocpusagelineitem',
     'line_item_daily': 'reporting_ocpusagelineitem_daily',
     'line_item_daily_summary': 'reporting_ocpusagelineitem_daily_summary',
+    'line_item_monthly_summary': 'reporting_ocpusagelineitem_monthly_summary',
     'rate': 'rates_rate',
     'rate_map': 'rates_ratemap',
+    'cluster_capacity_daily': 'reporting_ocpclustercapacity_daily',
     'pod_label_summary': 'reporting_ocpusagepodlabel_summary',
     'storage_line_item': 'reporting_ocpstoragelineitem',
     'storage_line_item_daily': 'reporting_ocpstoragelineitem_daily',
     'storage_line_item_daily_summary': 'reporting_ocpstoragelineitem_daily_summary',
     'volume_claim_label_summary': 'reporting_ocpstoragevolumeclaimlabel_summary',
     'volume_label_summary': 'reporting_ocpstoragevolumelabel_summary',
-    'cost_summary': 'reporting_ocpcosts_summary'
+    'cost_summary': 'reporting_ocpcosts_summary',
+    'cost_monthly_summary': 'reporting_ocpcosts_monthly_summary'
 }
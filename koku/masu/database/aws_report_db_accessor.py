@@ -19,16 +19,20 @@
 # pylint: skip-file
 import datetime
 import logging
-import pkgutil
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 from masu.config import Config
 from masu.database import AWS_CUR_TABLE_MAP
 from masu.database.report_db_accessor_base import ReportDBAccessorBase
+from masu.database.sql_templates import render_sql
 from masu.external.date_accessor import DateAccessor
 
 LOG = logging.getLogger(__name__)
 
+# The most clusters correlated with AWS data at the same time
+OCP_ON_AWS_SUMMARY_WORKERS = 4
+
 
 # pylint: disable=too-many-public-methods
 class AWSReportDBAccessor(ReportDBAccessorBase):
@@ -204,22 +208,24 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
 
         """
         table_name = AWS_CUR_TABLE_MAP['line_item_daily']
-        daily_sql = pkgutil.get_data(
-            'masu.database',
-            'sql/reporting_awscostentrylineitem_daily.sql'
-        )
-        daily_sql = daily_sql.decode('utf-8').format(
-            uuid=str(uuid.uuid4()).replace('-', '_'),
-            start_date=start_date,
-            end_date=end_date,
-            cost_entry_bill_ids=','.join(bill_ids)
+        daily_sql = render_sql(
+            'reporting_awscostentrylineitem_daily.sql',
+            uuid=str(uuid.uuid4()).replace('-', '_')
         )
-        self._commit_and_vacuum(table_name, daily_sql, start_date, end_date)
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cost_entry_bill_ids': bill_ids
+        }
+        self._commit_and_vacuum(table_name, daily_sql, start_date, end_date, params)
 
     # pylint: disable=invalid-name
     def populate_line_item_daily_summary_table(self, start_date, end_date, bill_ids):
         """Populate the daily aggregated summary of line items table.
 
+        The monthly rollup of the months covering the date range is rebuilt
+        from the new daily summary.
+
         Args:
             start_date (datetime.date) The date to start populating the table.
             end_date (datetime.date) The date to end on.
@@ -229,17 +235,44 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
 
         """
         table_name = AWS_CUR_TABLE_MAP['line_item_daily_summary']
-        summary_sql = pkgutil.get_data(
-            'masu.database',
-            'sql/reporting_awscostentrylineitem_daily_summary.sql'
+        summary_sql = render_sql(
+            'reporting_awscostentrylineitem_daily_summary.sql',
+            uuid=str(uuid.uuid4()).replace('-', '_')
         )
-        summary_sql = summary_sql.decode('utf-8').format(
-            uuid=str(uuid.uuid4()).replace('-', '_'),
-            start_date=start_date,
-            end_date=end_date,
-            cost_entry_bill_ids=','.join(bill_ids)
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cost_entry_bill_ids': bill_ids
+        }
+        self._commit_and_vacuum(table_name, summary_sql, start_date, end_date, params)
+        self.populate_line_item_monthly_summary_table(start_date, end_date, bill_ids)
+
+    # pylint: disable=invalid-name
+    def populate_line_item_monthly_summary_table(self, start_date, end_date, bill_ids):
+        """Populate the monthly rollup of the daily summary of line items table.
+
+        Whole months covering the date range are rebuilt.
+
+        Args:
+            start_date (datetime.date) The date to start populating the table.
+            end_date (datetime.date) The date to end on.
+            bill_ids (list) A list of bill IDs.
+
+        Returns
+            (None)
+
+        """
+        table_name = AWS_CUR_TABLE_MAP['line_item_monthly_summary']
+        summary_sql = render_sql(
+            'reporting_awscostentrylineitem_monthly_summary.sql',
+            uuid=str(uuid.uuid4()).replace('-', '_')
         )
-        self._commit_and_vacuum(table_name, summary_sql, start_date, end_date)
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cost_entry_bill_ids': bill_ids
+        }
+        self._commit_and_vacuum(table_name, summary_sql, start_date, end_date, params)
 
     def mark_bill_as_finalized(self, bill_id):
         """Mark a bill in the database as finalized."""
@@ -253,15 +286,29 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
             bill.finalized_datetime = self.date_accessor.today_with_timezone('UTC')
 
     # pylint: disable=invalid-name
-    def populate_tags_summary_table(self):
-        """Populate the line item aggregated totals data table."""
+    def populate_tags_summary_table(self, start_date, end_date, bill_ids):
+        """Populate the line item aggregated totals data table.
+
+        The summary rows of the bills in the date range are rebuilt.
+
+        Args:
+            start_date (datetime.date) The date to start populating the table.
+            end_date (datetime.date) The date to end on.
+            bill_ids (list) A list of bill IDs.
+
+        Returns
+            (None)
+
+        """
         table_name = AWS_CUR_TABLE_MAP['tags_summary']
 
-        agg_sql = pkgutil.get_data(
-            'masu.database',
-            f'sql/reporting_awstags_summary.sql'
-        )
-        self._commit_and_vacuum(table_name, agg_sql)
+        agg_sql = render_sql('reporting_awstags_summary.sql')
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cost_entry_bill_ids': bill_ids
+        }
+        self._commit_and_vacuum(table_name, agg_sql, start_date, end_date, params)
 
     def populate_ocp_on_aws_cost_daily_summary(self, start_date, end_date,
                                                cluster_id=None, bill_ids=None):
@@ -270,6 +317,8 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
         Args:
             start_date (datetime.date) The date to start populating the table.
             end_date (datetime.date) The date to end on.
+            cluster_id (str) An optional cluster to limit the update to.
+            bill_ids (list) Optional cost entry bill ids to limit the update to.
 
         Returns
             (None)
@@ -278,21 +327,67 @@ class AWSReportDBAccessor(ReportDBAccessorBase):
         aws_where_clause = ''
         ocp_where_clause = ''
         if bill_ids:
-            ids = ','.join(bill_ids)
-            aws_where_clause = f'AND cost_entry_bill_id IN ({ids})'
+            aws_where_clause = 'AND cost_entry_bill_id = ANY(%(cost_entry_bill_ids)s::integer[])'
         if cluster_id:
-            ocp_where_clause = f"AND cluster_id = '{cluster_id}'"
+            ocp_where_clause = 'AND cluster_id = %(cluster_id)s'
 
         table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_daily_summary']
-        summary_sql = pkgutil.get_data(
-            'masu.database',
-            'sql/reporting_ocpawscostlineitem_daily_summary.sql'
-        )
-        summary_sql = summary_sql.decode('utf-8').format(
+        summary_sql = render_sql(
+            'reporting_ocpawscostlineitem_daily_summary.sql',
             uuid=str(uuid.uuid4()).replace('-', '_'),
-            start_date=start_date,
-            end_date=end_date,
             aws_where_clause=aws_where_clause,
             ocp_where_clause=ocp_where_clause
         )
-        self._commit_and_vacuum(table_name, summary_sql, start_date, end_date)
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cost_entry_bill_ids': bill_ids,
+            'cluster_id': cluster_id
+        }
+        self._commit_and_vacuum(table_name, summary_sql, start_date, end_date, params)
+
+
+def populate_ocp_on_aws_cost_daily_summary_by_cluster(schema, column_map, start_date, end_date,
+                                                      cluster_ids, bill_ids=None,
+                                                      max_workers=OCP_ON_AWS_SUMMARY_WORKERS):
+    """Populate the OCP on AWS daily summary for several clusters concurrently.
+
+    Each cluster is correlated on its own accessor and database connection.
+
+    Args:
+        schema (str): The customer schema
+        column_map (dict): A mapping of report columns to database columns
+        start_date (datetime.date) The date to start populating the table.
+        end_date (datetime.date) The date to end on.
+        cluster_ids (list): The clusters to summarize
+        bill_ids (list): Optional cost entry bill ids to limit the update to
+        max_workers (int): The most clusters summarized at the same time
+
+    Returns
+        (None)
+
+    Raises:
+        Exception: The first error of any cluster, once every cluster
+            has finished.
+
+    """
+    def summarize(cluster_id):
+        with AWSReportDBAccessor(schema, column_map) as accessor:
+            accessor.populate_ocp_on_aws_cost_daily_summary(start_date, end_date,
+                                                            cluster_id=cluster_id,
+                                                            bill_ids=bill_ids)
+
+    cluster_ids = list(cluster_ids)
+    if not cluster_ids:
+        return
+
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(cluster_ids))) as executor:
+        futures = [(cluster_id, executor.submit(summarize, cluster_id)) for cluster_id in cluster_ids]
+        for cluster_id, future in futures:
+            error = future.exception()
+            if error:
+                LOG.error('OCP on AWS summary of cluster %s in %s failed: %s', cluster_id, schema, error)
+                errors.append(error)
+    if errors:
+        raise errors[0]
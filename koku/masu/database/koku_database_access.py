@@ -17,6 +17,7 @@
 """Accessor for Customer information from koku database."""
 
 import logging
+import threading
 
 import sqlalchemy
 from sqlalchemy.ext.automap import automap_base
@@ -26,6 +27,26 @@ from masu.database.engine import DB_ENGINE
 
 LOG = logging.getLogger(__name__)
 
+# Migration version and reflected automap base keyed by schema, shared by all
+# accessors of the process
+_REFLECTION_CACHE = {}
+_REFLECTION_LOCK = threading.Lock()
+
+
+def clear_reflection_cache(schema=None):
+    """Drop cached table reflection so the next accessor reflects again.
+
+    Args:
+        schema (String) the schema to clear, all schemas when None
+    Returns:
+        None
+    """
+    with _REFLECTION_LOCK:
+        if schema is None:
+            _REFLECTION_CACHE.clear()
+        else:
+            _REFLECTION_CACHE.pop(schema, None)
+
 
 class KokuDBAccess:
     """Base Class to connect to the koku database."""
@@ -40,11 +61,11 @@ class KokuDBAccess:
         """
         self.schema = schema
         self._db = DB_ENGINE
-        self._meta = self._create_metadata()
         self._session_factory = sessionmaker(bind=self._db)
         self._session_registry = scoped_session(self._session_factory)
         self._session = self._create_session()
         self._base = self._prepare_base()
+        self._meta = self._base.metadata
 
     def __enter__(self):
         """Context manager entry."""
@@ -78,17 +99,46 @@ class KokuDBAccess:
         """Close the database session."""
         self._session.close()
 
+    def _get_migration_version(self):
+        """
+        Return the id of the latest migration applied to the schema.
+
+        Args:
+            None
+        Returns:
+            (int): The latest django_migrations id, None if the schema has no migrations
+
+        """
+        sql = sqlalchemy.text(f'SELECT max(id) FROM "{self.schema}".django_migrations')
+        try:
+            with self._db.connect() as connection:
+                return connection.execute(sql).scalar()
+        except sqlalchemy.exc.ProgrammingError:
+            return None
+
     def _prepare_base(self):
         """
         Prepare base classes.
 
+        The mapped classes of a schema are shared by later accessors of the
+        process until another migration is applied to the schema, by this or
+        any other process. A schema without tables is not cached so it is
+        reflected again once it has been migrated.
+
         Args:
             None
         Returns:
             (sqlalchemy.ext.declarative.api.DeclarativeMeta): "Declaritive metadata object",
         """
-        base = automap_base(metadata=self.get_meta())
-        base.prepare(self.get_engine(), reflect=True)
+        version = self._get_migration_version()
+        with _REFLECTION_LOCK:
+            cached = _REFLECTION_CACHE.get(self.schema)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+            base = automap_base(metadata=self._create_metadata())
+            base.prepare(self.get_engine(), reflect=True)
+            if base.metadata.tables:
+                _REFLECTION_CACHE[self.schema] = (version, base)
         return base
 
     def get_base(self):
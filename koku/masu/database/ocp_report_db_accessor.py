@@ -17,12 +17,12 @@
 """Database accessor for OCP report data."""
 import datetime
 import logging
-import pkgutil
 import uuid
 
 from masu.config import Config
 from masu.database import AWS_CUR_TABLE_MAP, OCP_REPORT_TABLE_MAP
 from masu.database.report_db_accessor_base import ReportDBAccessorBase
+from masu.database.sql_templates import render_sql
 
 LOG = logging.getLogger(__name__)
 
@@ -56,25 +56,8 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
             (None)
 
         """
-        column_str = ','.join(columns)
-        conflict_col_str = ','.join(conflict_columns)
-
-        set_clause = ','.join([f'{column} = excluded.{column}'
-                               for column in columns])
-        upsert_sql = f"""
-            INSERT INTO {table_name} ({column_str})
-                SELECT {column_str}
-                FROM {temp_table_name}
-                ON CONFLICT ({conflict_col_str}) DO UPDATE
-                SET {set_clause}
-            """
-        self._cursor.execute(upsert_sql)
-        self._pg2_conn.commit()
-
-        delete_sql = f'DELETE FROM {temp_table_name}'
-        self._cursor.execute(delete_sql)
-        self._pg2_conn.commit()
-        self.vacuum_table(temp_table_name)
+        super().merge_temp_table(table_name, temp_table_name, columns,
+                                 None, conflict_columns)
 
     def get_current_usage_report(self):
         """Get the most recent usage report object."""
@@ -330,17 +313,16 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
         """
         table_name = OCP_REPORT_TABLE_MAP['line_item_daily']
 
-        daily_sql = pkgutil.get_data(
-            'masu.database',
-            'sql/reporting_ocpusagelineitem_daily.sql'
+        daily_sql = render_sql(
+            'reporting_ocpusagelineitem_daily.sql',
+            uuid=str(uuid.uuid4()).replace('-', '_')
         )
-        daily_sql = daily_sql.decode('utf-8').format(
-            uuid=str(uuid.uuid4()).replace('-', '_'),
-            start_date=start_date,
-            end_date=end_date,
-            cluster_id=cluster_id
-        )
-        self._commit_and_vacuum(table_name, daily_sql, start_date, end_date)
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cluster_id': cluster_id
+        }
+        self._commit_and_vacuum(table_name, daily_sql, start_date, end_date, params)
 
     def populate_storage_line_item_daily_table(self, start_date, end_date, cluster_id):
         """Populate the daily storage aggregate of line items table.
@@ -356,24 +338,29 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
         """
         table_name = OCP_REPORT_TABLE_MAP['storage_line_item_daily']
 
-        daily_sql = pkgutil.get_data(
-            'masu.database',
-            'sql/reporting_ocpstoragelineitem_daily.sql'
-        )
-        daily_sql = daily_sql.decode('utf-8').format(
-            uuid=str(uuid.uuid4()).replace('-', '_'),
-            start_date=start_date,
-            end_date=end_date,
-            cluster_id=cluster_id
+        daily_sql = render_sql(
+            'reporting_ocpstoragelineitem_daily.sql',
+            uuid=str(uuid.uuid4()).replace('-', '_')
         )
-        self._commit_and_vacuum(table_name, daily_sql, start_date, end_date)
-
-    def populate_pod_charge(self, cpu_temp_table, mem_temp_table):
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cluster_id': cluster_id
+        }
+        self._commit_and_vacuum(table_name, daily_sql, start_date, end_date, params)
+
+    def populate_pod_charge(self, start_date, end_date, cluster_id, provider_uuid):
         """Populate the memory and cpu charge on daily summary table.
 
+        The provider's tiered rates are applied to the summary lines in
+        a single UPDATE. The monthly rollup of the months covering the date
+        range is rebuilt with the new charges.
+
         Args:
-            cpu_temp_table (String) Name of cpu charge temp table
-            mem_temp_table (String) Name of mem charge temp table
+            start_date (datetime.date) The date to start populating the table.
+            end_date (datetime.date) The date to end on.
+            cluster_id (String) Cluster Identifier
+            provider_uuid (String) The provider whose rates are applied
 
         Returns
             (None)
@@ -381,22 +368,27 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
         """
         table_name = OCP_REPORT_TABLE_MAP['line_item_daily_summary']
 
-        daily_charge_sql = pkgutil.get_data(
-            'masu.database',
-            'sql/reporting_ocpusagelineitem_daily_pod_charge.sql'
-        )
-        charge_line_sql = daily_charge_sql.decode('utf-8').format(
-            cpu_temp=cpu_temp_table,
-            mem_temp=mem_temp_table
-        )
-
-        self._commit_and_vacuum(table_name, charge_line_sql)
-
-    def populate_storage_charge(self, temp_table_name):
+        charge_line_sql = render_sql('reporting_ocpusagelineitem_daily_pod_charge.sql')
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cluster_id': cluster_id,
+            'provider_uuid': str(provider_uuid)
+        }
+        self._commit_and_vacuum(table_name, charge_line_sql, start_date, end_date, params)
+        self.populate_line_item_monthly_summary_table(start_date, end_date, cluster_id)
+
+    def populate_storage_charge(self, start_date, end_date, cluster_id, provider_uuid):
         """Populate the storage charge into the daily summary table.
 
+        The provider's tiered rates are applied to the summary lines in
+        a single UPDATE.
+
         Args:
-            storage_charge (Float) Storage charge.
+            start_date (datetime.date) The date to start populating the table.
+            end_date (datetime.date) The date to end on.
+            cluster_id (String) Cluster Identifier
+            provider_uuid (String) The provider whose rates are applied
 
         Returns
             (None)
@@ -404,18 +396,21 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
         """
         table_name = OCP_REPORT_TABLE_MAP['storage_line_item_daily_summary']
 
-        daily_charge_sql = pkgutil.get_data(
-            'masu.database',
-            'sql/reporting_ocp_storage_charge.sql'
-        )
-        charge_line_sql = daily_charge_sql.decode('utf-8').format(
-            temp_table=temp_table_name
-        )
-        self._commit_and_vacuum(table_name, charge_line_sql)
+        charge_line_sql = render_sql('reporting_ocp_storage_charge.sql')
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cluster_id': cluster_id,
+            'provider_uuid': str(provider_uuid)
+        }
+        self._commit_and_vacuum(table_name, charge_line_sql, start_date, end_date, params)
 
     def populate_line_item_daily_summary_table(self, start_date, end_date, cluster_id):
         """Populate the daily aggregate of line items table.
 
+        The monthly rollup of the months covering the date range is rebuilt
+        from the new daily summary.
+
         Args:
             start_date (datetime.date) The date to start populating the table.
             end_date (datetime.date) The date to end on.
@@ -427,17 +422,17 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
         """
         table_name = OCP_REPORT_TABLE_MAP['line_item_daily_summary']
 
-        summary_sql = pkgutil.get_data(
-            'masu.database',
-            'sql/reporting_ocpusagelineitem_daily_summary.sql'
-        )
-        summary_sql = summary_sql.decode('utf-8').format(
-            uuid=str(uuid.uuid4()).replace('-', '_'),
-            start_date=start_date,
-            end_date=end_date,
-            cluster_id=cluster_id
+        summary_sql = render_sql(
+            'reporting_ocpusagelineitem_daily_summary.sql',
+            uuid=str(uuid.uuid4()).replace('-', '_')
         )
-        self._commit_and_vacuum(table_name, summary_sql, start_date, end_date)
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cluster_id': cluster_id
+        }
+        self._commit_and_vacuum(table_name, summary_sql, start_date, end_date, params)
+        self.populate_line_item_monthly_summary_table(start_date, end_date, cluster_id)
 
     def populate_storage_line_item_daily_summary_table(self, start_date, end_date, cluster_id):
         """Populate the daily aggregate of storage line items table.
@@ -452,20 +447,19 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
         """
         table_name = OCP_REPORT_TABLE_MAP['storage_line_item_daily_summary']
 
-        summary_sql = pkgutil.get_data(
-            'masu.database',
-            'sql/reporting_ocpstoragelineitem_daily_summary.sql'
+        summary_sql = render_sql(
+            'reporting_ocpstoragelineitem_daily_summary.sql',
+            uuid=str(uuid.uuid4()).replace('-', '_')
         )
-        summary_sql = summary_sql.decode('utf-8').format(
-            uuid=str(uuid.uuid4()).replace('-', '_'),
-            start_date=start_date,
-            end_date=end_date,
-            cluster_id=cluster_id
-        )
-        self._commit_and_vacuum(table_name, summary_sql, start_date, end_date)
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cluster_id': cluster_id
+        }
+        self._commit_and_vacuum(table_name, summary_sql, start_date, end_date, params)
 
     def populate_cost_summary_table(self, cluster_id, start_date=None, end_date=None):
-        """Populate the cost summary table.
+        """Populate the cost summary table and its monthly rollup.
 
         Args:
             start_date (datetime.date) The date to start populating the table.
@@ -491,18 +485,71 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
             end_date_qry = self._get_db_obj_query(table_name).order_by(usage_start.desc()).first()
             end_date = str(end_date_qry.usage_start) if end_date_qry else None
 
-        summary_sql = pkgutil.get_data(
-            'masu.database',
-            'sql/reporting_ocpcosts_summary.sql'
-        )
         if start_date and end_date:
-            summary_sql = summary_sql.decode('utf-8').format(
-                uuid=str(uuid.uuid4()).replace('-', '_'),
-                start_date=start_date,
-                end_date=end_date,
-                cluster_id=cluster_id
+            summary_sql = render_sql(
+                'reporting_ocpcosts_summary.sql',
+                uuid=str(uuid.uuid4()).replace('-', '_')
             )
-            self._commit_and_vacuum(table_name, summary_sql, start_date, end_date)
+            params = {
+                'start_date': start_date,
+                'end_date': end_date,
+                'cluster_id': cluster_id
+            }
+            self._commit_and_vacuum(table_name, summary_sql, start_date, end_date, params)
+            self.populate_monthly_cost_summary_table(cluster_id, start_date, end_date)
+
+    # pylint: disable=invalid-name
+    def populate_line_item_monthly_summary_table(self, start_date, end_date, cluster_id):
+        """Populate the monthly rollup of the daily line item summary table.
+
+        Whole months covering the date range are rebuilt.
+
+        Args:
+            start_date (datetime.date) The date to start populating the table.
+            end_date (datetime.date) The date to end on.
+            cluster_id (String) Cluster Identifier
+        Returns
+            (None)
+
+        """
+        table_name = OCP_REPORT_TABLE_MAP['line_item_monthly_summary']
+
+        summary_sql = render_sql(
+            'reporting_ocpusagelineitem_monthly_summary.sql',
+            uuid=str(uuid.uuid4()).replace('-', '_')
+        )
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cluster_id': cluster_id
+        }
+        self._commit_and_vacuum(table_name, summary_sql, start_date, end_date, params)
+
+    def populate_monthly_cost_summary_table(self, cluster_id, start_date, end_date):
+        """Populate the monthly rollup of the cost summary table.
+
+        Whole months covering the date range are rebuilt.
+
+        Args:
+            cluster_id (String) Cluster Identifier
+            start_date (datetime.date) The date to start populating the table.
+            end_date (datetime.date) The date to end on.
+        Returns
+            (None)
+
+        """
+        table_name = OCP_REPORT_TABLE_MAP['cost_monthly_summary']
+
+        summary_sql = render_sql(
+            'reporting_ocpcosts_monthly_summary.sql',
+            uuid=str(uuid.uuid4()).replace('-', '_')
+        )
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cluster_id': cluster_id
+        }
+        self._commit_and_vacuum(table_name, summary_sql, start_date, end_date, params)
 
     def get_cost_summary_for_clusterid(self, cluster_identifier):
         """Get the cost summary for a cluster id query."""
@@ -516,37 +563,79 @@ class OCPReportDBAccessor(ReportDBAccessorBase):
         return cost_summary_query
 
     # pylint: disable=invalid-name
-    def populate_pod_label_summary_table(self):
-        """Populate the line item aggregated totals data table."""
+    def populate_pod_label_summary_table(self, start_date, end_date, cluster_id):
+        """Populate the line item aggregated totals data table.
+
+        The summary rows of the cluster in the date range are rebuilt.
+
+        Args:
+            start_date (datetime.date) The date to start populating the table.
+            end_date (datetime.date) The date to end on.
+            cluster_id (String) Cluster Identifier
+
+        Returns
+            (None)
+
+        """
         table_name = OCP_REPORT_TABLE_MAP['pod_label_summary']
 
-        agg_sql = pkgutil.get_data(
-            'masu.database',
-            f'sql/reporting_ocpusagepodlabel_summary.sql'
-        )
+        agg_sql = render_sql('reporting_ocpusagepodlabel_summary.sql')
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cluster_id': cluster_id
+        }
 
-        self._commit_and_vacuum(table_name, agg_sql)
+        self._commit_and_vacuum(table_name, agg_sql, start_date, end_date, params)
 
     # pylint: disable=invalid-name
-    def populate_volume_claim_label_summary_table(self):
-        """Populate the OCP volume claim label summary table."""
+    def populate_volume_claim_label_summary_table(self, start_date, end_date, cluster_id):
+        """Populate the OCP volume claim label summary table.
+
+        The summary rows of the cluster in the date range are rebuilt.
+
+        Args:
+            start_date (datetime.date) The date to start populating the table.
+            end_date (datetime.date) The date to end on.
+            cluster_id (String) Cluster Identifier
+
+        Returns
+            (None)
+
+        """
         table_name = OCP_REPORT_TABLE_MAP['volume_claim_label_summary']
 
-        agg_sql = pkgutil.get_data(
-            'masu.database',
-            f'sql/reporting_ocpstoragevolumeclaimlabel_summary.sql'
-        )
+        agg_sql = render_sql('reporting_ocpstoragevolumeclaimlabel_summary.sql')
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cluster_id': cluster_id
+        }
 
-        self._commit_and_vacuum(table_name, agg_sql)
+        self._commit_and_vacuum(table_name, agg_sql, start_date, end_date, params)
 
     # pylint: disable=invalid-name
-    def populate_volume_label_summary_table(self):
-        """Populate the OCP volume label summary table."""
+    def populate_volume_label_summary_table(self, start_date, end_date, cluster_id):
+        """Populate the OCP volume label summary table.
+
+        The summary rows of the cluster in the date range are rebuilt.
+
+        Args:
+            start_date (datetime.date) The date to start populating the table.
+            end_date (datetime.date) The date to end on.
+            cluster_id (String) Cluster Identifier
+
+        Returns
+            (None)
+
+        """
         table_name = OCP_REPORT_TABLE_MAP['volume_label_summary']
 
-        agg_sql = pkgutil.get_data(
-            'masu.database',
-            f'sql/reporting_ocpstoragevolumelabel_summary.sql'
-        )
+        agg_sql = render_sql('reporting_ocpstoragevolumelabel_summary.sql')
+        params = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'cluster_id': cluster_id
+        }
 
-        self._commit_and_vacuum(table_name, agg_sql)
+        self._commit_and_vacuum(table_name, agg_sql, start_date, end_date, params)
@@ -16,18 +16,65 @@
 #
 """Database accessor for report data."""
 
+import datetime
+import itertools
+import json
 import logging
+import time
 import uuid
 from decimal import Decimal, InvalidOperation
 
 import psycopg2
+from sqlalchemy import select, tuple_
 from sqlalchemy.dialects.postgresql import insert
 
 from masu.config import Config
 from masu.database.koku_database_access import KokuDBAccess
+from masu.database.table_maintenance import (get_maintenance_statements,
+                                             mark_tables_dirty,
+                                             pop_dirty_tables)
 
 LOG = logging.getLogger(__name__)
 
+# The number of rows written by one bulk INSERT statement
+UPSERT_BATCH_SIZE = 1000
+
+# The number of rows copied per transaction by stream_insert_rows
+COPY_COMMIT_SIZE = 100000
+# The number of bytes handed to COPY per read
+COPY_BUFFER_SIZE = 65536
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+# ReportSchema objects keyed by schema, built on the cached reflection
+_REPORT_SCHEMA_CACHE = {}
+CONVERTED_TYPES = (int, float, Decimal)
+
+
+def make_converter(column_type, quantum):
+    """Build a function converting a value to a column type.
+
+    Args:
+        column_type (type): A Python type
+        quantum (Decimal): The exponent decimal values are quantized to
+
+    Returns:
+        (function): Returns the converted value or None if conversion fails
+
+    """
+    if column_type == Decimal:
+        def convert(value):
+            try:
+                return Decimal(value).quantize(quantum)
+            except InvalidOperation:
+                return None
+    else:
+        def convert(value):
+            try:
+                return column_type(value)
+            except ValueError:
+                return None
+    return convert
+
 
 # pylint: disable=too-few-public-methods
 class ReportSchema:
@@ -59,6 +106,54 @@ class ReportSchema:
             self.column_types = column_types
 
 
+def encode_copy_value(value):
+    """Encode a value in the COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        return value.translate(COPY_ESCAPES)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value).translate(COPY_ESCAPES)
+    return str(value)
+
+
+class CopyRowStream:
+    """A file-like object encoding rows for COPY FROM STDIN as they are read.
+
+    Rows are only pulled from the iterator when COPY reads, so at most one
+    read size plus one row is held in memory.
+    """
+
+    def __init__(self, rows):
+        """Wrap an iterator of row tuples."""
+        self._rows = rows
+        self._buffer = bytearray()
+        self._exhausted = False
+        self.row_count = 0
+
+    def _fill(self, size):
+        """Encode rows until the buffer holds size bytes or rows run out."""
+        buffer = self._buffer
+        for row in self._rows:
+            buffer += ('\t'.join(map(encode_copy_value, row)) + '\n').encode('utf-8')
+            self.row_count += 1
+            if size >= 0 and len(buffer) >= size:
+                return
+        self._exhausted = True
+
+    def read(self, size=-1):
+        """Return up to size bytes of encoded rows."""
+        if not self._exhausted and (size < 0 or len(self._buffer) < size):
+            self._fill(size)
+        if size < 0 or size > len(self._buffer):
+            size = len(self._buffer)
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return chunk
+
+
 # pylint: disable=too-many-public-methods
 class ReportDBAccessorBase(KokuDBAccess):
     """Class to interact with customer reporting tables."""
@@ -72,8 +167,9 @@ class ReportDBAccessorBase(KokuDBAccess):
         """
         super().__init__(schema)
         self.column_map = column_map
-        self.report_schema = ReportSchema(self.get_base().classes,
-                                          self.column_map)
+        self.report_schema = self._get_report_schema()
+        self._decimal_quantum = Decimal(self.decimal_precision)
+        self._converters = {}
         self._session = self.get_session()
         self._conn = self._db.connect()
         self._pg2_conn = self._get_psycopg2_connection()
@@ -82,26 +178,66 @@ class ReportDBAccessorBase(KokuDBAccess):
     def __exit__(self, exception_type, exception_value, traceback):
         """Context manager close connections."""
         super().__exit__(exception_type, exception_value, traceback)
+        if not exception_type:
+            self.run_table_maintenance()
         self.close_connections()
 
+    def _get_report_schema(self):
+        """Return the report schema, reusing one built on the same reflection."""
+        base = self.get_base()
+        cached = _REPORT_SCHEMA_CACHE.get(self.schema)
+        if cached and cached[0] is base and cached[1] == self.column_map:
+            return cached[2]
+        report_schema = ReportSchema(base.classes, self.column_map)
+        _REPORT_SCHEMA_CACHE[self.schema] = (base, self.column_map, report_schema)
+        return report_schema
+
     @property
     def decimal_precision(self):
         """Return database precision for decimal values."""
         return f'0E-{Config.REPORTING_DECIMAL_PRECISION}'
 
-    # pylint: disable=no-self-use
     def _get_psycopg2_connection(self):
-        """Get a low level database connection."""
-        return psycopg2.connect(Config.SQLALCHEMY_DATABASE_URI)
+        """Check out a low level database connection from the engine pool.
+
+        The pooled psycopg2 connection is wrapped in a proxy that returns it
+        to the pool when it is closed.
+        """
+        return self._db.raw_connection()
+
+    def _release_psycopg2_connection(self):
+        """Drop the session's temp tables and return the connection to the pool.
+
+        Temp tables live as long as the database session, which outlives the
+        accessor on a pooled connection. A connection that cannot be cleaned
+        up is invalidated so the pool does not hand it out again.
+        """
+        try:
+            self._pg2_conn.rollback()
+            with self._pg2_conn.cursor() as cursor:
+                cursor.execute('DISCARD TEMP')
+            self._pg2_conn.commit()
+        except psycopg2.Error as err:
+            LOG.warning('Discarding database connection: %s', err)
+            self._pg2_conn.invalidate()
+        self._pg2_conn.close()
 
     def _get_psycopg2_cursor(self):
-        """Get a cursor for the low level database connection."""
+        """Get a cursor for the low level database connection.
+
+        Pooled connections keep the search path of their last checkout, so
+        it is set again for every accessor.
+        """
         cursor = self._pg2_conn.cursor()
         cursor.execute(f'SET search_path TO {self.schema}')
         return cursor
 
     def create_temp_table(self, table_name, drop_column=None):
-        """Create a temporary table and return the table name."""
+        """Create a temporary table and return the table name.
+
+        The table is reused across merges and is dropped when the accessor
+        closes its connections.
+        """
         temp_table_name = table_name + '_' + str(uuid.uuid4()).replace('-', '_')
         self._cursor.execute(
             f'CREATE TEMPORARY TABLE {temp_table_name} (LIKE {table_name})'
@@ -114,7 +250,10 @@ class ReportDBAccessorBase(KokuDBAccess):
         return temp_table_name
 
     def create_new_temp_table(self, table_name, columns):
-        """Create a temporary table and return the table name."""
+        """Create a temporary table and return the table name.
+
+        The table is dropped when the accessor closes its connections.
+        """
         temp_table_name = table_name + '_' + str(uuid.uuid4()).replace('-', '_')
         base_sql = f'CREATE TEMPORARY TABLE {temp_table_name} '
         column_types = f''
@@ -133,52 +272,62 @@ class ReportDBAccessorBase(KokuDBAccess):
                          condition_column, conflict_columns):
         """INSERT temp table rows into the primary table specified.
 
+        Rows are merged with a single INSERT ... ON CONFLICT statement.
+        Existing rows are only updated by rows with a value in the condition
+        column, and such rows win over rows without one for the same key.
+        The temp table is truncated in the same transaction, so it can be
+        refilled with the next batch of rows.
+
         Args:
             table_name (str): The main table to insert into
             temp_table_name (str): The temp table to pull from
             columns (list): A list of columns to use in the insert logic
+            condition_column (str): The column finalized rows have a value in,
+                all rows update existing ones when None
+            conflict_columns (list): The columns of the unique constraint
 
         Returns:
-            (None)
+            (bool): Whether finalized rows were merged
 
         """
-        is_finalized_data = False
         column_str = ','.join(columns)
         conflict_col_str = ','.join(conflict_columns)
 
         set_clause = ','.join([f'{column} = excluded.{column}'
                                for column in columns])
-        update_sql = f"""
-            INSERT INTO {table_name} ({column_str})
-                SELECT {column_str}
+        select_clause = f'SELECT {column_str} FROM {temp_table_name}'
+        update_condition = ''
+        finalized = 'true'
+        if condition_column:
+            select_clause = f"""
+                SELECT DISTINCT ON ({conflict_col_str}) {column_str}
                 FROM {temp_table_name}
-                WHERE {condition_column} IS NOT NULL
-                ON CONFLICT ({conflict_col_str}) DO UPDATE
-                SET {set_clause}
-            """
-        self._cursor.execute(update_sql)
-        self._pg2_conn.commit()
-
-        row_count = self._cursor.rowcount
-        if row_count > 0:
-            is_finalized_data = True
-
-        insert_sql = f"""
-            INSERT INTO {table_name} ({column_str})
-                SELECT {column_str}
-                FROM {temp_table_name}
-                WHERE {condition_column} IS NULL
-                ON CONFLICT DO NOTHING
+                ORDER BY {conflict_col_str}, {condition_column} NULLS LAST"""
+            update_condition = f'WHERE excluded.{condition_column} IS NOT NULL'
+            finalized = f'{condition_column} IS NOT NULL'
+
+        merge_sql = f"""
+            WITH merged AS (
+                INSERT INTO {table_name} ({column_str})
+                    {select_clause}
+                    ON CONFLICT ({conflict_col_str}) DO UPDATE
+                    SET {set_clause}
+                    {update_condition}
+                    RETURNING xmax = 0 AS inserted, {finalized} AS finalized
+            )
+            SELECT count(*) FILTER (WHERE inserted),
+                count(*) FILTER (WHERE NOT inserted),
+                count(*) FILTER (WHERE finalized)
+            FROM merged
         """
-        self._cursor.execute(insert_sql)
+        self._cursor.execute(merge_sql)
+        inserted, updated, finalized_count = self._cursor.fetchone()
+        self._cursor.execute(f'TRUNCATE {temp_table_name}')
         self._pg2_conn.commit()
+        LOG.info('Merged %s into %s: %s rows inserted, %s rows updated.',
+                 temp_table_name, table_name, inserted, updated)
 
-        delete_sql = f'DELETE FROM {temp_table_name}'
-        self._cursor.execute(delete_sql)
-        self._pg2_conn.commit()
-        self.vacuum_table(temp_table_name)
-
-        return is_finalized_data
+        return finalized_count > 0
 
     def vacuum_table(self, table_name):
         """Vacuum a table outside of a transaction."""
@@ -190,6 +339,29 @@ class ReportDBAccessorBase(KokuDBAccess):
         self._cursor.execute(vacuum)
         self._pg2_conn.set_isolation_level(isolation_level)
 
+    def run_table_maintenance(self):
+        """Analyze the tables changed since the last run, vacuuming as needed.
+
+        Tables are only vacuumed when their dead tuples in
+        pg_stat_user_tables pass the thresholds of table_maintenance.
+        """
+        tables = pop_dirty_tables(self.schema)
+        if not tables:
+            return
+        statements = get_maintenance_statements(self._cursor, self.schema, tables)
+        self._pg2_conn.commit()
+
+        isolation_level = self._pg2_conn.isolation_level
+        self._pg2_conn.set_isolation_level(
+            psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT
+        )
+        try:
+            for statement in statements:
+                LOG.info('Running %s.', statement)
+                self._cursor.execute(statement)
+        finally:
+            self._pg2_conn.set_isolation_level(isolation_level)
+
     # pylint: disable=too-many-arguments
     def bulk_insert_rows(self, file_obj, table, columns, sep='\t', null=''):
         r"""Insert many rows using Postgres copy functionality.
@@ -211,11 +383,45 @@ class ReportDBAccessorBase(KokuDBAccess):
         )
         self._pg2_conn.commit()
 
+    def stream_insert_rows(self, rows, table, columns, commit_size=COPY_COMMIT_SIZE):
+        """Insert rows from an iterator using Postgres copy functionality.
+
+        Rows are encoded while COPY reads them, so memory use does not grow
+        with the number of rows. Each chunk of commit_size rows is copied
+        and committed in its own transaction.
+
+        Args:
+            rows (iterable): Row tuples in the order of columns
+            table (str): The table name in the databse to copy to
+            columns (list): A list of column names
+            commit_size (int): The number of rows per transaction
+
+        Returns:
+            (int): The number of rows copied
+
+        """
+        rows = iter(rows)
+        copy_sql = f'COPY {table} ({", ".join(columns)}) FROM STDIN'
+        row_count = 0
+        start = time.monotonic()
+        while True:
+            stream = CopyRowStream(itertools.islice(rows, commit_size))
+            self._cursor.copy_expert(copy_sql, stream, size=COPY_BUFFER_SIZE)
+            self._pg2_conn.commit()
+            row_count += stream.row_count
+            if stream.row_count < commit_size:
+                break
+
+        elapsed = time.monotonic() - start
+        LOG.info('Copied %s rows into %s in %.1fs (%.0f rows/s).',
+                 row_count, table, elapsed, row_count / elapsed if elapsed else 0)
+        return row_count
+
     def close_connections(self, conn=None):
-        """Close the low level database connection.
+        """Return the low level database connections to the pool.
 
         Args:
-            conn (psycopg2.extensions.connection) An optional connection.
+            conn (sqlalchemy.pool._ConnectionFairy) An optional connection.
                 If none is supplied the class's connections are used.
 
         """
@@ -223,7 +429,7 @@ class ReportDBAccessorBase(KokuDBAccess):
             conn.close()
         else:
             self._cursor.close()
-            self._pg2_conn.close()
+            self._release_psycopg2_connection()
             self._conn.close()
 
     # pylint: disable=arguments-differ
@@ -338,6 +544,61 @@ class ReportDBAccessorBase(KokuDBAccess):
 
         return self._get_primary_key(table_name, data)
 
+    def bulk_insert_on_conflict(self, table_name, rows, conflict_columns,
+                                set_columns=None, batch_size=UPSERT_BATCH_SIZE):
+        """Write multi-row INSERT statements with an ON CONFLICT clause.
+
+        Rows are written in batches with RETURNING, so each batch costs one
+        round trip plus, when rows are left unchanged, one SELECT for the ids
+        of the existing rows. Rows repeating a conflict key are collapsed,
+        the last one wins.
+
+        Args:
+            table_name (str): The name of the table to insert into
+            rows (list): A list of dictionaries of data to insert
+            conflict_columns (list): Columns to check conflict on
+            set_columns (list): Columns to update on conflict,
+                existing rows are left unchanged when None
+
+        Returns:
+            (dict): The row id for each tuple of conflict column values,
+                as stored in the database
+
+        """
+        table = getattr(self.report_schema, table_name).__table__
+        key_columns = [table.c[column] for column in conflict_columns]
+        unique_rows = {}
+        for row in self.clean_rows(rows, table_name):
+            unique_rows[tuple(row.get(column) for column in conflict_columns)] = row
+        unique_rows = list(unique_rows.values())
+
+        row_ids = {}
+        for start in range(0, len(unique_rows), batch_size):
+            batch = unique_rows[start:start + batch_size]
+            statement = insert(table).values(batch)
+            if set_columns:
+                statement = statement.on_conflict_do_update(
+                    index_elements=conflict_columns,
+                    set_={column: statement.excluded[column] for column in set_columns}
+                )
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=conflict_columns)
+            statement = statement.returning(table.c.id, *key_columns)
+            row_ids.update(self._map_key_to_id(self._conn.execute(statement)))
+
+            if len(row_ids) < start + len(batch):
+                keys = [tuple(row.get(column) for column in conflict_columns) for row in batch]
+                query = select([table.c.id, *key_columns])\
+                    .where(tuple_(*key_columns).in_(keys))
+                row_ids.update(self._map_key_to_id(self._conn.execute(query)))
+
+        return row_ids
+
+    @staticmethod
+    def _map_key_to_id(result):
+        """Map the key columns of (id, *key) result rows to the id."""
+        return {tuple(row[1:]): row[0] for row in result}
+
     def _get_primary_key(self, table_name, data):
         """Return the row id for a specific object."""
         query = self._get_db_obj_query(table_name)
@@ -361,32 +622,83 @@ class ReportDBAccessorBase(KokuDBAccess):
         self._session.add(table)
         self._session.flush()
 
-    def clean_data(self, data, table_name):
-        """Clean data for insertion into database.
+    def _get_converters(self, table_name):
+        """Return the value converters of a table, built once per accessor.
 
         Args:
-            data (dict): The data to be cleaned
             table_name (str): The table name the data is associated with
 
         Returns:
-            (dict): The data with values converted to required types
+            (dict): A converter function per numeric column
 
         """
-        column_types = self.report_schema.column_types[table_name]
+        converters = self._converters.get(table_name)
+        if converters is None:
+            column_types = self.report_schema.column_types[table_name]
+            converters = {column: make_converter(column_type, self._decimal_quantum)
+                          for column, column_type in column_types.items()
+                          if column_type in CONVERTED_TYPES}
+            self._converters[table_name] = converters
+        return converters
+
+    @staticmethod
+    def _clean_row(data, converters):
+        """Convert the values of a row in place.
 
+        Returns:
+            (int): The number of values that could not be converted
+
+        """
+        failures = 0
         for key, value in data.items():
             if value is None or value == '':
                 data[key] = None
                 continue
-            if column_types.get(key) == int:
-                data[key] = self._convert_value(value, int)
-            elif column_types.get(key) == float:
-                data[key] = self._convert_value(value, float)
-            elif column_types.get(key) == Decimal:
-                data[key] = self._convert_value(value, Decimal)
+            convert = converters.get(key)
+            if convert:
+                value = data[key] = convert(value)
+                if value is None:
+                    failures += 1
+        return failures
+
+    def clean_data(self, data, table_name):
+        """Clean data for insertion into database.
+
+        Args:
+            data (dict): The data to be cleaned
+            table_name (str): The table name the data is associated with
 
+        Returns:
+            (dict): The data with values converted to required types
+
+        """
+        failures = self._clean_row(data, self._get_converters(table_name))
+        if failures:
+            LOG.warning('%s values for %s could not be converted.', failures, table_name)
         return data
 
+    def clean_rows(self, rows, table_name):
+        """Clean a batch of rows for insertion into database.
+
+        Conversion failures are counted and logged once for the batch.
+
+        Args:
+            rows (list): A list of dictionaries of data to be cleaned
+            table_name (str): The table name the data is associated with
+
+        Returns:
+            (list): The rows with values converted to required types
+
+        """
+        converters = self._get_converters(table_name)
+        clean_row = self._clean_row
+        failures = 0
+        for row in rows:
+            failures += clean_row(row, converters)
+        if failures:
+            LOG.warning('%s values for %s could not be converted.', failures, table_name)
+        return rows
+
     def _convert_value(self, value, column_type):
         """Convert a single value to the specified column type.
 
@@ -398,28 +710,36 @@ class ReportDBAccessorBase(KokuDBAccess):
             (var): The variable converted to type or None if conversion fails.
 
         """
-        if column_type == Decimal:
-            try:
-                value = Decimal(value).quantize(Decimal(self.decimal_precision))
-            except InvalidOperation:
-                value = None
-        else:
-            try:
-                value = column_type(value)
-            except ValueError as err:
-                LOG.warning(err)
-                value = None
-        return value
-
-    def _commit_and_vacuum(self, table, sql, start=None, end=None):
-        """Commit query to a table and vacuum."""
+        return make_converter(column_type, self._decimal_quantum)(value)
+
+    def _commit_and_vacuum(self, table, sql, start=None, end=None, params=None):
+        """Commit query to a table and schedule its maintenance.
+
+        The table is vacuumed or analyzed by run_table_maintenance, together
+        with the other tables changed while processing.
+
+        Args:
+            table (str): The table the query updates
+            sql (str): The SQL to execute
+            start (datetime.date): The start of the updated range, for logging
+            end (datetime.date): The end of the updated range, for logging
+            params (dict): The %(name)s query parameters of the SQL
+        """
         if start and end:
             LOG.info('Updating %s from %s to %s.',
                      table, start, end)
         else:
             LOG.info('Updating %s', table)
 
-        self._cursor.execute(sql)
+        self._cursor.execute(sql, params)
+        self._increment_data_version()
         self._pg2_conn.commit()
-        self.vacuum_table(table)
+        mark_tables_dirty(self.schema, table)
         LOG.info('Finished updating %s.', table)
+
+    def _increment_data_version(self):
+        """Increment the tenant data version so cached reports are invalidated."""
+        self._cursor.execute(
+            'UPDATE public.api_tenant SET data_version = data_version + 1 WHERE schema_name = %s',
+            [self.schema]
+        )
@@ -1,5 +1,5 @@
 -- Aggregate tags from hourly to daily level
-CREATE TEMPORARY TABLE aws_tag_summary_{uuid} AS (
+CREATE TEMPORARY TABLE aws_tag_summary_{uuid} ON COMMIT DROP AS (
     SELECT date(t.interval_start) as usage_start,
         cost_entry_bill_id,
         cost_entry_product_id,
@@ -42,9 +42,9 @@ CREATE TEMPORARY TABLE aws_tag_summary_{uuid} AS (
             FROM reporting_awscostentrylineitem AS li
             JOIN reporting_awscostentry AS ce
                 ON li.cost_entry_id = ce.id
-            WHERE date(ce.interval_start) >= '{start_date}'
-                AND date(ce.interval_start) <= '{end_date}'
-                AND li.cost_entry_bill_id IN ({cost_entry_bill_ids})
+            WHERE ce.interval_start >= %(start_date)s::date
+                AND ce.interval_start < %(end_date)s::date + INTERVAL '1 day'
+                AND li.cost_entry_bill_id = ANY(%(cost_entry_bill_ids)s::integer[])
         ) li,
         jsonb_each_text(li.tags) tags
     ) t
@@ -66,7 +66,7 @@ CREATE TEMPORARY TABLE aws_tag_summary_{uuid} AS (
 ;
 
 -- Place our query in a temporary table
-CREATE TEMPORARY TABLE reporting_awscostentrylineitem_daily_{uuid} AS (
+CREATE TEMPORARY TABLE reporting_awscostentrylineitem_daily_{uuid} ON COMMIT DROP AS (
     SELECT li.*,
         CASE WHEN ats.tags IS NOT NULL
             THEN ats.tags
@@ -100,9 +100,9 @@ CREATE TEMPORARY TABLE reporting_awscostentrylineitem_daily_{uuid} AS (
         FROM reporting_awscostentrylineitem AS li
         JOIN reporting_awscostentry AS ce
             ON li.cost_entry_id = ce.id
-        WHERE date(ce.interval_start) >= '{start_date}'
-            AND date(ce.interval_start) <= '{end_date}'
-            AND li.cost_entry_bill_id IN ({cost_entry_bill_ids})
+        WHERE ce.interval_start >= %(start_date)s::date
+            AND ce.interval_start < %(end_date)s::date + INTERVAL '1 day'
+            AND li.cost_entry_bill_id = ANY(%(cost_entry_bill_ids)s::integer[])
         GROUP BY date(ce.interval_start),
             li.cost_entry_bill_id,
             li.cost_entry_product_id,
@@ -172,9 +172,9 @@ CREATE TEMPORARY TABLE reporting_awscostentrylineitem_daily_{uuid} AS (
 
 -- Clear out old entries first
 DELETE FROM reporting_awscostentrylineitem_daily
-WHERE usage_start >= '{start_date}'
-    AND usage_start <= '{end_date}'
-    AND cost_entry_bill_id IN ({cost_entry_bill_ids})
+WHERE usage_start >= %(start_date)s
+    AND usage_start <= %(end_date)s
+    AND cost_entry_bill_id = ANY(%(cost_entry_bill_ids)s::integer[])
 ;
 
 -- Populate the daily aggregate line item data
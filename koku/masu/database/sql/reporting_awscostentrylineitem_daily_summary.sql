@@ -1,5 +1,5 @@
 -- Aggregate tags by summary grouping
-CREATE TEMPORARY TABLE aws_tag_summary_{uuid} AS (
+CREATE TEMPORARY TABLE aws_tag_summary_{uuid} ON COMMIT DROP AS (
     SELECT t.cost_entry_bill_id,
         t.usage_start,
         t.product_code,
@@ -41,9 +41,9 @@ CREATE TEMPORARY TABLE aws_tag_summary_{uuid} AS (
             ON li.cost_entry_product_id = p.id
         LEFT JOIN reporting_awscostentrypricing as pr
             ON li.cost_entry_pricing_id = pr.id
-        WHERE date(li.usage_start) >= '{start_date}'
-            AND date(li.usage_start) <= '{end_date}'
-            AND li.cost_entry_bill_id IN ({cost_entry_bill_ids})
+        WHERE li.usage_start >= %(start_date)s::date
+            AND li.usage_start < %(end_date)s::date + INTERVAL '1 day'
+            AND li.cost_entry_bill_id = ANY(%(cost_entry_bill_ids)s::integer[])
         GROUP BY li.cost_entry_bill_id,
             li.usage_start,
             li.usage_end,
@@ -70,7 +70,7 @@ CREATE TEMPORARY TABLE aws_tag_summary_{uuid} AS (
 ;
 
 -- Place our query for data with no tags in a temporary table
-CREATE TEMPORARY TABLE reporting_awscostentrylineitem_daily_summary_{uuid} AS (
+CREATE TEMPORARY TABLE reporting_awscostentrylineitem_daily_summary_{uuid} ON COMMIT DROP AS (
     SELECT li.*,
         CASE WHEN ats.tags IS NOT NULL
             THEN ats.tags
@@ -107,9 +107,9 @@ CREATE TEMPORARY TABLE reporting_awscostentrylineitem_daily_summary_{uuid} AS (
             ON li.cost_entry_pricing_id = pr.id
         LEFT JOIN reporting_awsaccountalias AS aa
             ON li.usage_account_id = aa.account_id
-        WHERE date(li.usage_start) >= '{start_date}'
-            AND date(li.usage_start) <= '{end_date}'
-            AND li.cost_entry_bill_id IN ({cost_entry_bill_ids})
+        WHERE li.usage_start >= %(start_date)s::date
+            AND li.usage_start < %(end_date)s::date + INTERVAL '1 day'
+            AND li.cost_entry_bill_id = ANY(%(cost_entry_bill_ids)s::integer[])
         GROUP BY li.cost_entry_bill_id,
             li.usage_start,
             li.usage_end,
@@ -160,9 +160,9 @@ CREATE TEMPORARY TABLE reporting_awscostentrylineitem_daily_summary_{uuid} AS (
 
 -- -- Clear out old entries first
 DELETE FROM reporting_awscostentrylineitem_daily_summary
-WHERE usage_start >= '{start_date}'
-    AND usage_start <= '{end_date}'
-    AND cost_entry_bill_id IN ({cost_entry_bill_ids})
+WHERE usage_start >= %(start_date)s
+    AND usage_start <= %(end_date)s
+    AND cost_entry_bill_id = ANY(%(cost_entry_bill_ids)s::integer[])
 ;
 
 -- Populate the daily aggregate line item data
@@ -0,0 +1,59 @@
+-- Place our query in a temporary table
+CREATE TEMPORARY TABLE reporting_awscostentrylineitem_monthly_summary_{uuid} ON COMMIT DROP AS (
+    SELECT li.cost_entry_bill_id,
+        date_trunc('month', li.usage_start) as usage_start,
+        max(li.usage_end) as usage_end,
+        li.usage_account_id,
+        li.account_alias_id,
+        li.product_code,
+        li.availability_zone,
+        li.region,
+        li.currency_code,
+        sum(li.unblended_cost) as unblended_cost
+    FROM reporting_awscostentrylineitem_daily_summary AS li
+    WHERE li.usage_start >= date_trunc('month', %(start_date)s::date)
+        AND li.usage_start < date_trunc('month', %(end_date)s::date) + interval '1 month'
+        AND li.cost_entry_bill_id = ANY(%(cost_entry_bill_ids)s::integer[])
+    GROUP BY li.cost_entry_bill_id,
+        date_trunc('month', li.usage_start),
+        li.usage_account_id,
+        li.account_alias_id,
+        li.product_code,
+        li.availability_zone,
+        li.region,
+        li.currency_code
+)
+;
+
+-- Clear out old entries first
+DELETE FROM reporting_awscostentrylineitem_monthly_summary
+WHERE usage_start >= date_trunc('month', %(start_date)s::date)
+    AND usage_start < date_trunc('month', %(end_date)s::date) + interval '1 month'
+    AND cost_entry_bill_id = ANY(%(cost_entry_bill_ids)s::integer[])
+;
+
+-- Populate the monthly aggregate line item data
+INSERT INTO reporting_awscostentrylineitem_monthly_summary (
+    cost_entry_bill_id,
+    usage_start,
+    usage_end,
+    usage_account_id,
+    account_alias_id,
+    product_code,
+    availability_zone,
+    region,
+    currency_code,
+    unblended_cost
+)
+    SELECT cost_entry_bill_id,
+        usage_start,
+        usage_end,
+        usage_account_id,
+        account_alias_id,
+        product_code,
+        availability_zone,
+        region,
+        currency_code,
+        unblended_cost
+    FROM reporting_awscostentrylineitem_monthly_summary_{uuid}
+;
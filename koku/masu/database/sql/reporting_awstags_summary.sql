@@ -1,13 +1,43 @@
-INSERT INTO reporting_awstags_summary
+-- Replace the tag values of the processed range of the bills
+DELETE FROM reporting_awstags_summary
+WHERE usage_start >= %(start_date)s::date
+    AND usage_start < %(end_date)s::date + INTERVAL '1 day'
+    AND cost_entry_bill_id = ANY(%(cost_entry_bill_ids)s::integer[])
+;
+
+INSERT INTO reporting_awstags_summary (
+    key,
+    values,
+    usage_start,
+    usage_end,
+    cost_entry_bill_id,
+    usage_account_id,
+    account_alias_id
+)
 SELECT l.key,
-    array_agg(DISTINCT l.value) as values
+    array_agg(DISTINCT l.value) as values,
+    l.usage_start,
+    l.usage_start as usage_end,
+    l.cost_entry_bill_id,
+    l.usage_account_id,
+    aa.id as account_alias_id
 FROM (
     SELECT key,
-        value
+        value,
+        date(li.usage_start) as usage_start,
+        li.cost_entry_bill_id,
+        li.usage_account_id
     FROM reporting_awscostentrylineitem_daily AS li,
         jsonb_each_text(li.tags) labels
+    WHERE li.usage_start >= %(start_date)s::date
+        AND li.usage_start < %(end_date)s::date + INTERVAL '1 day'
+        AND li.cost_entry_bill_id = ANY(%(cost_entry_bill_ids)s::integer[])
 ) l
-GROUP BY l.key
-ON CONFLICT (key) DO UPDATE
-SET values = EXCLUDED.values
+LEFT JOIN reporting_awsaccountalias AS aa
+    ON l.usage_account_id = aa.account_id
+GROUP BY l.key,
+    l.usage_start,
+    l.cost_entry_bill_id,
+    l.usage_account_id,
+    aa.id
 ;
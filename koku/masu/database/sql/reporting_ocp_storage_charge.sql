@@ -1,2 +1,38 @@
--- Calculate and update the OCP Storage usage charge
-UPDATE reporting_ocpstoragelineitem_daily_summary SET persistentvolumeclaim_charge_gb_month = charge FROM {temp_table} WHERE id = {temp_table}.lineid;
+-- Apply the provider's tiered storage rates to the daily storage summary.
+-- The part of a line's usage between a tier's usage_start and usage_end is
+-- charged at the tier's rate. A null usage_start is 0 and a null usage_end
+-- leaves the tier unbounded. The usage and request charges are added.
+WITH cte_tiers AS (
+    SELECT r.metric,
+        coalesce(t.usage_start, 0) as usage_start,
+        t.usage_end,
+        t.value
+    FROM rates_rate AS r
+    JOIN rates_ratemap AS rm
+        ON r.id = rm.rate_id
+    CROSS JOIN LATERAL (
+        SELECT coalesce(tier->>'usage_start', tier->'usage'->>'usage_start')::numeric as usage_start,
+            coalesce(tier->>'usage_end', tier->'usage'->>'usage_end')::numeric as usage_end,
+            (tier->>'value')::numeric as value
+        FROM jsonb_array_elements(r.rates->'tiered_rate') AS tier
+    ) AS t
+    WHERE rm.provider_uuid = %(provider_uuid)s::uuid
+        AND r.metric IN (
+            'storage_gb_usage_per_month',
+            'storage_gb_request_per_month'
+        )
+)
+UPDATE reporting_ocpstoragelineitem_daily_summary AS li
+    SET persistentvolumeclaim_charge_gb_month = (
+            SELECT coalesce(sum(t.value * greatest(least(u.usage, coalesce(t.usage_end, u.usage)) - t.usage_start, 0)), 0)
+            FROM cte_tiers AS t
+            JOIN (
+                VALUES ('storage_gb_usage_per_month', coalesce(li.persistentvolumeclaim_usage_gigabyte_months, 0)),
+                    ('storage_gb_request_per_month', coalesce(li.volume_request_storage_gigabyte_months, 0))
+            ) AS u (metric, usage)
+                ON t.metric = u.metric
+        )
+WHERE li.usage_start >= %(start_date)s::date
+    AND li.usage_start < %(end_date)s::date + INTERVAL '1 day'
+    AND li.cluster_id = %(cluster_id)s
+;
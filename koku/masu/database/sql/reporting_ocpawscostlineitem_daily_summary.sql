@@ -1,34 +1,41 @@
--- The Python string variable subsitutions {aws_where_clause} and
--- {ocp_where_clause} optionally filter AWS and OCP data by provider/source
--- Ex aws_where_clause: 'AND cost_entry_bill_id IN (1, 2, 3)'
--- Ex ocp_where_clause: "AND cluster_id = 'abcd-1234`"
+-- The aws_where_clause and ocp_where_clause substitutions optionally
+-- filter AWS and OCP data by provider/source
+-- with the cost_entry_bill_ids and cluster_id query parameters.
+-- Every temp table is named per run and dropped on commit, and only the
+-- filtered rows are deleted and replaced, so runs for different clusters
+-- can execute concurrently on separate connections.
 
 -- We use a LATERAL JOIN here to get the JSON tags split out into key, value
 -- columns. We reference this split multiple times so we put it in a
--- TEMPORARY TABLE for re-use
-CREATE TEMPORARY TABLE reporting_aws_tags AS (
+-- TEMPORARY TABLE for re-use. Only the processed window, bills and cluster
+-- are exploded, and each temp table is indexed and analyzed because
+-- autovacuum never collects statistics for temporary tables.
+CREATE TEMPORARY TABLE aws_tags_{uuid} ON COMMIT DROP AS (
     SELECT aws.*,
         LOWER(key) as key,
         LOWER(value) as value
         FROM reporting_awscostentrylineitem_daily as aws,
             jsonb_each_text(aws.tags) labels
-        WHERE date(aws.usage_start) >= '{start_date}'
-            AND date(aws.usage_start) <= '{end_date}'
+        WHERE aws.usage_start >= %(start_date)s::date
+            AND aws.usage_start < %(end_date)s::date + INTERVAL '1 day'
             {aws_where_clause}
 )
 ;
 
+CREATE INDEX ON aws_tags_{uuid} (key, value);
+ANALYZE aws_tags_{uuid};
+
 -- We use a LATERAL JOIN here to get the JSON tags split out into key, value
 -- columns. We reference this split multiple times so we put it in a
 -- TEMPORARY TABLE for re-use
-CREATE TEMPORARY TABLE reporting_ocp_storage_tags AS (
+CREATE TEMPORARY TABLE ocp_storage_tags_{uuid} ON COMMIT DROP AS (
     SELECT ocp.*,
         LOWER(key) as key,
         LOWER(value) as value
     FROM reporting_ocpstoragelineitem_daily as ocp,
         jsonb_each_text(ocp.persistentvolume_labels) labels
-    WHERE date(ocp.usage_start) >= '{start_date}'
-        AND date(ocp.usage_start) <= '{end_date}'
+    WHERE ocp.usage_start >= %(start_date)s::date
+        AND ocp.usage_start < %(end_date)s::date + INTERVAL '1 day'
         {ocp_where_clause}
 
     UNION ALL
@@ -38,833 +45,309 @@ CREATE TEMPORARY TABLE reporting_ocp_storage_tags AS (
         LOWER(value) as value
     FROM reporting_ocpstoragelineitem_daily as ocp,
         jsonb_each_text(ocp.persistentvolumeclaim_labels) labels
-    WHERE date(ocp.usage_start) >= '{start_date}'
-        AND date(ocp.usage_start) <= '{end_date}'
+    WHERE ocp.usage_start >= %(start_date)s::date
+        AND ocp.usage_start < %(end_date)s::date + INTERVAL '1 day'
         {ocp_where_clause}
 )
 ;
 
+CREATE INDEX ON ocp_storage_tags_{uuid} (key, value);
+ANALYZE ocp_storage_tags_{uuid};
+
 -- We use a LATERAL JOIN here to get the JSON tags split out into key, value
 -- columns. We reference this split multiple times so we put it in a
 -- TEMPORARY TABLE for re-use
-CREATE TEMPORARY TABLE reporting_ocp_pod_tags AS (
+CREATE TEMPORARY TABLE ocp_pod_tags_{uuid} ON COMMIT DROP AS (
     SELECT ocp.*,
         LOWER(key) as key,
         LOWER(value) as value
     FROM reporting_ocpusagelineitem_daily as ocp,
         jsonb_each_text(ocp.pod_labels) labels
-    WHERE date(ocp.usage_start) >= '{start_date}'
-        AND date(ocp.usage_start) <= '{end_date}'
+    WHERE ocp.usage_start >= %(start_date)s::date
+        AND ocp.usage_start < %(end_date)s::date + INTERVAL '1 day'
         {ocp_where_clause}
 )
 ;
 
--- First we match OCP pod data to AWS data using a direct
--- resource id match. This usually means OCP node -> AWS EC2 instance ID.
-CREATE TEMPORARY TABLE reporting_ocp_aws_resource_id_matched AS (
-    WITH cte_resource_id_matched AS (
-        SELECT ocp.id AS ocp_id,
-            ocp.cluster_id,
-            ocp.cluster_alias,
-            ocp.namespace,
-            ocp.pod,
-            ocp.node,
-            ocp.pod_labels,
-            ocp.pod_usage_cpu_core_seconds,
-            ocp.pod_request_cpu_core_seconds,
-            ocp.pod_limit_cpu_core_seconds,
-            ocp.pod_usage_memory_byte_seconds,
-            ocp.pod_request_memory_byte_seconds,
-            ocp.node_capacity_cpu_cores,
-            ocp.node_capacity_cpu_core_seconds,
-            ocp.node_capacity_memory_bytes,
-            ocp.node_capacity_memory_byte_seconds,
-            ocp.cluster_capacity_cpu_core_seconds,
-            ocp.cluster_capacity_memory_byte_seconds,
-            aws.id AS aws_id,
-            aws.cost_entry_bill_id,
-            aws.cost_entry_product_id,
-            aws.cost_entry_pricing_id,
-            aws.cost_entry_reservation_id,
-            aws.line_item_type,
-            aws.usage_account_id,
-            aws.usage_start,
-            aws.usage_end,
-            aws.product_code,
-            aws.usage_type,
-            aws.operation,
-            aws.availability_zone,
-            aws.resource_id,
-            aws.usage_amount,
-            aws.normalization_factor,
-            aws.normalized_usage_amount,
-            aws.currency_code,
-            aws.unblended_rate,
-            aws.unblended_cost,
-            aws.blended_rate,
-            aws.blended_cost,
-            aws.public_on_demand_cost,
-            aws.public_on_demand_rate,
-            aws.tax_type,
-            aws.tags
+CREATE INDEX ON ocp_pod_tags_{uuid} (key, value);
+ANALYZE ocp_pod_tags_{uuid};
+
+-- OpenShift data is matched to AWS data in a single pass. Every candidate
+-- match is collected with the priority of its kind of match:
+--   1. A direct resource id match, usually OCP node -> AWS EC2 instance ID
+--   2. The OpenShift label key and value match the AWS tag key and value
+--   3. The AWS openshift_project tag matches the OpenShift project name
+--   4. The AWS openshift_node tag matches the OpenShift node name
+--   5. The AWS openshift_cluster tag matches the cluster id or alias
+-- Each AWS line item keeps only the matches of its best priority, and the
+-- projects and pods sharing the line item are counted once over those.
+CREATE TEMPORARY TABLE ocp_aws_pod_matched_{uuid} ON COMMIT DROP AS (
+    WITH cte_candidates AS (
+        SELECT 1 as match_priority,
+            ocp.id AS ocp_id,
+            aws.id AS aws_id
         FROM reporting_awscostentrylineitem_daily as aws
         JOIN reporting_ocpusagelineitem_daily as ocp
             ON aws.resource_id = ocp.resource_id
                 AND aws.usage_start::date = ocp.usage_start::date
-        WHERE date(aws.usage_start) >= '{start_date}'
-            AND date(aws.usage_start) <= '{end_date}'
-    ),
-    cte_number_of_shared_projects AS (
-        SELECT aws_id,
-            count(DISTINCT namespace) as shared_projects
-        FROM cte_resource_id_matched
-        GROUP BY aws_id
-    ),
-    cte_number_of_shared_pods AS (
-        SELECT aws_id,
-            count(DISTINCT pod) as shared_pods
-        FROM cte_resource_id_matched
-        GROUP BY aws_id
-    )
-    SELECT rm.*,
-        (rm.pod_usage_cpu_core_seconds / rm.node_capacity_cpu_core_seconds) * rm.unblended_cost as pod_cost,
-        sp.shared_projects,
-        spod.shared_pods
-    FROM cte_resource_id_matched AS rm
-    JOIN cte_number_of_shared_projects AS sp
-        ON rm.aws_id = sp.aws_id
-    JOIN cte_number_of_shared_pods AS spod
-        ON rm.aws_id = spod.aws_id
+        WHERE aws.usage_start >= %(start_date)s::date
+            AND aws.usage_start < %(end_date)s::date + INTERVAL '1 day'
+            AND ocp.usage_start >= %(start_date)s::date
+            AND ocp.usage_start < %(end_date)s::date + INTERVAL '1 day'
+            {aws_where_clause}
+            {ocp_where_clause}
 
-)
-;
+        UNION ALL
 
--- Next we match where the pod label key and value
--- and AWS tag key and value match directly
-CREATE TEMPORARY TABLE reporting_ocp_aws_direct_tag_matched AS (
-    WITH cte_tag_matched AS (
-        SELECT ocp.id AS ocp_id,
-            ocp.cluster_id,
-            ocp.cluster_alias,
-            ocp.namespace,
-            ocp.pod,
-            ocp.node,
-            ocp.pod_labels,
-            ocp.pod_usage_cpu_core_seconds,
-            ocp.pod_request_cpu_core_seconds,
-            ocp.pod_limit_cpu_core_seconds,
-            ocp.pod_usage_memory_byte_seconds,
-            ocp.pod_request_memory_byte_seconds,
-            ocp.node_capacity_cpu_cores,
-            ocp.node_capacity_cpu_core_seconds,
-            ocp.node_capacity_memory_bytes,
-            ocp.node_capacity_memory_byte_seconds,
-            ocp.cluster_capacity_cpu_core_seconds,
-            ocp.cluster_capacity_memory_byte_seconds,
-            aws.id AS aws_id,
-            aws.cost_entry_bill_id,
-            aws.cost_entry_product_id,
-            aws.cost_entry_pricing_id,
-            aws.cost_entry_reservation_id,
-            aws.line_item_type,
-            aws.usage_account_id,
-            aws.usage_start,
-            aws.usage_end,
-            aws.product_code,
-            aws.usage_type,
-            aws.operation,
-            aws.availability_zone,
-            aws.resource_id,
-            aws.usage_amount,
-            aws.normalization_factor,
-            aws.normalized_usage_amount,
-            aws.currency_code,
-            aws.unblended_rate,
-            aws.unblended_cost,
-            aws.blended_rate,
-            aws.blended_cost,
-            aws.public_on_demand_cost,
-            aws.public_on_demand_rate,
-            aws.tax_type,
-            aws.tags
-        FROM reporting_aws_tags as aws
-        JOIN reporting_ocp_pod_tags as ocp
+        SELECT 2, ocp.id, aws.id
+        FROM aws_tags_{uuid} as aws
+        JOIN ocp_pod_tags_{uuid} as ocp
             ON aws.key = ocp.key
                 AND aws.value = ocp.value
                 AND aws.usage_start::date = ocp.usage_start::date
-        LEFT JOIN reporting_ocp_aws_resource_id_matched AS rm
-            ON rm.aws_id = aws.id
-        WHERE date(aws.usage_start) >= '{start_date}'
-            AND date(aws.usage_start) <= '{end_date}'
-            AND rm.aws_id IS NULL
-    ),
-    cte_number_of_shared_projects AS (
-        SELECT aws_id,
-            count(DISTINCT namespace) as shared_projects
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    ),
-    cte_number_of_shared_pods AS (
-        SELECT aws_id,
-            count(DISTINCT pod) as shared_pods
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    )
-    SELECT tm.*,
-        tm.unblended_cost / spod.shared_pods as pod_cost,
-        sp.shared_projects,
-        spod.shared_pods
-    FROM cte_tag_matched AS tm
-    JOIN cte_number_of_shared_projects AS sp
-        ON tm.aws_id = sp.aws_id
-    JOIN cte_number_of_shared_pods AS spod
-        ON tm.aws_id = spod.aws_id
-)
-;
 
--- Next we match where the AWS tag is the special openshift_project key
--- and the value matches an OpenShift project name
-CREATE TEMPORARY TABLE reporting_ocp_aws_openshift_project_tag_matched AS (
-    WITH cte_tag_matched AS (
-        SELECT ocp.id AS ocp_id,
-            ocp.cluster_id,
-            ocp.cluster_alias,
-            ocp.namespace,
-            ocp.pod,
-            ocp.node,
-            ocp.pod_labels,
-            ocp.pod_usage_cpu_core_seconds,
-            ocp.pod_request_cpu_core_seconds,
-            ocp.pod_limit_cpu_core_seconds,
-            ocp.pod_usage_memory_byte_seconds,
-            ocp.pod_request_memory_byte_seconds,
-            ocp.node_capacity_cpu_cores,
-            ocp.node_capacity_cpu_core_seconds,
-            ocp.node_capacity_memory_bytes,
-            ocp.node_capacity_memory_byte_seconds,
-            ocp.cluster_capacity_cpu_core_seconds,
-            ocp.cluster_capacity_memory_byte_seconds,
-            aws.id AS aws_id,
-            aws.cost_entry_bill_id,
-            aws.cost_entry_product_id,
-            aws.cost_entry_pricing_id,
-            aws.cost_entry_reservation_id,
-            aws.line_item_type,
-            aws.usage_account_id,
-            aws.usage_start,
-            aws.usage_end,
-            aws.product_code,
-            aws.usage_type,
-            aws.operation,
-            aws.availability_zone,
-            aws.resource_id,
-            aws.usage_amount,
-            aws.normalization_factor,
-            aws.normalized_usage_amount,
-            aws.currency_code,
-            aws.unblended_rate,
-            aws.unblended_cost,
-            aws.blended_rate,
-            aws.blended_cost,
-            aws.public_on_demand_cost,
-            aws.public_on_demand_rate,
-            aws.tax_type,
-            aws.tags
-        FROM reporting_aws_tags as aws
-        JOIN reporting_ocp_pod_tags as ocp
+        UNION ALL
+
+        SELECT 3, ocp.id, aws.id
+        FROM aws_tags_{uuid} as aws
+        JOIN ocp_pod_tags_{uuid} as ocp
             ON aws.key = 'openshift_project' AND aws.value = ocp.namespace
                 AND aws.usage_start::date = ocp.usage_start::date
-        LEFT JOIN reporting_ocp_aws_resource_id_matched AS rm
-            ON rm.aws_id = aws.id
-        LEFT JOIN reporting_ocp_aws_direct_tag_matched AS dtm
-            ON dtm.aws_id = aws.id
-        WHERE date(aws.usage_start) >= '{start_date}'
-            AND date(aws.usage_start) <= '{end_date}'
-            AND rm.aws_id IS NULL
-            AND dtm.aws_id IS NULL
 
-    ),
-    cte_number_of_shared_projects AS (
-        SELECT aws_id,
-            count(DISTINCT namespace) as shared_projects
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    ),
-    cte_number_of_shared_pods AS (
-        SELECT aws_id,
-            count(DISTINCT pod) as shared_pods
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    )
-    SELECT tm.*,
-        tm.unblended_cost / spod.shared_pods as pod_cost,
-        sp.shared_projects,
-        spod.shared_pods
-    FROM cte_tag_matched AS tm
-    JOIN cte_number_of_shared_projects AS sp
-        ON tm.aws_id = sp.aws_id
-    JOIN cte_number_of_shared_pods AS spod
-        ON tm.aws_id = spod.aws_id
-)
-;
+        UNION ALL
 
--- Next we match where the AWS tag is the special openshift_node key
--- and the value matches an OpenShift node name
-CREATE TEMPORARY TABLE reporting_ocp_aws_openshift_node_tag_matched AS (
-    WITH cte_tag_matched AS (
-        SELECT ocp.id AS ocp_id,
-            ocp.cluster_id,
-            ocp.cluster_alias,
-            ocp.namespace,
-            ocp.pod,
-            ocp.node,
-            ocp.pod_labels,
-            ocp.pod_usage_cpu_core_seconds,
-            ocp.pod_request_cpu_core_seconds,
-            ocp.pod_limit_cpu_core_seconds,
-            ocp.pod_usage_memory_byte_seconds,
-            ocp.pod_request_memory_byte_seconds,
-            ocp.node_capacity_cpu_cores,
-            ocp.node_capacity_cpu_core_seconds,
-            ocp.node_capacity_memory_bytes,
-            ocp.node_capacity_memory_byte_seconds,
-            ocp.cluster_capacity_cpu_core_seconds,
-            ocp.cluster_capacity_memory_byte_seconds,
-            aws.id AS aws_id,
-            aws.cost_entry_bill_id,
-            aws.cost_entry_product_id,
-            aws.cost_entry_pricing_id,
-            aws.cost_entry_reservation_id,
-            aws.line_item_type,
-            aws.usage_account_id,
-            aws.usage_start,
-            aws.usage_end,
-            aws.product_code,
-            aws.usage_type,
-            aws.operation,
-            aws.availability_zone,
-            aws.resource_id,
-            aws.usage_amount,
-            aws.normalization_factor,
-            aws.normalized_usage_amount,
-            aws.currency_code,
-            aws.unblended_rate,
-            aws.unblended_cost,
-            aws.blended_rate,
-            aws.blended_cost,
-            aws.public_on_demand_cost,
-            aws.public_on_demand_rate,
-            aws.tax_type,
-            aws.tags
-        FROM reporting_aws_tags as aws
-        JOIN reporting_ocp_pod_tags as ocp
+        SELECT 4, ocp.id, aws.id
+        FROM aws_tags_{uuid} as aws
+        JOIN ocp_pod_tags_{uuid} as ocp
             ON aws.key = 'openshift_node' AND aws.value = ocp.node
                 AND aws.usage_start::date = ocp.usage_start::date
-        -- ANTI JOIN to remove rows that already matched
-        LEFT JOIN reporting_ocp_aws_resource_id_matched AS rm
-            ON rm.aws_id = aws.id
-        LEFT JOIN reporting_ocp_aws_direct_tag_matched AS dtm
-            ON dtm.aws_id = aws.id
-        LEFT JOIN reporting_ocp_aws_openshift_project_tag_matched as ptm
-            ON ptm.aws_id = aws.id
-        WHERE date(aws.usage_start) >= '{start_date}'
-            AND date(aws.usage_start) <= '{end_date}'
-            AND rm.aws_id IS NULL
-            AND dtm.aws_id IS NULL
-            AND ptm.aws_id IS NULL
-    ),
-    cte_number_of_shared_projects AS (
-        SELECT aws_id,
-            count(DISTINCT namespace) as shared_projects
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    ),
-    cte_number_of_shared_pods AS (
-        SELECT aws_id,
-            count(DISTINCT pod) as shared_pods
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    )
-    SELECT tm.*,
-        tm.unblended_cost / spod.shared_pods as pod_cost,
-        sp.shared_projects,
-        spod.shared_pods
-    FROM cte_tag_matched AS tm
-    JOIN cte_number_of_shared_projects AS sp
-        ON tm.aws_id = sp.aws_id
-    JOIN cte_number_of_shared_pods AS spod
-        ON tm.aws_id = spod.aws_id
-)
-;
-
--- Next we match where the AWS tag is the special openshift_cluster key
--- and the value matches an OpenShift cluster name
-CREATE TEMPORARY TABLE reporting_ocp_aws_openshift_cluster_tag_matched AS (
-    WITH cte_tag_matched AS (
-        SELECT ocp.id AS ocp_id,
-            ocp.cluster_id,
-            ocp.cluster_alias,
-            ocp.namespace,
-            ocp.pod,
-            ocp.node,
-            ocp.pod_labels,
-            ocp.pod_usage_cpu_core_seconds,
-            ocp.pod_request_cpu_core_seconds,
-            ocp.pod_limit_cpu_core_seconds,
-            ocp.pod_usage_memory_byte_seconds,
-            ocp.pod_request_memory_byte_seconds,
-            ocp.node_capacity_cpu_cores,
-            ocp.node_capacity_cpu_core_seconds,
-            ocp.node_capacity_memory_bytes,
-            ocp.node_capacity_memory_byte_seconds,
-            ocp.cluster_capacity_cpu_core_seconds,
-            ocp.cluster_capacity_memory_byte_seconds,
-            aws.id AS aws_id,
-            aws.cost_entry_bill_id,
-            aws.cost_entry_product_id,
-            aws.cost_entry_pricing_id,
-            aws.cost_entry_reservation_id,
-            aws.line_item_type,
-            aws.usage_account_id,
-            aws.usage_start,
-            aws.usage_end,
-            aws.product_code,
-            aws.usage_type,
-            aws.operation,
-            aws.availability_zone,
-            aws.resource_id,
-            aws.usage_amount,
-            aws.normalization_factor,
-            aws.normalized_usage_amount,
-            aws.currency_code,
-            aws.unblended_rate,
-            aws.unblended_cost,
-            aws.blended_rate,
-            aws.blended_cost,
-            aws.public_on_demand_cost,
-            aws.public_on_demand_rate,
-            aws.tax_type,
-            aws.tags
-        FROM reporting_aws_tags as aws
-        JOIN reporting_ocp_pod_tags as ocp
-            ON (aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_id
-                OR aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_alias)
-                AND aws.usage_start::date = ocp.usage_start::date
-        -- ANTI JOIN to remove rows that already matched
-        LEFT JOIN reporting_ocp_aws_resource_id_matched AS rm
-            ON rm.aws_id = aws.id
-        LEFT JOIN reporting_ocp_aws_direct_tag_matched AS dtm
-            ON dtm.aws_id = aws.id
-        LEFT JOIN reporting_ocp_aws_openshift_project_tag_matched as ptm
-            ON ptm.aws_id = aws.id
-        LEFT JOIN reporting_ocp_aws_openshift_node_tag_matched as ntm
-            ON ntm.aws_id = aws.id
-        WHERE date(aws.usage_start) >= '{start_date}'
-            AND date(aws.usage_start) <= '{end_date}'
-            AND rm.aws_id IS NULL
-            AND dtm.aws_id IS NULL
-            AND ptm.aws_id IS NULL
-            AND ntm.aws_id IS NULL
-    ),
-    cte_number_of_shared_projects AS (
-        SELECT aws_id,
-            count(DISTINCT namespace) as shared_projects
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    ),
-    cte_number_of_shared_pods AS (
-        SELECT aws_id,
-            count(DISTINCT pod) as shared_pods
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    )
-    SELECT tm.*,
-        tm.unblended_cost / spod.shared_pods as pod_cost,
-        sp.shared_projects,
-        spod.shared_pods
-    FROM cte_tag_matched AS tm
-    JOIN cte_number_of_shared_projects AS sp
-        ON tm.aws_id = sp.aws_id
-    JOIN cte_number_of_shared_pods AS spod
-        ON tm.aws_id = spod.aws_id
-)
-;
-
--- We UNION the various matches into a table holding all of the
--- OpenShift pod data matches for easier use.
-CREATE TEMPORARY TABLE reporting_ocpawsusagelineitem_daily_{uuid} AS (
-    SELECT *
-    FROM reporting_ocp_aws_resource_id_matched
-
-    UNION
 
-    SELECT *
-    FROM reporting_ocp_aws_direct_tag_matched
+        UNION ALL
 
-    UNION
-
-    SELECT *
-    FROM reporting_ocp_aws_openshift_project_tag_matched
-
-    UNION
+        SELECT 5, ocp.id, aws.id
+        FROM aws_tags_{uuid} as aws
+        JOIN ocp_pod_tags_{uuid} as ocp
+            ON aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_id
+                AND aws.usage_start::date = ocp.usage_start::date
 
-    SELECT *
-    FROM reporting_ocp_aws_openshift_node_tag_matched
+        UNION ALL
 
-    UNION
+        SELECT 5, ocp.id, aws.id
+        FROM aws_tags_{uuid} as aws
+        JOIN ocp_pod_tags_{uuid} as ocp
+            ON aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_alias
+                AND aws.usage_start::date = ocp.usage_start::date
+    )
+    SELECT DISTINCT c.match_priority,
+        c.ocp_id,
+        c.aws_id
+    FROM (
+        SELECT cc.*,
+            min(cc.match_priority) OVER (PARTITION BY cc.aws_id) as best_priority
+        FROM cte_candidates AS cc
+    ) AS c
+    WHERE c.match_priority = c.best_priority
+);
 
-    SELECT *
-    FROM reporting_ocp_aws_openshift_cluster_tag_matched
+-- The best matches are analyzed before they are joined back to the line
+-- items. The planner can not estimate the rows left by the priority filter
+-- and would otherwise rerun the shared counts for every match.
+ANALYZE ocp_aws_pod_matched_{uuid};
+
+CREATE TEMPORARY TABLE reporting_ocpawsusagelineitem_daily_{uuid} ON COMMIT DROP AS (
+    WITH cte_shared AS (
+        SELECT m.aws_id,
+            count(DISTINCT ocp.namespace) as shared_projects,
+            count(DISTINCT ocp.pod) as shared_pods
+        FROM ocp_aws_pod_matched_{uuid} AS m
+        JOIN reporting_ocpusagelineitem_daily as ocp
+            ON m.ocp_id = ocp.id
+        GROUP BY m.aws_id
+    )
+    SELECT ocp.id AS ocp_id,
+        ocp.cluster_id,
+        ocp.cluster_alias,
+        ocp.namespace,
+        ocp.pod,
+        ocp.node,
+        ocp.pod_labels,
+        ocp.pod_usage_cpu_core_seconds,
+        ocp.pod_request_cpu_core_seconds,
+        ocp.pod_limit_cpu_core_seconds,
+        ocp.pod_usage_memory_byte_seconds,
+        ocp.pod_request_memory_byte_seconds,
+        ocp.node_capacity_cpu_cores,
+        ocp.node_capacity_cpu_core_seconds,
+        ocp.node_capacity_memory_bytes,
+        ocp.node_capacity_memory_byte_seconds,
+        ocp.cluster_capacity_cpu_core_seconds,
+        ocp.cluster_capacity_memory_byte_seconds,
+        aws.id AS aws_id,
+        aws.cost_entry_bill_id,
+        aws.cost_entry_product_id,
+        aws.cost_entry_pricing_id,
+        aws.cost_entry_reservation_id,
+        aws.line_item_type,
+        aws.usage_account_id,
+        aws.usage_start,
+        aws.usage_end,
+        aws.product_code,
+        aws.usage_type,
+        aws.operation,
+        aws.availability_zone,
+        aws.resource_id,
+        aws.usage_amount,
+        aws.normalization_factor,
+        aws.normalized_usage_amount,
+        aws.currency_code,
+        aws.unblended_rate,
+        aws.unblended_cost,
+        aws.blended_rate,
+        aws.blended_cost,
+        aws.public_on_demand_cost,
+        aws.public_on_demand_rate,
+        aws.tax_type,
+        aws.tags,
+        CASE WHEN m.match_priority = 1
+            THEN (ocp.pod_usage_cpu_core_seconds / ocp.node_capacity_cpu_core_seconds) * aws.unblended_cost
+            ELSE aws.unblended_cost / sh.shared_pods
+        END as pod_cost,
+        sh.shared_projects,
+        sh.shared_pods
+    FROM ocp_aws_pod_matched_{uuid} AS m
+    JOIN reporting_ocpusagelineitem_daily as ocp
+        ON m.ocp_id = ocp.id
+    JOIN reporting_awscostentrylineitem_daily as aws
+        ON m.aws_id = aws.id
+    JOIN cte_shared AS sh
+        ON m.aws_id = sh.aws_id
 );
 
--- Then we match for OpenShift volume data where the volume label key and value
--- and AWS tag key and value match directly
-CREATE TEMPORARY TABLE reporting_ocp_aws_storage_direct_tag_matched AS (
-    WITH cte_tag_matched AS (
-        SELECT ocp.id AS ocp_id,
-            ocp.cluster_id,
-            ocp.cluster_alias,
-            ocp.namespace,
-            ocp.pod,
-            ocp.node,
-            ocp.persistentvolumeclaim,
-            ocp.persistentvolume,
-            ocp.storageclass,
-            ocp.persistentvolumeclaim_capacity_bytes,
-            ocp.persistentvolumeclaim_capacity_byte_seconds,
-            ocp.volume_request_storage_byte_seconds,
-            ocp.persistentvolumeclaim_usage_byte_seconds,
-            ocp.persistentvolume_labels,
-            ocp.persistentvolumeclaim_labels,
-            aws.id AS aws_id,
-            aws.cost_entry_bill_id,
-            aws.cost_entry_product_id,
-            aws.cost_entry_pricing_id,
-            aws.cost_entry_reservation_id,
-            aws.line_item_type,
-            aws.usage_account_id,
-            aws.usage_start,
-            aws.usage_end,
-            aws.product_code,
-            aws.usage_type,
-            aws.operation,
-            aws.availability_zone,
-            aws.resource_id,
-            aws.usage_amount,
-            aws.normalization_factor,
-            aws.normalized_usage_amount,
-            aws.currency_code,
-            aws.unblended_rate,
-            aws.unblended_cost,
-            aws.blended_rate,
-            aws.blended_cost,
-            aws.public_on_demand_cost,
-            aws.public_on_demand_rate,
-            aws.tax_type,
-            aws.tags
-        FROM reporting_aws_tags as aws
-        JOIN reporting_ocp_storage_tags as ocp
+-- OpenShift volume data is matched the same way, without a resource id match:
+--   1. The OpenShift volume label key and value match the AWS tag key and value
+--   2. The AWS openshift_project tag matches the OpenShift project name
+--   3. The AWS openshift_node tag matches the OpenShift node name
+--   4. The AWS openshift_cluster tag matches the cluster id or alias
+CREATE TEMPORARY TABLE ocp_aws_volume_matched_{uuid} ON COMMIT DROP AS (
+    WITH cte_candidates AS (
+        SELECT 1 as match_priority,
+            ocp.id AS ocp_id,
+            aws.id AS aws_id
+        FROM aws_tags_{uuid} as aws
+        JOIN ocp_storage_tags_{uuid} as ocp
             ON aws.key = ocp.key
                 AND aws.value = ocp.value
                 AND aws.usage_start::date = ocp.usage_start::date
-        WHERE date(aws.usage_start) >= '{start_date}'
-            AND date(aws.usage_start) <= '{end_date}'
-    ),
-    cte_number_of_shared_projects AS (
-        SELECT aws_id,
-            count(DISTINCT namespace) as shared_projects
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    ),
-    cte_number_of_shared_pods AS (
-        SELECT aws_id,
-            count(DISTINCT pod) as shared_pods
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    )
-    SELECT tm.*,
-        tm.unblended_cost / spod.shared_pods as pod_cost,
-        sp.shared_projects,
-        spod.shared_pods
-    FROM cte_tag_matched AS tm
-    JOIN cte_number_of_shared_projects AS sp
-        ON tm.aws_id = sp.aws_id
-    JOIN cte_number_of_shared_pods AS spod
-        ON tm.aws_id = spod.aws_id
-)
-;
 
--- Then we match where the AWS tag is the special openshift_project key
--- and the value matches an OpenShift project name
-CREATE TEMPORARY TABLE reporting_ocp_aws_storage_openshift_project_tag_matched AS (
-    WITH cte_tag_matched AS (
-        SELECT ocp.id AS ocp_id,
-            ocp.cluster_id,
-            ocp.cluster_alias,
-            ocp.namespace,
-            ocp.pod,
-            ocp.node,
-            ocp.persistentvolumeclaim,
-            ocp.persistentvolume,
-            ocp.storageclass,
-            ocp.persistentvolumeclaim_capacity_bytes,
-            ocp.persistentvolumeclaim_capacity_byte_seconds,
-            ocp.volume_request_storage_byte_seconds,
-            ocp.persistentvolumeclaim_usage_byte_seconds,
-            ocp.persistentvolume_labels,
-            ocp.persistentvolumeclaim_labels,
-            aws.id AS aws_id,
-            aws.cost_entry_bill_id,
-            aws.cost_entry_product_id,
-            aws.cost_entry_pricing_id,
-            aws.cost_entry_reservation_id,
-            aws.line_item_type,
-            aws.usage_account_id,
-            aws.usage_start,
-            aws.usage_end,
-            aws.product_code,
-            aws.usage_type,
-            aws.operation,
-            aws.availability_zone,
-            aws.resource_id,
-            aws.usage_amount,
-            aws.normalization_factor,
-            aws.normalized_usage_amount,
-            aws.currency_code,
-            aws.unblended_rate,
-            aws.unblended_cost,
-            aws.blended_rate,
-            aws.blended_cost,
-            aws.public_on_demand_cost,
-            aws.public_on_demand_rate,
-            aws.tax_type,
-            aws.tags
-        FROM reporting_aws_tags as aws
-        JOIN reporting_ocp_storage_tags as ocp
+        UNION ALL
+
+        SELECT 2, ocp.id, aws.id
+        FROM aws_tags_{uuid} as aws
+        JOIN ocp_storage_tags_{uuid} as ocp
             ON aws.key = 'openshift_project' AND aws.value = ocp.namespace
                 AND aws.usage_start::date = ocp.usage_start::date
-        LEFT JOIN reporting_ocp_aws_storage_direct_tag_matched AS dtm
-            ON dtm.aws_id = aws.id
-        WHERE date(aws.usage_start) >= '{start_date}'
-            AND date(aws.usage_start) <= '{end_date}'
-            AND dtm.aws_id IS NULL
 
-    ),
-    cte_number_of_shared_projects AS (
-        SELECT aws_id,
-            count(DISTINCT namespace) as shared_projects
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    ),
-    cte_number_of_shared_pods AS (
-        SELECT aws_id,
-            count(DISTINCT pod) as shared_pods
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    )
-    SELECT tm.*,
-        tm.unblended_cost / spod.shared_pods as pod_cost,
-        sp.shared_projects,
-        spod.shared_pods
-    FROM cte_tag_matched AS tm
-    JOIN cte_number_of_shared_projects AS sp
-        ON tm.aws_id = sp.aws_id
-    JOIN cte_number_of_shared_pods AS spod
-        ON tm.aws_id = spod.aws_id
-)
-;
+        UNION ALL
 
--- Next we match where the AWS tag is the special openshift_node key
--- and the value matches an OpenShift node name
-CREATE TEMPORARY TABLE reporting_ocp_aws_storage_openshift_node_tag_matched AS (
-    WITH cte_tag_matched AS (
-        SELECT ocp.id AS ocp_id,
-            ocp.cluster_id,
-            ocp.cluster_alias,
-            ocp.namespace,
-            ocp.pod,
-            ocp.node,
-            ocp.persistentvolumeclaim,
-            ocp.persistentvolume,
-            ocp.storageclass,
-            ocp.persistentvolumeclaim_capacity_bytes,
-            ocp.persistentvolumeclaim_capacity_byte_seconds,
-            ocp.volume_request_storage_byte_seconds,
-            ocp.persistentvolumeclaim_usage_byte_seconds,
-            ocp.persistentvolume_labels,
-            ocp.persistentvolumeclaim_labels,
-            aws.id AS aws_id,
-            aws.cost_entry_bill_id,
-            aws.cost_entry_product_id,
-            aws.cost_entry_pricing_id,
-            aws.cost_entry_reservation_id,
-            aws.line_item_type,
-            aws.usage_account_id,
-            aws.usage_start,
-            aws.usage_end,
-            aws.product_code,
-            aws.usage_type,
-            aws.operation,
-            aws.availability_zone,
-            aws.resource_id,
-            aws.usage_amount,
-            aws.normalization_factor,
-            aws.normalized_usage_amount,
-            aws.currency_code,
-            aws.unblended_rate,
-            aws.unblended_cost,
-            aws.blended_rate,
-            aws.blended_cost,
-            aws.public_on_demand_cost,
-            aws.public_on_demand_rate,
-            aws.tax_type,
-            aws.tags
-        FROM reporting_aws_tags as aws
-        JOIN reporting_ocp_storage_tags as ocp
+        SELECT 3, ocp.id, aws.id
+        FROM aws_tags_{uuid} as aws
+        JOIN ocp_storage_tags_{uuid} as ocp
             ON aws.key = 'openshift_node' AND aws.value = ocp.node
                 AND aws.usage_start::date = ocp.usage_start::date
-        -- ANTI JOIN to remove rows that already matched
-        LEFT JOIN reporting_ocp_aws_storage_direct_tag_matched AS dtm
-            ON dtm.aws_id = aws.id
-        LEFT JOIN reporting_ocp_aws_storage_openshift_project_tag_matched as ptm
-            ON ptm.aws_id = aws.id
-        WHERE date(aws.usage_start) >= '{start_date}'
-            AND date(aws.usage_start) <= '{end_date}'
-            AND dtm.aws_id IS NULL
-            AND ptm.aws_id IS NULL
-    ),
-    cte_number_of_shared_projects AS (
-        SELECT aws_id,
-            count(DISTINCT namespace) as shared_projects
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    ),
-    cte_number_of_shared_pods AS (
-        SELECT aws_id,
-            count(DISTINCT pod) as shared_pods
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    )
-    SELECT tm.*,
-        tm.unblended_cost / spod.shared_pods as pod_cost,
-        sp.shared_projects,
-        spod.shared_pods
-    FROM cte_tag_matched AS tm
-    JOIN cte_number_of_shared_projects AS sp
-        ON tm.aws_id = sp.aws_id
-    JOIN cte_number_of_shared_pods AS spod
-        ON tm.aws_id = spod.aws_id
-)
-;
-
--- Next we match where the AWS tag is the special openshift_cluster key
--- and the value matches an OpenShift cluster name
-CREATE TEMPORARY TABLE reporting_ocp_aws_storage_openshift_cluster_tag_matched AS (
-    WITH cte_tag_matched AS (
-        SELECT ocp.id AS ocp_id,
-            ocp.cluster_id,
-            ocp.cluster_alias,
-            ocp.namespace,
-            ocp.pod,
-            ocp.node,
-            ocp.persistentvolumeclaim,
-            ocp.persistentvolume,
-            ocp.storageclass,
-            ocp.persistentvolumeclaim_capacity_bytes,
-            ocp.persistentvolumeclaim_capacity_byte_seconds,
-            ocp.volume_request_storage_byte_seconds,
-            ocp.persistentvolumeclaim_usage_byte_seconds,
-            ocp.persistentvolume_labels,
-            ocp.persistentvolumeclaim_labels,
-            aws.id AS aws_id,
-            aws.cost_entry_bill_id,
-            aws.cost_entry_product_id,
-            aws.cost_entry_pricing_id,
-            aws.cost_entry_reservation_id,
-            aws.line_item_type,
-            aws.usage_account_id,
-            aws.usage_start,
-            aws.usage_end,
-            aws.product_code,
-            aws.usage_type,
-            aws.operation,
-            aws.availability_zone,
-            aws.resource_id,
-            aws.usage_amount,
-            aws.normalization_factor,
-            aws.normalized_usage_amount,
-            aws.currency_code,
-            aws.unblended_rate,
-            aws.unblended_cost,
-            aws.blended_rate,
-            aws.blended_cost,
-            aws.public_on_demand_cost,
-            aws.public_on_demand_rate,
-            aws.tax_type,
-            aws.tags
-        FROM reporting_aws_tags as aws
-        JOIN reporting_ocp_storage_tags as ocp
-            ON (aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_id
-                OR aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_alias)
-                AND aws.usage_start::date = ocp.usage_start::date
-        -- ANTI JOIN to remove rows that already matched
-        LEFT JOIN reporting_ocp_aws_storage_direct_tag_matched AS dtm
-            ON dtm.aws_id = aws.id
-        LEFT JOIN reporting_ocp_aws_storage_openshift_project_tag_matched as ptm
-            ON ptm.aws_id = aws.id
-        LEFT JOIN reporting_ocp_aws_storage_openshift_node_tag_matched as ntm
-            ON ntm.aws_id = aws.id
-        WHERE date(aws.usage_start) >= '{start_date}'
-            AND date(aws.usage_start) <= '{end_date}'
-            AND dtm.aws_id IS NULL
-            AND ptm.aws_id IS NULL
-            AND ntm.aws_id IS NULL
-    ),
-    cte_number_of_shared_projects AS (
-        SELECT aws_id,
-            count(DISTINCT namespace) as shared_projects
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    ),
-    cte_number_of_shared_pods AS (
-        SELECT aws_id,
-            count(DISTINCT pod) as shared_pods
-        FROM cte_tag_matched
-        GROUP BY aws_id
-    )
-    SELECT tm.*,
-        tm.unblended_cost / spod.shared_pods as pod_cost,
-        sp.shared_projects,
-        spod.shared_pods
-    FROM cte_tag_matched AS tm
-    JOIN cte_number_of_shared_projects AS sp
-        ON tm.aws_id = sp.aws_id
-    JOIN cte_number_of_shared_pods AS spod
-        ON tm.aws_id = spod.aws_id
-)
-;
-
--- We UNION the various matches into a table holding all of the
--- OpenShift volume data matches for easier use.
-CREATE TEMPORARY TABLE reporting_ocpawsstoragelineitem_daily_{uuid} AS (
-    SELECT *
-    FROM reporting_ocp_aws_storage_direct_tag_matched
 
-    UNION
-
-
-    SELECT *
-    FROM reporting_ocp_aws_storage_openshift_project_tag_matched
+        UNION ALL
 
-    UNION
+        SELECT 4, ocp.id, aws.id
+        FROM aws_tags_{uuid} as aws
+        JOIN ocp_storage_tags_{uuid} as ocp
+            ON aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_id
+                AND aws.usage_start::date = ocp.usage_start::date
 
-    SELECT *
-    FROM reporting_ocp_aws_storage_openshift_node_tag_matched
+        UNION ALL
 
-    UNION
+        SELECT 4, ocp.id, aws.id
+        FROM aws_tags_{uuid} as aws
+        JOIN ocp_storage_tags_{uuid} as ocp
+            ON aws.key = 'openshift_cluster' AND aws.value = ocp.cluster_alias
+                AND aws.usage_start::date = ocp.usage_start::date
+    )
+    SELECT DISTINCT c.match_priority,
+        c.ocp_id,
+        c.aws_id
+    FROM (
+        SELECT cc.*,
+            min(cc.match_priority) OVER (PARTITION BY cc.aws_id) as best_priority
+        FROM cte_candidates AS cc
+    ) AS c
+    WHERE c.match_priority = c.best_priority
+);
 
-    SELECT *
-    FROM reporting_ocp_aws_storage_openshift_cluster_tag_matched
+-- The best matches are analyzed before they are joined back to the line
+-- items. The planner can not estimate the rows left by the priority filter
+-- and would otherwise rerun the shared counts for every match.
+ANALYZE ocp_aws_volume_matched_{uuid};
+
+CREATE TEMPORARY TABLE reporting_ocpawsstoragelineitem_daily_{uuid} ON COMMIT DROP AS (
+    WITH cte_shared AS (
+        SELECT m.aws_id,
+            count(DISTINCT ocp.namespace) as shared_projects,
+            count(DISTINCT ocp.pod) as shared_pods
+        FROM ocp_aws_volume_matched_{uuid} AS m
+        JOIN reporting_ocpstoragelineitem_daily as ocp
+            ON m.ocp_id = ocp.id
+        GROUP BY m.aws_id
+    )
+    SELECT ocp.id AS ocp_id,
+        ocp.cluster_id,
+        ocp.cluster_alias,
+        ocp.namespace,
+        ocp.pod,
+        ocp.node,
+        ocp.persistentvolumeclaim,
+        ocp.persistentvolume,
+        ocp.storageclass,
+        ocp.persistentvolumeclaim_capacity_bytes,
+        ocp.persistentvolumeclaim_capacity_byte_seconds,
+        ocp.volume_request_storage_byte_seconds,
+        ocp.persistentvolumeclaim_usage_byte_seconds,
+        ocp.persistentvolume_labels,
+        ocp.persistentvolumeclaim_labels,
+        aws.id AS aws_id,
+        aws.cost_entry_bill_id,
+        aws.cost_entry_product_id,
+        aws.cost_entry_pricing_id,
+        aws.cost_entry_reservation_id,
+        aws.line_item_type,
+        aws.usage_account_id,
+        aws.usage_start,
+        aws.usage_end,
+        aws.product_code,
+        aws.usage_type,
+        aws.operation,
+        aws.availability_zone,
+        aws.resource_id,
+        aws.usage_amount,
+        aws.normalization_factor,
+        aws.normalized_usage_amount,
+        aws.currency_code,
+        aws.unblended_rate,
+        aws.unblended_cost,
+        aws.blended_rate,
+        aws.blended_cost,
+        aws.public_on_demand_cost,
+        aws.public_on_demand_rate,
+        aws.tax_type,
+        aws.tags,
+        aws.unblended_cost / sh.shared_pods as pod_cost,
+        sh.shared_projects,
+        sh.shared_pods
+    FROM ocp_aws_volume_matched_{uuid} AS m
+    JOIN reporting_ocpstoragelineitem_daily as ocp
+        ON m.ocp_id = ocp.id
+    JOIN reporting_awscostentrylineitem_daily as aws
+        ON m.aws_id = aws.id
+    JOIN cte_shared AS sh
+        ON m.aws_id = sh.aws_id
 );
 
 -- The full summary data for Openshift pod<->AWS and
@@ -872,7 +355,7 @@ CREATE TEMPORARY TABLE reporting_ocpawsstoragelineitem_daily_{uuid} AS (
 -- with a GROUP BY using the AWS ID to deduplicate
 -- the AWS data. This should ensure that we never double count
 -- AWS cost or usage.
-CREATE TEMPORARY TABLE reporting_ocpawscostlineitem_daily_summary_{uuid} AS (
+CREATE TEMPORARY TABLE reporting_ocpawscostlineitem_daily_summary_{uuid} ON COMMIT DROP AS (
     WITH cte_pod_project_cost AS (
         SELECT pc.aws_id,
             jsonb_object_agg(pc.namespace, pc.pod_cost) as project_costs
@@ -929,8 +412,8 @@ CREATE TEMPORARY TABLE reporting_ocpawscostlineitem_daily_summary_{uuid} AS (
         ON li.cost_entry_pricing_id = pr.id
     LEFT JOIN reporting_awsaccountalias AS aa
         ON li.usage_account_id = aa.account_id
-    WHERE date(li.usage_start) >= '{start_date}'
-        AND date(li.usage_start) <= '{end_date}'
+    WHERE li.usage_start >= %(start_date)s::date
+        AND li.usage_start < %(end_date)s::date + INTERVAL '1 day'
     -- Dedup on AWS line item so we never double count usage or cost
     GROUP BY li.aws_id, li.tags, pc.project_costs
 
@@ -970,8 +453,8 @@ CREATE TEMPORARY TABLE reporting_ocpawscostlineitem_daily_summary_{uuid} AS (
         ON li.usage_account_id = aa.account_id
     LEFT JOIN reporting_ocpawsusagelineitem_daily_{uuid} AS ulid
         ON ulid.aws_id = li.aws_id
-    WHERE date(li.usage_start) >= '{start_date}'
-        AND date(li.usage_start) <= '{end_date}'
+    WHERE li.usage_start >= %(start_date)s::date
+        AND li.usage_start < %(end_date)s::date + INTERVAL '1 day'
         AND ulid.aws_id IS NULL
     GROUP BY li.aws_id, li.tags, pc.project_costs
 )
@@ -985,7 +468,7 @@ CREATE TEMPORARY TABLE reporting_ocpawscostlineitem_daily_summary_{uuid} AS (
 -- point of view. Here usage and cost are divided by the
 -- number of pods sharing the cost so the values turn out the
 -- same when reported.
-CREATE TEMPORARY TABLE reporting_ocpawscostlineitem_project_daily_summary_{uuid} AS (
+CREATE TEMPORARY TABLE reporting_ocpawscostlineitem_project_daily_summary_{uuid} ON COMMIT DROP AS (
     SELECT li.cluster_id,
         li.cluster_alias,
         li.namespace,
@@ -1016,8 +499,8 @@ CREATE TEMPORARY TABLE reporting_ocpawscostlineitem_project_daily_summary_{uuid}
         ON li.cost_entry_pricing_id = pr.id
     LEFT JOIN reporting_awsaccountalias AS aa
         ON li.usage_account_id = aa.account_id
-    WHERE date(li.usage_start) >= '{start_date}'
-        AND date(li.usage_start) <= '{end_date}'
+    WHERE li.usage_start >= %(start_date)s::date
+        AND li.usage_start < %(end_date)s::date + INTERVAL '1 day'
     -- Grouping by OCP this time for the by project view
     GROUP BY li.ocp_id,
         li.cluster_id,
@@ -1062,8 +545,8 @@ CREATE TEMPORARY TABLE reporting_ocpawscostlineitem_project_daily_summary_{uuid}
         ON li.usage_account_id = aa.account_id
     LEFT JOIN reporting_ocpawsusagelineitem_daily_{uuid} AS ulid
         ON ulid.aws_id = li.aws_id
-    WHERE date(li.usage_start) >= '{start_date}'
-        AND date(li.usage_start) <= '{end_date}'
+    WHERE li.usage_start >= %(start_date)s::date
+        AND li.usage_start < %(end_date)s::date + INTERVAL '1 day'
         AND ulid.aws_id IS NULL
     GROUP BY li.ocp_id,
         li.cluster_id,
@@ -1079,8 +562,8 @@ CREATE TEMPORARY TABLE reporting_ocpawscostlineitem_project_daily_summary_{uuid}
 
 -- Clear out old entries first
 DELETE FROM reporting_ocpawscostlineitem_daily_summary
-WHERE date(usage_start) >= '{start_date}'
-    AND date(usage_start) <= '{end_date}'
+WHERE usage_start >= %(start_date)s::date
+    AND usage_start < %(end_date)s::date + INTERVAL '1 day'
     {aws_where_clause}
     {ocp_where_clause}
 ;
@@ -1138,8 +621,8 @@ INSERT INTO reporting_ocpawscostlineitem_daily_summary (
 ;
 
 DELETE FROM reporting_ocpawscostlineitem_project_daily_summary
-WHERE date(usage_start) >= '{start_date}'
-    AND date(usage_start) <= '{end_date}'
+WHERE usage_start >= %(start_date)s::date
+    AND usage_start < %(end_date)s::date + INTERVAL '1 day'
     {aws_where_clause}
     {ocp_where_clause}
 ;
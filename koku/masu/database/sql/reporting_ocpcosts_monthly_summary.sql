@@ -0,0 +1,59 @@
+-- Place our query in a temporary table
+CREATE TEMPORARY TABLE reporting_ocpcosts_monthly_summary_{uuid} ON COMMIT DROP AS (
+    SELECT cs.cluster_id,
+        cs.cluster_alias,
+        cs.namespace,
+        cs.node,
+        date_trunc('month', cs.usage_start) as usage_start,
+        max(cs.usage_end) as usage_end,
+        sum(cs.pod_charge_cpu_core_hours) as pod_charge_cpu_core_hours,
+        sum(cs.pod_charge_memory_gigabyte_hours) as pod_charge_memory_gigabyte_hours,
+        sum(cs.persistentvolumeclaim_charge_gb_month) as persistentvolumeclaim_charge_gb_month,
+        sum(cs.infra_cost) as infra_cost,
+        sum(cs.project_infra_cost) as project_infra_cost
+    FROM reporting_ocpcosts_summary AS cs
+    WHERE cs.usage_start >= date_trunc('month', %(start_date)s::date)
+        AND cs.usage_start < date_trunc('month', %(end_date)s::date) + interval '1 month'
+        AND cs.cluster_id = %(cluster_id)s
+    GROUP BY date_trunc('month', cs.usage_start),
+        cs.cluster_id,
+        cs.cluster_alias,
+        cs.namespace,
+        cs.node
+)
+;
+
+-- Clear out old entries first
+DELETE FROM reporting_ocpcosts_monthly_summary
+WHERE usage_start >= date_trunc('month', %(start_date)s::date)
+    AND usage_start < date_trunc('month', %(end_date)s::date) + interval '1 month'
+    AND cluster_id = %(cluster_id)s
+;
+
+-- Populate the monthly ocp costs summary table
+INSERT INTO reporting_ocpcosts_monthly_summary (
+    cluster_id,
+    cluster_alias,
+    namespace,
+    node,
+    usage_start,
+    usage_end,
+    pod_charge_cpu_core_hours,
+    pod_charge_memory_gigabyte_hours,
+    persistentvolumeclaim_charge_gb_month,
+    infra_cost,
+    project_infra_cost
+)
+    SELECT cluster_id,
+        cluster_alias,
+        namespace,
+        node,
+        usage_start,
+        usage_end,
+        pod_charge_cpu_core_hours,
+        pod_charge_memory_gigabyte_hours,
+        persistentvolumeclaim_charge_gb_month,
+        infra_cost,
+        project_infra_cost
+    FROM reporting_ocpcosts_monthly_summary_{uuid}
+;
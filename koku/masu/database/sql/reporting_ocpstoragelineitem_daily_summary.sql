@@ -1,4 +1,4 @@
-CREATE TEMPORARY TABLE reporting_ocpstoragelineitem_daily_summary_{uuid} AS (
+CREATE TEMPORARY TABLE reporting_ocpstoragelineitem_daily_summary_{uuid} ON COMMIT DROP AS (
     SELECT  li.cluster_id,
         li.cluster_alias,
         li.namespace,
@@ -26,17 +26,17 @@ CREATE TEMPORARY TABLE reporting_ocpstoragelineitem_daily_summary_{uuid} AS (
             extract(days FROM date_trunc('month', li.usage_start) + interval '1 month - 1 day')
             * POWER(2, -30) as persistentvolumeclaim_usage_gigabyte_months
     FROM reporting_ocpstoragelineitem_daily AS li
-    WHERE usage_start >= '{start_date}'
-        AND usage_start <= '{end_date}'
-        AND cluster_id = '{cluster_id}'
+    WHERE usage_start >= %(start_date)s
+        AND usage_start <= %(end_date)s
+        AND cluster_id = %(cluster_id)s
 )
 ;
 
 -- Clear out old entries first
 DELETE FROM reporting_ocpstoragelineitem_daily_summary
-WHERE usage_start >= '{start_date}'
-    AND usage_start <= '{end_date}'
-    AND cluster_id = '{cluster_id}'
+WHERE usage_start >= %(start_date)s
+    AND usage_start <= %(end_date)s
+    AND cluster_id = %(cluster_id)s
 ;
 
 -- Populate the daily aggregate line item data
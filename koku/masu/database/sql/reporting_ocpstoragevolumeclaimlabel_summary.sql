@@ -1,13 +1,38 @@
-INSERT INTO reporting_ocpstoragevolumeclaimlabel_summary
+-- Replace the label values of the processed range of the cluster
+DELETE FROM reporting_ocpstoragevolumeclaimlabel_summary
+WHERE usage_start >= %(start_date)s::date
+    AND usage_start < %(end_date)s::date + INTERVAL '1 day'
+    AND cluster_id = %(cluster_id)s
+;
+
+INSERT INTO reporting_ocpstoragevolumeclaimlabel_summary (
+    key,
+    values,
+    usage_start,
+    usage_end,
+    cluster_id,
+    namespace
+)
 SELECT l.key,
-    array_agg(DISTINCT l.value) as values
+    array_agg(DISTINCT l.value) as values,
+    l.usage_start,
+    l.usage_start as usage_end,
+    l.cluster_id,
+    l.namespace
 FROM (
     SELECT key,
-        value
+        value,
+        date(li.usage_start) as usage_start,
+        li.cluster_id,
+        li.namespace
     FROM reporting_ocpstoragelineitem_daily AS li,
         jsonb_each_text(li.persistentvolumeclaim_labels) labels
+    WHERE li.usage_start >= %(start_date)s::date
+        AND li.usage_start < %(end_date)s::date + INTERVAL '1 day'
+        AND li.cluster_id = %(cluster_id)s
 ) l
-GROUP BY l.key
-ON CONFLICT (key) DO UPDATE
-SET values = EXCLUDED.values
+GROUP BY l.key,
+    l.usage_start,
+    l.cluster_id,
+    l.namespace
 ;
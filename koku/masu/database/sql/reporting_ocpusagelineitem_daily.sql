@@ -1,5 +1,5 @@
--- Calculate cluster capacity at daily level
-CREATE TEMPORARY TABLE ocp_cluster_capacity_{uuid} AS (
+-- Calculate the capacity of the cluster being processed at daily level
+CREATE TEMPORARY TABLE ocp_cluster_capacity_{uuid} ON COMMIT DROP AS (
     SELECT cc.cluster_id,
         date(cc.interval_start) as usage_start,
         sum(cluster_capacity_cpu_core_seconds) as cluster_capacity_cpu_core_seconds,
@@ -14,8 +14,9 @@ CREATE TEMPORARY TABLE ocp_cluster_capacity_{uuid} AS (
             ON li.report_id = ur.id
         JOIN reporting_ocpusagereportperiod AS rp
             ON li.report_period_id = rp.id
-        WHERE date(ur.interval_start) >= '{start_date}'
-            AND date(ur.interval_start) <= '{end_date}'
+        WHERE ur.interval_start >= %(start_date)s::date
+            AND ur.interval_start < %(end_date)s::date + INTERVAL '1 day'
+            AND rp.cluster_id = %(cluster_id)s
         GROUP BY rp.cluster_id,
             ur.interval_start,
             li.node
@@ -24,17 +25,39 @@ CREATE TEMPORARY TABLE ocp_cluster_capacity_{uuid} AS (
             date(cc.interval_start)
 );
 
--- Calculate capacity of all clusters combined for a grand total
-CREATE TEMPORARY TABLE ocp_capacity_{uuid} AS (
-    SELECT cc.usage_start,
+-- Replace this cluster's entries in the per-cluster capacity rollup
+DELETE FROM reporting_ocpclustercapacity_daily
+WHERE usage_start >= %(start_date)s::date
+    AND usage_start < %(end_date)s::date + INTERVAL '1 day'
+    AND cluster_id = %(cluster_id)s
+;
+
+INSERT INTO reporting_ocpclustercapacity_daily (
+    cluster_id,
+    usage_start,
+    cluster_capacity_cpu_core_seconds,
+    cluster_capacity_memory_byte_seconds
+)
+    SELECT cluster_id,
+        usage_start,
+        cluster_capacity_cpu_core_seconds,
+        cluster_capacity_memory_byte_seconds
+    FROM ocp_cluster_capacity_{uuid}
+;
+
+-- Sum the rollup across all clusters for a grand total
+CREATE TEMPORARY TABLE ocp_capacity_{uuid} ON COMMIT DROP AS (
+    SELECT date(cc.usage_start) as usage_start,
         sum(cc.cluster_capacity_cpu_core_seconds) as total_capacity_cpu_core_seconds,
         sum(cc.cluster_capacity_memory_byte_seconds) as total_capacity_memory_byte_seconds
-    FROM ocp_cluster_capacity_{uuid} AS cc
-    GROUP BY cc.usage_start
+    FROM reporting_ocpclustercapacity_daily AS cc
+    WHERE cc.usage_start >= %(start_date)s::date
+        AND cc.usage_start < %(end_date)s::date + INTERVAL '1 day'
+    GROUP BY date(cc.usage_start)
 );
 
 -- Aggregate pod labels from hourly to daily level
-CREATE TEMPORARY TABLE ocp_daily_labels_{uuid} AS (
+CREATE TEMPORARY TABLE ocp_daily_labels_{uuid} ON COMMIT DROP AS (
     SELECT pl.cluster_id,
         pl.namespace,
         pl.pod,
@@ -61,9 +84,9 @@ CREATE TEMPORARY TABLE ocp_daily_labels_{uuid} AS (
             ON li.report_id = ur.id
         JOIN reporting_ocpusagereportperiod AS rp
             ON li.report_period_id = rp.id
-        WHERE date(ur.interval_start) >= '{start_date}'
-            AND date(ur.interval_start) <= '{end_date}'
-            AND rp.cluster_id = '{cluster_id}'
+        WHERE ur.interval_start >= %(start_date)s::date
+            AND ur.interval_start < %(end_date)s::date + INTERVAL '1 day'
+            AND rp.cluster_id = %(cluster_id)s
         GROUP BY rp.cluster_id,
             li.namespace,
             li.pod,
@@ -79,7 +102,7 @@ CREATE TEMPORARY TABLE ocp_daily_labels_{uuid} AS (
 ;
 
 -- Place our query in a temporary table
-CREATE TEMPORARY TABLE reporting_ocpusagelineitem_daily_{uuid} AS (
+CREATE TEMPORARY TABLE reporting_ocpusagelineitem_daily_{uuid} ON COMMIT DROP AS (
     SELECT  rp.cluster_id,
         coalesce(max(p.name), rp.cluster_id) as cluster_alias,
         date(ur.interval_start) as usage_start,
@@ -124,9 +147,9 @@ CREATE TEMPORARY TABLE reporting_ocpusagelineitem_daily_{uuid} AS (
             AND date(ur.interval_start) = dl.usage_start
     LEFT JOIN public.api_provider AS p
         ON rp.provider_id = p.id
-    WHERE date(ur.interval_start) >= '{start_date}'
-        AND date(ur.interval_start) <= '{end_date}'
-        AND rp.cluster_id = '{cluster_id}'
+    WHERE ur.interval_start >= %(start_date)s::date
+        AND ur.interval_start < %(end_date)s::date + INTERVAL '1 day'
+        AND rp.cluster_id = %(cluster_id)s
     GROUP BY rp.cluster_id,
         date(ur.interval_start),
         li.namespace,
@@ -138,9 +161,9 @@ CREATE TEMPORARY TABLE reporting_ocpusagelineitem_daily_{uuid} AS (
 
 -- Clear out old entries first
 DELETE FROM reporting_ocpusagelineitem_daily
-WHERE usage_start >= '{start_date}'
-    AND usage_start <= '{end_date}'
-    AND cluster_id = '{cluster_id}'
+WHERE usage_start >= %(start_date)s
+    AND usage_start <= %(end_date)s
+    AND cluster_id = %(cluster_id)s
 ;
 
 -- Populate the daily aggregate line item data
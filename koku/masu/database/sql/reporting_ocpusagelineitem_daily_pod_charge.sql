@@ -1,8 +1,49 @@
--- Calculate and update the OCP CPU and memory charge
-UPDATE reporting_ocpusagelineitem_daily_summary
-    SET pod_charge_cpu_core_hours = cpu_temp.charge,
-        pod_charge_memory_gigabyte_hours = mem_temp.charge
-FROM {cpu_temp} AS cpu_temp
-LEFT JOIN {mem_temp} AS mem_temp
-    ON cpu_temp.lineid = mem_temp.lineid
-WHERE id = mem_temp.lineid
+-- Apply the provider's tiered CPU and memory rates to the daily summary.
+-- The part of a line's usage between a tier's usage_start and usage_end is
+-- charged at the tier's rate. A null usage_start is 0 and a null usage_end
+-- leaves the tier unbounded. The usage and request charges are added.
+WITH cte_tiers AS (
+    SELECT r.metric,
+        coalesce(t.usage_start, 0) as usage_start,
+        t.usage_end,
+        t.value
+    FROM rates_rate AS r
+    JOIN rates_ratemap AS rm
+        ON r.id = rm.rate_id
+    CROSS JOIN LATERAL (
+        SELECT coalesce(tier->>'usage_start', tier->'usage'->>'usage_start')::numeric as usage_start,
+            coalesce(tier->>'usage_end', tier->'usage'->>'usage_end')::numeric as usage_end,
+            (tier->>'value')::numeric as value
+        FROM jsonb_array_elements(r.rates->'tiered_rate') AS tier
+    ) AS t
+    WHERE rm.provider_uuid = %(provider_uuid)s::uuid
+        AND r.metric IN (
+            'cpu_core_usage_per_hour',
+            'cpu_core_request_per_hour',
+            'memory_gb_usage_per_hour',
+            'memory_gb_request_per_hour'
+        )
+)
+UPDATE reporting_ocpusagelineitem_daily_summary AS li
+    SET pod_charge_cpu_core_hours = (
+            SELECT coalesce(sum(t.value * greatest(least(u.usage, coalesce(t.usage_end, u.usage)) - t.usage_start, 0)), 0)
+            FROM cte_tiers AS t
+            JOIN (
+                VALUES ('cpu_core_usage_per_hour', coalesce(li.pod_usage_cpu_core_hours, 0)),
+                    ('cpu_core_request_per_hour', coalesce(li.pod_request_cpu_core_hours, 0))
+            ) AS u (metric, usage)
+                ON t.metric = u.metric
+        ),
+        pod_charge_memory_gigabyte_hours = (
+            SELECT coalesce(sum(t.value * greatest(least(u.usage, coalesce(t.usage_end, u.usage)) - t.usage_start, 0)), 0)
+            FROM cte_tiers AS t
+            JOIN (
+                VALUES ('memory_gb_usage_per_hour', coalesce(li.pod_usage_memory_gigabyte_hours, 0)),
+                    ('memory_gb_request_per_hour', coalesce(li.pod_request_memory_gigabyte_hours, 0))
+            ) AS u (metric, usage)
+                ON t.metric = u.metric
+        )
+WHERE li.usage_start >= %(start_date)s::date
+    AND li.usage_start < %(end_date)s::date + INTERVAL '1 day'
+    AND li.cluster_id = %(cluster_id)s
+;
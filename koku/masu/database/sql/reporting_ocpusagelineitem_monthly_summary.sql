@@ -0,0 +1,109 @@
+-- Daily capacity is the same on every row for a cluster and day,
+-- so take it once per day before summing over the month
+CREATE TEMPORARY TABLE reporting_ocp_monthly_capacity_{uuid} ON COMMIT DROP AS (
+    SELECT date_trunc('month', daily.usage_start) as usage_start,
+        daily.cluster_id,
+        sum(daily.cluster_capacity_cpu_core_hours) as cluster_capacity_cpu_core_hours,
+        sum(daily.cluster_capacity_memory_gigabyte_hours) as cluster_capacity_memory_gigabyte_hours,
+        sum(daily.total_capacity_cpu_core_hours) as total_capacity_cpu_core_hours,
+        sum(daily.total_capacity_memory_gigabyte_hours) as total_capacity_memory_gigabyte_hours
+    FROM (
+        SELECT li.usage_start,
+            li.cluster_id,
+            max(li.cluster_capacity_cpu_core_hours) as cluster_capacity_cpu_core_hours,
+            max(li.cluster_capacity_memory_gigabyte_hours) as cluster_capacity_memory_gigabyte_hours,
+            max(li.total_capacity_cpu_core_hours) as total_capacity_cpu_core_hours,
+            max(li.total_capacity_memory_gigabyte_hours) as total_capacity_memory_gigabyte_hours
+        FROM reporting_ocpusagelineitem_daily_summary AS li
+        WHERE li.usage_start >= date_trunc('month', %(start_date)s::date)
+            AND li.usage_start < date_trunc('month', %(end_date)s::date) + interval '1 month'
+            AND li.cluster_id = %(cluster_id)s
+        GROUP BY li.usage_start, li.cluster_id
+    ) AS daily
+    GROUP BY date_trunc('month', daily.usage_start), daily.cluster_id
+)
+;
+
+-- Place our query in a temporary table
+CREATE TEMPORARY TABLE reporting_ocpusagelineitem_monthly_summary_{uuid} ON COMMIT DROP AS (
+    SELECT li.cluster_id,
+        li.cluster_alias,
+        li.namespace,
+        li.node,
+        date_trunc('month', li.usage_start) as usage_start,
+        max(li.usage_end) as usage_end,
+        sum(li.pod_usage_cpu_core_hours) as pod_usage_cpu_core_hours,
+        sum(li.pod_request_cpu_core_hours) as pod_request_cpu_core_hours,
+        sum(li.pod_limit_cpu_core_hours) as pod_limit_cpu_core_hours,
+        sum(li.pod_charge_cpu_core_hours) as pod_charge_cpu_core_hours,
+        sum(li.pod_usage_memory_gigabyte_hours) as pod_usage_memory_gigabyte_hours,
+        sum(li.pod_request_memory_gigabyte_hours) as pod_request_memory_gigabyte_hours,
+        sum(li.pod_limit_memory_gigabyte_hours) as pod_limit_memory_gigabyte_hours,
+        sum(li.pod_charge_memory_gigabyte_hours) as pod_charge_memory_gigabyte_hours,
+        max(cap.cluster_capacity_cpu_core_hours) as cluster_capacity_cpu_core_hours,
+        max(cap.cluster_capacity_memory_gigabyte_hours) as cluster_capacity_memory_gigabyte_hours,
+        max(cap.total_capacity_cpu_core_hours) as total_capacity_cpu_core_hours,
+        max(cap.total_capacity_memory_gigabyte_hours) as total_capacity_memory_gigabyte_hours
+    FROM reporting_ocpusagelineitem_daily_summary AS li
+    JOIN reporting_ocp_monthly_capacity_{uuid} AS cap
+        ON date_trunc('month', li.usage_start) = cap.usage_start
+            AND li.cluster_id = cap.cluster_id
+    WHERE li.usage_start >= date_trunc('month', %(start_date)s::date)
+        AND li.usage_start < date_trunc('month', %(end_date)s::date) + interval '1 month'
+        AND li.cluster_id = %(cluster_id)s
+    GROUP BY date_trunc('month', li.usage_start),
+        li.cluster_id,
+        li.cluster_alias,
+        li.namespace,
+        li.node
+)
+;
+
+-- Clear out old entries first
+DELETE FROM reporting_ocpusagelineitem_monthly_summary
+WHERE usage_start >= date_trunc('month', %(start_date)s::date)
+    AND usage_start < date_trunc('month', %(end_date)s::date) + interval '1 month'
+    AND cluster_id = %(cluster_id)s
+;
+
+-- Populate the monthly aggregate line item data
+INSERT INTO reporting_ocpusagelineitem_monthly_summary (
+    cluster_id,
+    cluster_alias,
+    namespace,
+    node,
+    usage_start,
+    usage_end,
+    pod_usage_cpu_core_hours,
+    pod_request_cpu_core_hours,
+    pod_limit_cpu_core_hours,
+    pod_charge_cpu_core_hours,
+    pod_usage_memory_gigabyte_hours,
+    pod_request_memory_gigabyte_hours,
+    pod_limit_memory_gigabyte_hours,
+    pod_charge_memory_gigabyte_hours,
+    cluster_capacity_cpu_core_hours,
+    cluster_capacity_memory_gigabyte_hours,
+    total_capacity_cpu_core_hours,
+    total_capacity_memory_gigabyte_hours
+)
+    SELECT cluster_id,
+        cluster_alias,
+        namespace,
+        node,
+        usage_start,
+        usage_end,
+        pod_usage_cpu_core_hours,
+        pod_request_cpu_core_hours,
+        pod_limit_cpu_core_hours,
+        pod_charge_cpu_core_hours,
+        pod_usage_memory_gigabyte_hours,
+        pod_request_memory_gigabyte_hours,
+        pod_limit_memory_gigabyte_hours,
+        pod_charge_memory_gigabyte_hours,
+        cluster_capacity_cpu_core_hours,
+        cluster_capacity_memory_gigabyte_hours,
+        total_capacity_cpu_core_hours,
+        total_capacity_memory_gigabyte_hours
+    FROM reporting_ocpusagelineitem_monthly_summary_{uuid}
+;
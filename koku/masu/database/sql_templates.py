@@ -0,0 +1,48 @@
+#
+# Copyright 2018 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Loading of the masu SQL templates."""
+
+import pkgutil
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def get_sql_template(file_name):
+    """Load a SQL template once per process.
+
+    Args:
+        file_name (str): The file name in masu/database/sql
+    Returns:
+        (str): The template text
+    """
+    return pkgutil.get_data('masu.database', f'sql/{file_name}').decode('utf-8')
+
+
+def render_sql(file_name, **identifiers):
+    """Return the SQL of a template with its identifiers substituted.
+
+    Only table names and constant SQL fragments are substituted. Values
+    such as dates, cluster and bill ids are bound as %(name)s query
+    parameters when the SQL is executed.
+
+    Args:
+        file_name (str): The file name in masu/database/sql
+        identifiers (str): The {name} substitutions of the template
+    Returns:
+        (str): The SQL text
+    """
+    return get_sql_template(file_name).format(**identifiers)
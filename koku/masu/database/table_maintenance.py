@@ -0,0 +1,91 @@
+#
+# Copyright 2018 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Deferred VACUUM and ANALYZE of tables changed by summary updates."""
+
+import logging
+import threading
+from collections import defaultdict
+
+LOG = logging.getLogger(__name__)
+
+# A table is vacuumed once its dead tuples exceed
+# VACUUM_THRESHOLD + VACUUM_SCALE_FACTOR * live tuples, like autovacuum
+VACUUM_THRESHOLD = 1000
+VACUUM_SCALE_FACTOR = 0.1
+
+TABLE_STATS_SQL = """
+    SELECT relname, n_live_tup, n_dead_tup
+    FROM pg_stat_user_tables
+    WHERE schemaname = %s
+        AND relname = ANY(%s)
+"""
+
+_DIRTY_TABLES = defaultdict(set)
+_DIRTY_TABLES_LOCK = threading.Lock()
+
+
+def mark_tables_dirty(schema, *tables):
+    """Record tables of a schema that need maintenance.
+
+    Args:
+        schema (str): The customer schema
+        tables (str): The changed table names
+    Returns:
+        None
+    """
+    with _DIRTY_TABLES_LOCK:
+        _DIRTY_TABLES[schema].update(tables)
+
+
+def pop_dirty_tables(schema):
+    """Return and forget the tables of a schema that need maintenance.
+
+    Args:
+        schema (str): The customer schema
+    Returns:
+        (set): The table names
+    """
+    with _DIRTY_TABLES_LOCK:
+        return _DIRTY_TABLES.pop(schema, set())
+
+
+def needs_vacuum(live_tuples, dead_tuples):
+    """Determine whether a table has enough dead tuples to vacuum."""
+    return dead_tuples > VACUUM_THRESHOLD + VACUUM_SCALE_FACTOR * live_tuples
+
+
+def get_maintenance_statements(cursor, schema, tables):
+    """Build the VACUUM ANALYZE or ANALYZE statement of each table.
+
+    Args:
+        cursor (psycopg2.extensions.cursor): A cursor on the database
+        schema (str): The customer schema
+        tables (set): The table names
+    Returns:
+        (list): SQL statements in table name order
+    """
+    cursor.execute(TABLE_STATS_SQL, [schema, sorted(tables)])
+    stats = {name: (live, dead) for name, live, dead in cursor.fetchall()}
+
+    statements = []
+    for table in sorted(tables):
+        live_tuples, dead_tuples = stats.get(table, (0, 0))
+        if needs_vacuum(live_tuples, dead_tuples):
+            statements.append(f'VACUUM ANALYZE {table}')
+        else:
+            statements.append(f'ANALYZE {table}')
+    return statements
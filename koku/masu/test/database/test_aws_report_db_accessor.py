@@ -19,8 +19,10 @@
 import calendar
 import datetime
 from decimal import Decimal, InvalidOperation
+import os
 import types
 import random
+import re
 import string
 import uuid
 from unittest.mock import patch
@@ -31,13 +33,16 @@ from sqlalchemy.orm.query import Query
 from sqlalchemy.sql import func
 
 
-from masu.database import AWS_CUR_TABLE_MAP
-from masu.database.report_db_accessor_base import ReportSchema
-from masu.database.aws_report_db_accessor import AWSReportDBAccessor
+from masu.database import AWS_CUR_TABLE_MAP, sql_templates
+from masu.database.report_db_accessor_base import CopyRowStream, ReportSchema
+from masu.database.aws_report_db_accessor import (AWSReportDBAccessor,
+                                                  populate_ocp_on_aws_cost_daily_summary_by_cluster)
 from masu.database.ocp_report_db_accessor import OCPReportDBAccessor
 from masu.database.provider_db_accessor import ProviderDBAccessor
 from masu.database.report_manifest_db_accessor import ReportManifestDBAccessor
+from masu.database.table_maintenance import pop_dirty_tables
 from masu.database.reporting_common_db_accessor import ReportingCommonDBAccessor
+from masu.database.sql_templates import render_sql
 from masu.external.date_accessor import DateAccessor
 from masu.util.ocp.common import get_cluster_id_from_provider
 from tests import MasuTestCase
@@ -149,7 +154,7 @@ class ReportDBAccessorTest(MasuTestCase):
         super().setUp()
         if self.accessor._conn.closed:
             self.accessor._conn = self.accessor._db.connect()
-        if self.accessor._pg2_conn.closed:
+        if not self.accessor._pg2_conn.is_valid:
             self.accessor._pg2_conn = self.accessor._get_psycopg2_connection()
         if self.accessor._cursor.closed:
             self.accessor._cursor = self.accessor._get_psycopg2_cursor()
@@ -196,7 +201,8 @@ class ReportDBAccessorTest(MasuTestCase):
         """Test the psycopg2 connection."""
         conn = self.accessor._get_psycopg2_connection()
 
-        self.assertIsInstance(conn, psycopg2.extensions.connection)
+        self.assertIsInstance(conn.connection, psycopg2.extensions.connection)
+        self.accessor.close_connections(conn)
 
     def test_get_psycopg2_cursor(self):
         """Test that a psycopg2 cursor is returned."""
@@ -339,24 +345,78 @@ class ReportDBAccessorTest(MasuTestCase):
         cursor.execute(drop_table)
         self.accessor._pg2_conn.commit()
 
+    def test_merge_temp_table_single_pass(self):
+        """Test that a merge inserts, updates and skips rows in one statement."""
+        table_name = 'test_table'
+        columns = ['test_column', 'invoice_id']
+        condition_column = columns[1]
+        conflict_columns = ['test_column']
+        cursor = self.accessor._cursor
+
+        cursor.execute(f'DROP TABLE IF EXISTS {table_name}')
+        cursor.execute(f'CREATE TABLE {table_name} (id serial primary key, test_column varchar(8) unique, '
+                       'invoice_id varchar(64))')
+        cursor.execute(f'INSERT INTO {table_name} (test_column, invoice_id) VALUES (\'1\', \'old\'), (\'2\', \'old\')')
+
+        temp_table_name = self.accessor.create_temp_table(table_name, drop_column='id')
+        cursor.execute(f'INSERT INTO {temp_table_name} (test_column, invoice_id) VALUES '
+                       '(\'1\', \'new\'), (\'2\', NULL), (\'3\', NULL), (\'3\', NULL)')
+
+        with patch('masu.database.report_db_accessor_base.LOG') as mock_log:
+            is_finalized = self.accessor.merge_temp_table(table_name, temp_table_name, columns,
+                                                          condition_column, conflict_columns)
+            mock_log.info.assert_called_with('Merged %s into %s: %s rows inserted, %s rows updated.',
+                                             temp_table_name, table_name, 1, 1)
+
+        self.assertTrue(is_finalized)
+        cursor.execute(f'SELECT test_column, invoice_id FROM {table_name} ORDER BY test_column')
+        self.assertEqual(cursor.fetchall(), [('1', 'new'), ('2', 'old'), ('3', None)])
+        cursor.execute(f'SELECT count(*) FROM {temp_table_name}')
+        self.assertEqual(cursor.fetchone()[0], 0)
+
+        cursor.execute(f'DROP TABLE {table_name}')
+        self.accessor._pg2_conn.commit()
+
     def test_close_connections_with_arg(self):
-        """Test that the passed in psycopg2 connection is closed."""
+        """Test that the passed in psycopg2 connection is returned to the pool."""
         conn = self.accessor._get_psycopg2_connection()
+        raw_conn = conn.connection
 
         self.accessor.close_connections(conn)
 
-        self.assertTrue(conn.closed)
+        self.assertFalse(conn.is_valid)
+        self.assertFalse(raw_conn.closed)
 
     def test_close_connections_default(self):
-        """Test that the accessor's psycopg2 connection is closed."""
+        """Test that the accessor's psycopg2 connection is returned to the pool."""
         self.accessor.close_connections()
 
         self.assertTrue(self.accessor._conn.closed)
-        self.assertTrue(self.accessor._pg2_conn.closed)
+        self.assertFalse(self.accessor._pg2_conn.is_valid)
         # Return the accessor's connection to its open state
         self.accessor._conn = self.accessor._db.connect()
         self.accessor._pg2_conn = self.accessor._get_psycopg2_connection()
 
+    def test_close_connections_drops_temp_tables(self):
+        """Test that temp tables do not outlive the accessor on its pooled connection."""
+        accessor = AWSReportDBAccessor(schema='acct10001', column_map=self.column_map)
+        temp_table_name = accessor.create_temp_table(random.choice(self.all_tables))
+        raw_conn = accessor._pg2_conn.connection
+        accessor.close_connections()
+        accessor.close_session()
+
+        with raw_conn.cursor() as cursor:
+            cursor.execute('SELECT to_regclass(%s)', [f'pg_temp.{temp_table_name}'])
+            self.assertIsNone(cursor.fetchone()[0])
+        raw_conn.rollback()
+
+    def test_sql_template_temp_tables_drop_on_commit(self):
+        """Test that the temp tables of every SQL template are dropped on commit."""
+        sql_dir = os.path.join(os.path.dirname(sql_templates.__file__), 'sql')
+        for file_name in os.listdir(sql_dir):
+            sql = render_sql(file_name, uuid='test', aws_where_clause='', ocp_where_clause='')
+            self.assertEqual(sql.count('CREATE TEMPORARY TABLE'), sql.count('ON COMMIT DROP'), file_name)
+
     def test_get_db_obj_query_default(self):
         """Test that a query is returned."""
         table_name = random.choice(self.all_tables)
@@ -423,6 +483,83 @@ class ReportDBAccessorTest(MasuTestCase):
                 value = self.creator.stringify_datetime(value)
             self.assertEqual(value, data_dict[column])
 
+    def test_stream_insert_rows(self):
+        """Test that rows from an iterator are copied in commit chunks."""
+        self.accessor.commit()
+
+        table_name = AWS_CUR_TABLE_MAP['line_item']
+        query = self.accessor._get_db_obj_query(table_name)
+        initial_count = query.count()
+        cost_entry = query.first()
+
+        def generate_rows(count):
+            for _ in range(count):
+                data_dict = self.creator.create_columns_for_table(table_name)
+                data_dict['cost_entry_bill_id'] = cost_entry.cost_entry_bill_id
+                data_dict['cost_entry_id'] = cost_entry.cost_entry_id
+                data_dict['cost_entry_product_id'] = cost_entry.cost_entry_product_id
+                data_dict['cost_entry_pricing_id'] = cost_entry.cost_entry_pricing_id
+                data_dict['cost_entry_reservation_id'] = cost_entry.cost_entry_reservation_id
+                yield tuple(data_dict.values())
+
+        columns = list(self.creator.create_columns_for_table(table_name).keys())
+        columns.extend(['cost_entry_bill_id', 'cost_entry_id', 'cost_entry_product_id',
+                        'cost_entry_pricing_id', 'cost_entry_reservation_id'])
+        with patch.object(self.accessor._pg2_conn, 'commit',
+                          wraps=self.accessor._pg2_conn.commit) as mock_commit:
+            row_count = self.accessor.stream_insert_rows(generate_rows(3), table_name, columns,
+                                                         commit_size=2)
+
+        self.assertEqual(row_count, 3)
+        self.assertEqual(mock_commit.call_count, 2)
+        self.assertEqual(query.count(), initial_count + 3)
+
+    def test_copy_row_stream(self):
+        """Test that rows are encoded in the COPY text format as they are read."""
+        rows = iter([('a\tb', None, 1), ('c\\d', {'key': 'value'}, Decimal('2.5'))])
+        stream = CopyRowStream(rows)
+
+        chunks = []
+        chunk = stream.read(4)
+        while chunk:
+            self.assertLessEqual(len(chunk), 4)
+            chunks.append(chunk)
+            chunk = stream.read(4)
+
+        self.assertEqual(b''.join(chunks),
+                         b'a\\tb\t\\N\t1\nc\\\\d\t{"key": "value"}\t2.5\n')
+        self.assertEqual(stream.row_count, 2)
+
+    def test_commit_and_vacuum_increments_data_version(self):
+        """Test that committing summary data increments the tenant data version."""
+        sql = 'SELECT data_version FROM public.api_tenant WHERE schema_name = %s'
+        self.accessor._cursor.execute(sql, [self.accessor.schema])
+        initial_version = self.accessor._cursor.fetchone()[0]
+
+        today = DateAccessor().today_with_timezone('UTC')
+        self.accessor.populate_tags_summary_table(today, today, ['0'])
+
+        self.accessor._cursor.execute(sql, [self.accessor.schema])
+        final_version = self.accessor._cursor.fetchone()[0]
+        self.assertEqual(final_version, initial_version + 1)
+
+    def test_commit_and_vacuum_defers_maintenance(self):
+        """Test that summary updates are analyzed once when maintenance runs."""
+        today = DateAccessor().today_with_timezone('UTC')
+        tags_summary_name = AWS_CUR_TABLE_MAP['tags_summary']
+        self.accessor.populate_tags_summary_table(today, today, ['0'])
+        self.accessor.populate_tags_summary_table(today, today, ['0'])
+
+        with patch.object(self.accessor._cursor, 'execute',
+                          wraps=self.accessor._cursor.execute) as mock_execute:
+            self.accessor.run_table_maintenance()
+            statements = [call[0][0] for call in mock_execute.call_args_list]
+
+        maintenance = [statement for statement in statements
+                       if statement.endswith(f'ANALYZE {tags_summary_name}')]
+        self.assertEqual(len(maintenance), 1)
+        self.assertEqual(pop_dirty_tables(self.accessor.schema), set())
+
     def test_create_db_object(self):
         """Test that a mapped database object is returned."""
         table = random.choice(self.all_tables)
@@ -537,6 +674,63 @@ class ReportDBAccessorTest(MasuTestCase):
             previous_count = count
             previous_row_id = row_id
 
+    def test_bulk_insert_on_conflict_do_nothing(self):
+        """Test that a bulk INSERT returns ids for new and existing rows."""
+        table_name = AWS_CUR_TABLE_MAP['product']
+        data = [self.creator.create_columns_for_table(table_name) for _ in range(3)]
+        query = self.accessor._get_db_obj_query(table_name)
+        initial_count = query.count()
+
+        row_ids = self.accessor.bulk_insert_on_conflict(
+            table_name,
+            [dict(row) for row in data[:2]],
+            conflict_columns=['sku'],
+            batch_size=1
+        )
+        self.assertEqual(query.count(), initial_count + 2)
+
+        row_ids_2 = self.accessor.bulk_insert_on_conflict(
+            table_name,
+            [dict(row) for row in data],
+            conflict_columns=['sku']
+        )
+        self.assertEqual(query.count(), initial_count + 3)
+        self.assertEqual(len(row_ids_2), 3)
+        for key, row_id in row_ids.items():
+            self.assertEqual(row_ids_2[key], row_id)
+        for row in data:
+            self.assertEqual(query.filter_by(id=row_ids_2[(row['sku'],)]).first().sku, row['sku'])
+
+    def test_bulk_insert_on_conflict_do_update(self):
+        """Test that a bulk INSERT updates the set columns of existing rows."""
+        table_name = AWS_CUR_TABLE_MAP['reservation']
+        data = [self.creator.create_columns_for_table(table_name) for _ in range(2)]
+        for row in data:
+            row['number_of_reservations'] = 1
+        query = self.accessor._get_db_obj_query(table_name)
+        initial_count = query.count()
+
+        row_ids = self.accessor.bulk_insert_on_conflict(
+            table_name,
+            [dict(row) for row in data],
+            conflict_columns=['reservation_arn'],
+            set_columns=['number_of_reservations']
+        )
+        for row in data:
+            row['number_of_reservations'] = 2
+        row_ids_2 = self.accessor.bulk_insert_on_conflict(
+            table_name,
+            [dict(row) for row in data],
+            conflict_columns=['reservation_arn'],
+            set_columns=['number_of_reservations']
+        )
+        self.accessor.commit()
+
+        self.assertEqual(query.count(), initial_count + 2)
+        self.assertEqual(row_ids, row_ids_2)
+        for row_id in row_ids_2.values():
+            self.assertEqual(query.filter_by(id=row_id).first().number_of_reservations, 2)
+
     def test_get_primary_key(self):
         """Test that a primary key is returned."""
         table_name = random.choice(self.foreign_key_tables)
@@ -592,6 +786,26 @@ class ReportDBAccessorTest(MasuTestCase):
                 value = self.creator.datetimeify_string(value)
             self.assertIsInstance(value, column_types[key])
 
+    def test_clean_rows(self):
+        """Test that a batch is cleaned and conversion failures are counted."""
+        table_name = AWS_CUR_TABLE_MAP['line_item']
+        column_types = self.report_schema.column_types[table_name]
+        decimal_column = [column for column, column_type in column_types.items()
+                          if column_type == Decimal][0]
+        rows = [{decimal_column: '1.5'}, {decimal_column: 'Not a Number'}, {decimal_column: ''}]
+
+        with patch('masu.database.report_db_accessor_base.LOG') as mock_log:
+            cleaned = self.accessor.clean_rows(rows, table_name)
+            mock_log.warning.assert_called_once_with(
+                '%s values for %s could not be converted.', 1, table_name
+            )
+
+        self.assertEqual(cleaned[0][decimal_column], Decimal('1.5'))
+        self.assertEqual(cleaned[0][decimal_column].as_tuple().exponent,
+                         Decimal(self.accessor.decimal_precision).as_tuple().exponent)
+        self.assertIsNone(cleaned[1][decimal_column])
+        self.assertIsNone(cleaned[2][decimal_column])
+
     def test_convert_value_decimal_invalid_operation(self):
         """Test that an InvalidOperation is raised and None is returned."""
         dec = Decimal('123342348239472398472309847230984723098427309')
@@ -889,6 +1103,73 @@ class ReportDBAccessorTest(MasuTestCase):
         self.assertEqual(set(sorted(possible_keys)), set(sorted(found_keys)))
         self.assertEqual(set(sorted(possible_values)), set(sorted(found_values)))
 
+    def test_populate_line_item_monthly_summary_table(self):
+        """Test that the monthly rollup of the daily summary is populated."""
+        ce_table_name = AWS_CUR_TABLE_MAP['cost_entry']
+        summary_table_name = AWS_CUR_TABLE_MAP['line_item_daily_summary']
+        monthly_table_name = AWS_CUR_TABLE_MAP['line_item_monthly_summary']
+
+        ce_table = getattr(self.accessor.report_schema, ce_table_name)
+        summary_table = getattr(self.accessor.report_schema, summary_table_name)
+        monthly_table = getattr(self.accessor.report_schema, monthly_table_name)
+
+        for _ in range(10):
+            bill = self.creator.create_cost_entry_bill()
+            cost_entry = self.creator.create_cost_entry(bill)
+            product = self.creator.create_cost_entry_product()
+            pricing = self.creator.create_cost_entry_pricing()
+            reservation = self.creator.create_cost_entry_reservation()
+            self.creator.create_cost_entry_line_item(
+                bill,
+                cost_entry,
+                product,
+                pricing,
+                reservation
+            )
+
+        bills = self.accessor.get_cost_entry_bills_query_by_provider(1)
+        bill_ids = [str(bill.id) for bill in bills.all()]
+
+        start_date, end_date = self.accessor._session.query(
+            func.min(ce_table.interval_start),
+            func.max(ce_table.interval_start)
+        ).first()
+
+        start_date = start_date.replace(hour=0, minute=0, second=0,
+                                        microsecond=0)
+        end_date = end_date.replace(hour=0, minute=0, second=0,
+                                    microsecond=0)
+
+        query = self.accessor._get_db_obj_query(monthly_table_name)
+        initial_count = query.count()
+        self.accessor.populate_line_item_daily_table(start_date, end_date, bill_ids)
+        # The rollup is rebuilt by the daily summary
+        self.accessor.populate_line_item_daily_summary_table(start_date,
+                                                              end_date,
+                                                              bill_ids)
+
+        self.assertNotEqual(query.count(), initial_count)
+
+        result_start_date = self.accessor._session.query(
+            func.min(monthly_table.usage_start)
+        ).scalar()
+        self.assertEqual(result_start_date, start_date.replace(day=1))
+
+        daily_cost = self.accessor._session.query(
+            func.sum(summary_table.unblended_cost)
+        ).scalar()
+        monthly_cost = self.accessor._session.query(
+            func.sum(monthly_table.unblended_cost)
+        ).scalar()
+        self.assertEqual(monthly_cost, daily_cost)
+
+        # Repopulating replaces the month rather than adding to it
+        count = query.count()
+        self.accessor.populate_line_item_monthly_summary_table(start_date,
+                                                                end_date,
+                                                                bill_ids)
+        self.assertEqual(query.count(), count)
+
     def test_populate_awstags_summary_table(self):
         """Test that the AWS tags summary table is populated."""
         bill_ids = []
@@ -929,7 +1210,7 @@ class ReportDBAccessorTest(MasuTestCase):
         self.accessor.populate_line_item_daily_summary_table(start_date,
                                                               end_date,
                                                               bill_ids)
-        self.accessor.populate_tags_summary_table()
+        self.accessor.populate_tags_summary_table(start_date, end_date, bill_ids)
 
         self.assertNotEqual(query.count(), initial_count)
         tags = query.all()
@@ -1016,3 +1297,103 @@ class ReportDBAccessorTest(MasuTestCase):
 
         self.assertEqual(sum_cost, sum_project_cost)
         self.assertLessEqual(sum_cost, sum_aws_cost)
+
+    def test_populate_ocp_on_aws_cost_daily_summary_scoped_to_cluster(self):
+        """Test that OCP data from other clusters is not matched to AWS data."""
+        summary_table_name = AWS_CUR_TABLE_MAP['ocp_on_aws_daily_summary']
+
+        today = DateAccessor().today_with_timezone('UTC')
+        resource_id = 'i-12345'
+        bill = self.creator.create_cost_entry_bill(today)
+        cost_entry = self.creator.create_cost_entry(bill, today)
+        product = self.creator.create_cost_entry_product('Compute Instance')
+        pricing = self.creator.create_cost_entry_pricing()
+        reservation = self.creator.create_cost_entry_reservation()
+        self.creator.create_cost_entry_line_item(
+            bill,
+            cost_entry,
+            product,
+            pricing,
+            reservation,
+            resource_id=resource_id
+        )
+        self.accessor.populate_line_item_daily_table(today, today, [str(bill.id)])
+
+        with OCPReportDBAccessor(self.test_schema, self.column_map) as ocp_accessor:
+            with ProviderDBAccessor(provider_uuid=self.ocp_test_provider_uuid) as provider_access:
+                provider_id = provider_access.get_provider().id
+            cluster_id = get_cluster_id_from_provider(self.ocp_test_provider_uuid)
+            period = self.creator.create_ocp_report_period(today, provider_id=provider_id, cluster_id=cluster_id)
+            report = self.creator.create_ocp_report(period, today)
+            self.creator.create_ocp_usage_line_item(period, report, resource_id=resource_id)
+            ocp_accessor.populate_line_item_daily_table(today, today, cluster_id)
+
+        query = self.accessor._get_db_obj_query(summary_table_name)
+
+        self.accessor.populate_ocp_on_aws_cost_daily_summary(today, today, cluster_id='othercluster',
+                                                             bill_ids=[bill.id])
+        self.assertEqual(query.filter_by(cluster_id=cluster_id).count(), 0)
+
+        self.accessor.populate_ocp_on_aws_cost_daily_summary(today, today, cluster_id=cluster_id,
+                                                             bill_ids=[bill.id])
+        self.assertNotEqual(query.filter_by(cluster_id=cluster_id).count(), 0)
+
+    def test_ocp_on_aws_summary_sql_indexes_temp_tables(self):
+        """Test that every temp table used for matching is indexed and analyzed."""
+        sql = render_sql(
+            'reporting_ocpawscostlineitem_daily_summary.sql',
+            uuid='test',
+            aws_where_clause='',
+            ocp_where_clause=''
+        )
+        temp_tables = re.findall(r'CREATE TEMPORARY TABLE (\w+(?:tags|matched)_test) ON COMMIT DROP AS', sql)
+        self.assertNotEqual(temp_tables, [])
+        for table in temp_tables:
+            if table.endswith('cluster_matched_test'):
+                # The last match of each chain is never anti-joined
+                continue
+            self.assertIn('CREATE INDEX ON {} '.format(table), sql)
+            self.assertIn('ANALYZE {};'.format(table), sql)
+
+    def test_ocp_on_aws_summary_sql_temp_tables_are_run_scoped(self):
+        """Test that every temp table is named per run and dropped on commit."""
+        sql = render_sql(
+            'reporting_ocpawscostlineitem_daily_summary.sql',
+            uuid='test',
+            aws_where_clause='',
+            ocp_where_clause=''
+        )
+        for table in re.findall(r'CREATE TEMPORARY TABLE (\w+)', sql):
+            self.assertTrue(table.endswith('_test'), table)
+        self.assertEqual(sql.count('CREATE TEMPORARY TABLE'), sql.count('ON COMMIT DROP'))
+
+    def test_populate_ocp_on_aws_cost_daily_summary_reuses_connection(self):
+        """Test that the summary can run repeatedly on one connection."""
+        today = DateAccessor().today_with_timezone('UTC')
+        self.accessor.populate_ocp_on_aws_cost_daily_summary(today, today)
+        self.accessor.populate_ocp_on_aws_cost_daily_summary(today, today)
+
+    @patch('masu.database.aws_report_db_accessor.AWSReportDBAccessor.populate_ocp_on_aws_cost_daily_summary')
+    def test_populate_ocp_on_aws_cost_daily_summary_by_cluster(self, mock_summary):
+        """Test that each cluster is summarized on its own accessor."""
+        today = DateAccessor().today_with_timezone('UTC')
+        cluster_ids = ['cluster-a', 'cluster-b', 'cluster-c']
+        populate_ocp_on_aws_cost_daily_summary_by_cluster(
+            self.test_schema, self.column_map, today, today, cluster_ids, bill_ids=[1]
+        )
+        called = sorted(call[1]['cluster_id'] for call in mock_summary.call_args_list)
+        self.assertEqual(called, cluster_ids)
+        for call in mock_summary.call_args_list:
+            self.assertEqual(call[1]['bill_ids'], [1])
+
+    @patch('masu.database.aws_report_db_accessor.AWSReportDBAccessor.populate_ocp_on_aws_cost_daily_summary')
+    def test_populate_ocp_on_aws_cost_daily_summary_by_cluster_error(self, mock_summary):
+        """Test that a failed cluster is raised after the others finish."""
+        today = DateAccessor().today_with_timezone('UTC')
+        error = psycopg2.OperationalError('failed')
+        mock_summary.side_effect = [None, error, None]
+        with self.assertRaises(psycopg2.OperationalError):
+            populate_ocp_on_aws_cost_daily_summary_by_cluster(
+                self.test_schema, self.column_map, today, today, ['a', 'b', 'c'], max_workers=1
+            )
+        self.assertEqual(mock_summary.call_count, 3)
@@ -0,0 +1,86 @@
+#
+# Copyright 2018 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Test the KokuDBAccess reflection cache."""
+from unittest.mock import patch
+
+from masu.database.customer_db_accessor import CustomerDBAccessor
+from masu.database.koku_database_access import KokuDBAccess, clear_reflection_cache
+from masu.database.ocp_report_db_accessor import OCPReportDBAccessor
+from masu.database.provider_db_accessor import ProviderDBAccessor
+from masu.database.reporting_common_db_accessor import ReportingCommonDBAccessor
+from tests import MasuTestCase
+
+
+class KokuDBAccessTest(MasuTestCase):
+    """Test Cases for the KokuDBAccess reflection cache."""
+
+    def setUp(self):
+        """Start each test without cached reflection."""
+        clear_reflection_cache()
+
+    def tearDown(self):
+        """Do not leak cached reflection to other tests."""
+        clear_reflection_cache()
+
+    def test_reflection_shared_per_schema(self):
+        """Test that accessors of a schema share the reflected classes."""
+        customer = CustomerDBAccessor('1')
+        provider = ProviderDBAccessor(provider_uuid=None)
+        self.assertIs(customer.get_base(), provider.get_base())
+        self.assertIs(customer.get_meta(), customer.get_base().metadata)
+        customer.close_session()
+        provider.close_session()
+
+    def test_clear_reflection_cache(self):
+        """Test that clearing the cache reflects the schema again."""
+        accessor = CustomerDBAccessor('1')
+        base = accessor.get_base()
+        accessor.close_session()
+
+        clear_reflection_cache('public')
+        accessor = CustomerDBAccessor('1')
+        self.assertIsNot(accessor.get_base(), base)
+        accessor.close_session()
+
+    def test_reflection_follows_migrations(self):
+        """Test that a schema is reflected again once it is migrated."""
+        accessor = CustomerDBAccessor('1')
+        base = accessor.get_base()
+        version = accessor._get_migration_version()
+        accessor.close_session()
+        self.assertIsNotNone(version)
+
+        with patch.object(KokuDBAccess, '_get_migration_version', return_value=version + 1):
+            accessor = CustomerDBAccessor('1')
+            migrated_base = accessor.get_base()
+            accessor.close_session()
+            self.assertIsNot(migrated_base, base)
+
+            accessor = CustomerDBAccessor('1')
+            self.assertIs(accessor.get_base(), migrated_base)
+            accessor.close_session()
+
+    def test_report_schema_shared(self):
+        """Test that report accessors reuse the report schema."""
+        column_map = ReportingCommonDBAccessor().column_map
+        first = OCPReportDBAccessor(schema='acct10001', column_map=column_map)
+        second = OCPReportDBAccessor(schema='acct10001', column_map=column_map)
+        self.assertIs(first.report_schema, second.report_schema)
+        first.close_connections()
+        second.close_connections()
+        first.close_session()
+        second.close_session()
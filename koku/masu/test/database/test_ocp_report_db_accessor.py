@@ -19,6 +19,8 @@
 from dateutil import relativedelta
 import datetime
 from decimal import Decimal, InvalidOperation
+import os
+import re
 import types
 import random
 import string
@@ -29,11 +31,13 @@ from sqlalchemy.orm.query import Query
 from sqlalchemy.sql import func
 
 
+import masu.database
 from masu.database import OCP_REPORT_TABLE_MAP
 from masu.database.report_db_accessor_base import ReportSchema
 from masu.database.ocp_report_db_accessor import OCPReportDBAccessor
 from masu.database.provider_db_accessor import ProviderDBAccessor
 from masu.database.reporting_common_db_accessor import ReportingCommonDBAccessor
+from masu.database.sql_templates import get_sql_template, render_sql
 from masu.external.date_accessor import DateAccessor
 from tests import MasuTestCase
 from tests.database.helpers import ReportObjectCreator
@@ -64,7 +68,7 @@ class OCPReportDBAccessorTest(MasuTestCase):
         super().setUp()
         if self.accessor._conn.closed:
             self.accessor._conn = self.accessor._db.connect()
-        if self.accessor._pg2_conn.closed:
+        if not self.accessor._pg2_conn.is_valid:
             self.accessor._pg2_conn = self.accessor._get_psycopg2_connection()
         if self.accessor._cursor.closed:
             self.accessor._cursor = self.accessor._get_psycopg2_cursor()
@@ -327,6 +331,44 @@ class OCPReportDBAccessorTest(MasuTestCase):
         for column in summary_columns:
             self.assertIsNotNone(getattr(entry, column))
 
+    def test_populate_line_item_daily_table_scopes_capacity_to_cluster(self):
+        """Test that capacity is computed per cluster and totaled from the rollup."""
+        daily_table_name = OCP_REPORT_TABLE_MAP['line_item_daily']
+        capacity_table_name = OCP_REPORT_TABLE_MAP['cluster_capacity_daily']
+        capacity_table = getattr(self.accessor.report_schema, capacity_table_name)
+
+        start_date = DateAccessor().today_with_timezone('UTC').replace(hour=0, minute=0, second=0,
+                                                                       microsecond=0)
+        cluster_ids = [self.cluster_id, 'othercluster']
+        for cluster_id in cluster_ids:
+            period = self.creator.create_ocp_report_period(start_date, provider_id=self.ocp_provider_id,
+                                                           cluster_id=cluster_id)
+            report = self.creator.create_ocp_report(period, start_date)
+            for _ in range(5):
+                self.creator.create_ocp_usage_line_item(period, report)
+
+        capacity_query = self.accessor._get_db_obj_query(capacity_table_name)
+
+        self.accessor.populate_line_item_daily_table(start_date, start_date, self.cluster_id)
+        self.assertEqual({row.cluster_id for row in capacity_query.all()}, {self.cluster_id})
+
+        self.accessor.populate_line_item_daily_table(start_date, start_date, 'othercluster')
+        self.assertEqual({row.cluster_id for row in capacity_query.all()}, set(cluster_ids))
+
+        total_cpu, total_memory = self.accessor._session.query(
+            func.sum(capacity_table.cluster_capacity_cpu_core_seconds),
+            func.sum(capacity_table.cluster_capacity_memory_byte_seconds)
+        ).first()
+
+        daily_query = self.accessor._get_db_obj_query(daily_table_name)
+        entry = daily_query.filter_by(cluster_id='othercluster').first()
+        self.assertEqual(entry.total_capacity_cpu_core_seconds, total_cpu)
+        self.assertEqual(entry.total_capacity_memory_byte_seconds, total_memory)
+
+        cluster_capacity = capacity_query.filter_by(cluster_id='othercluster').first()
+        self.assertEqual(entry.cluster_capacity_cpu_core_seconds,
+                         cluster_capacity.cluster_capacity_cpu_core_seconds)
+
     def test_populate_line_item_daily_summary_table(self):
         """Test that the line item daily summary table populates."""
         self.tearDown()
@@ -383,6 +425,153 @@ class OCPReportDBAccessorTest(MasuTestCase):
         for column in summary_columns:
             self.assertIsNotNone(getattr(entry, column))
 
+    def test_populate_pod_charge(self):
+        """Test that tiered CPU and memory rates are applied to the summary."""
+        self._populate_pod_summary()
+        summary_table_name = OCP_REPORT_TABLE_MAP['line_item_daily_summary']
+        summary_table = getattr(self.accessor.report_schema, summary_table_name)
+        start_date, end_date = self.accessor._session.query(
+            func.min(summary_table.usage_start),
+            func.max(summary_table.usage_start)
+        ).first()
+
+        self.accessor._get_db_obj_query(summary_table_name).update(
+            {
+                'pod_usage_cpu_core_hours': Decimal('3'),
+                'pod_request_cpu_core_hours': Decimal('2'),
+                'pod_usage_memory_gigabyte_hours': Decimal('4'),
+                'pod_request_memory_gigabyte_hours': Decimal('6'),
+            },
+            synchronize_session=False
+        )
+        self.accessor._session.commit()
+
+        rates = {
+            'cpu_core_usage_per_hour': [
+                {'usage_start': None, 'usage_end': '1', 'value': '2', 'unit': 'USD'},
+                {'usage_start': '1', 'usage_end': None, 'value': '0.5', 'unit': 'USD'}
+            ],
+            'cpu_core_request_per_hour': [
+                {'usage_start': None, 'usage_end': None, 'value': '1.5', 'unit': 'USD'}
+            ],
+            'memory_gb_usage_per_hour': [
+                {'usage_start': None, 'usage_end': None, 'value': '2.5', 'unit': 'USD'}
+            ],
+            'memory_gb_request_per_hour': [
+                {'usage': {'usage_start': None, 'usage_end': '5'}, 'value': '1', 'unit': 'USD'},
+                {'usage': {'usage_start': '5', 'usage_end': None}, 'value': '2', 'unit': 'USD'}
+            ]
+        }
+        for metric, tiers in rates.items():
+            self.creator.create_rate(metric, self.ocp_test_provider_uuid, {'tiered_rate': tiers})
+
+        self.accessor.populate_pod_charge(start_date, end_date, 'testcluster', self.ocp_test_provider_uuid)
+
+        # CPU: 1 * 2 + 2 * 0.5 usage and 2 * 1.5 request.
+        # Memory: 4 * 2.5 usage and 5 * 1 + 1 * 2 request.
+        query = self.accessor._get_db_obj_query(summary_table_name)
+        self.assertNotEqual(query.count(), 0)
+        for entry in query.all():
+            self.assertEqual(entry.pod_charge_cpu_core_hours, Decimal('6'))
+            self.assertEqual(entry.pod_charge_memory_gigabyte_hours, Decimal('17'))
+
+    def test_populate_storage_charge(self):
+        """Test that tiered storage rates are applied to the storage summary."""
+        self._populate_storage_summary()
+        summary_table_name = OCP_REPORT_TABLE_MAP['storage_line_item_daily_summary']
+        summary_table = getattr(self.accessor.report_schema, summary_table_name)
+        start_date, end_date = self.accessor._session.query(
+            func.min(summary_table.usage_start),
+            func.max(summary_table.usage_start)
+        ).first()
+
+        self.accessor._get_db_obj_query(summary_table_name).update(
+            {
+                'persistentvolumeclaim_usage_gigabyte_months': Decimal('12'),
+                'volume_request_storage_gigabyte_months': Decimal('3'),
+            },
+            synchronize_session=False
+        )
+        self.accessor._session.commit()
+
+        rates = {
+            'storage_gb_usage_per_month': [
+                {'usage_start': None, 'usage_end': '10', 'value': '1', 'unit': 'USD'},
+                {'usage_start': '10', 'usage_end': None, 'value': '0.1', 'unit': 'USD'}
+            ],
+            'storage_gb_request_per_month': [
+                {'usage': {'usage_start': None, 'usage_end': None}, 'value': '2', 'unit': 'USD'}
+            ]
+        }
+        for metric, tiers in rates.items():
+            self.creator.create_rate(metric, self.ocp_test_provider_uuid, {'tiered_rate': tiers})
+
+        self.accessor.populate_storage_charge(start_date, end_date, 'testcluster', self.ocp_test_provider_uuid)
+
+        # 10 * 1 + 2 * 0.1 usage and 3 * 2 request.
+        query = self.accessor._get_db_obj_query(summary_table_name)
+        self.assertNotEqual(query.count(), 0)
+        for entry in query.all():
+            self.assertEqual(entry.persistentvolumeclaim_charge_gb_month, Decimal('16.2'))
+
+    def test_populate_line_item_monthly_summary_table(self):
+        """Test that the monthly rollups of the daily summaries populate."""
+        self.tearDown()
+        report_table_name = OCP_REPORT_TABLE_MAP['report']
+        summary_table_name = OCP_REPORT_TABLE_MAP['line_item_daily_summary']
+        monthly_table_name = OCP_REPORT_TABLE_MAP['line_item_monthly_summary']
+        cost_monthly_table_name = OCP_REPORT_TABLE_MAP['cost_monthly_summary']
+
+        report_table = getattr(self.accessor.report_schema, report_table_name)
+        summary_table = getattr(self.accessor.report_schema, summary_table_name)
+        monthly_table = getattr(self.accessor.report_schema, monthly_table_name)
+
+        start_date = DateAccessor().today_with_timezone('UTC')
+
+        period = self.creator.create_ocp_report_period(start_date, provider_id=self.ocp_provider_id, cluster_id=self.cluster_id)
+        report = self.creator.create_ocp_report(period, start_date)
+        for _ in range(25):
+            self.creator.create_ocp_usage_line_item(period, report)
+
+        start_date, end_date = self.accessor._session.query(
+            func.min(report_table.interval_start),
+            func.max(report_table.interval_start)
+        ).first()
+
+        start_date = start_date.replace(hour=0, minute=0, second=0,
+                                        microsecond=0)
+        end_date = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        query = self.accessor._get_db_obj_query(monthly_table_name)
+        cost_query = self.accessor._get_db_obj_query(cost_monthly_table_name)
+        initial_count = query.count()
+        initial_cost_count = cost_query.count()
+
+        # The rollups are rebuilt by the daily summary and cost summary
+        self.accessor.populate_line_item_daily_table(start_date, end_date, self.cluster_id)
+        self.accessor.populate_line_item_daily_summary_table(start_date, end_date, self.cluster_id)
+        self.accessor.populate_cost_summary_table(self.cluster_id, start_date, end_date)
+
+        self.assertNotEqual(query.count(), initial_count)
+        self.assertNotEqual(cost_query.count(), initial_cost_count)
+
+        entry = query.first()
+        self.assertEqual(entry.usage_start, start_date.replace(day=1))
+        self.assertIsNotNone(entry.cluster_capacity_cpu_core_hours)
+
+        daily_usage = self.accessor._session.query(
+            func.sum(summary_table.pod_usage_cpu_core_hours)
+        ).scalar()
+        monthly_usage = self.accessor._session.query(
+            func.sum(monthly_table.pod_usage_cpu_core_hours)
+        ).scalar()
+        self.assertEqual(monthly_usage, daily_usage)
+
+        # Repopulating replaces the month rather than adding to it
+        count = query.count()
+        self.accessor.populate_line_item_monthly_summary_table(start_date, end_date, self.cluster_id)
+        self.assertEqual(query.count(), count)
+
     def test_populate_pod_label_summary_table(self):
         """Test that the pod label summary table is populated."""
         report_table_name = OCP_REPORT_TABLE_MAP['report']
@@ -414,12 +603,12 @@ class OCPReportDBAccessorTest(MasuTestCase):
         initial_count = query.count()
 
         self.accessor.populate_line_item_daily_table(start_date, end_date, self.cluster_id)
-        self.accessor.populate_pod_label_summary_table()
+        self.accessor.populate_pod_label_summary_table(start_date, end_date, self.cluster_id)
 
         self.assertNotEqual(query.count(), initial_count)
 
         tags = query.all()
-        tag_keys = [tag.key for tag in tags]
+        tag_keys = sorted({tag.key for tag in tags})
 
         self.accessor._cursor.execute(
             """SELECT DISTINCT jsonb_object_keys(pod_labels)
@@ -427,10 +616,49 @@ class OCPReportDBAccessorTest(MasuTestCase):
         )
 
         expected_tag_keys = self.accessor._cursor.fetchall()
-        expected_tag_keys = [tag[0] for tag in expected_tag_keys]
+        expected_tag_keys = sorted(tag[0] for tag in expected_tag_keys)
 
         self.assertEqual(tag_keys, expected_tag_keys)
 
+    def test_populate_pod_label_summary_table_replaces_range(self):
+        """Test that label rows of the processed range are rebuilt."""
+        agg_table_name = OCP_REPORT_TABLE_MAP['pod_label_summary']
+
+        today = DateAccessor().today_with_timezone('UTC')
+        last_month = today - relativedelta.relativedelta(months=1)
+
+        for start_date in (last_month, today):
+            period = self.creator.create_ocp_report_period(start_date)
+            report = self.creator.create_ocp_report(period, start_date)
+            self.creator.create_ocp_usage_line_item(
+                period,
+                report
+            )
+        self.accessor.populate_line_item_daily_table(last_month, today, self.cluster_id)
+
+        for start_date in (last_month, today):
+            self.accessor.populate_pod_label_summary_table(start_date, start_date, self.cluster_id)
+
+        self.accessor._cursor.execute(
+            """SELECT key, array_agg(DISTINCT value)
+                FROM reporting_ocpusagelineitem_daily,
+                    jsonb_each_text(pod_labels) labels
+                GROUP BY key"""
+        )
+        expected = {key: sorted(values) for key, values in self.accessor._cursor.fetchall()}
+
+        query = self.accessor._get_db_obj_query(agg_table_name)
+        result = {}
+        for tag in query.all():
+            result.setdefault(tag.key, set()).update(tag.values)
+        result = {key: sorted(values) for key, values in result.items()}
+        self.assertEqual(result, expected)
+
+        # Repopulating replaces the range rather than adding to it
+        count = query.count()
+        self.accessor.populate_pod_label_summary_table(last_month, today, self.cluster_id)
+        self.assertEqual(query.count(), count)
+
     def test_populate_volume_claim_label_summary_table(self):
         """Test that the volume claim summary table is populated."""
         report_table_name = OCP_REPORT_TABLE_MAP['report']
@@ -458,12 +686,13 @@ class OCPReportDBAccessorTest(MasuTestCase):
         initial_count = query.count()
 
         self.accessor.populate_storage_line_item_daily_table(start_date, end_date, self.cluster_id)
-        self.accessor.populate_volume_claim_label_summary_table()
+        self.accessor.populate_volume_claim_label_summary_table(start_date, end_date,
+                                                                self.cluster_id)
 
         self.assertNotEqual(query.count(), initial_count)
 
         tags = query.all()
-        tag_keys = [tag.key for tag in tags]
+        tag_keys = sorted({tag.key for tag in tags})
 
         self.accessor._cursor.execute(
             """SELECT DISTINCT jsonb_object_keys(persistentvolumeclaim_labels)
@@ -471,7 +700,7 @@ class OCPReportDBAccessorTest(MasuTestCase):
         )
 
         expected_tag_keys = self.accessor._cursor.fetchall()
-        expected_tag_keys = [tag[0] for tag in expected_tag_keys]
+        expected_tag_keys = sorted(tag[0] for tag in expected_tag_keys)
 
         self.assertEqual(tag_keys, expected_tag_keys)
 
@@ -502,12 +731,12 @@ class OCPReportDBAccessorTest(MasuTestCase):
         initial_count = query.count()
 
         self.accessor.populate_storage_line_item_daily_table(start_date, end_date, self.cluster_id)
-        self.accessor.populate_volume_label_summary_table()
+        self.accessor.populate_volume_label_summary_table(start_date, end_date, self.cluster_id)
 
         self.assertNotEqual(query.count(), initial_count)
 
         tags = query.all()
-        tag_keys = [tag.key for tag in tags]
+        tag_keys = sorted({tag.key for tag in tags})
 
         self.accessor._cursor.execute(
             """SELECT DISTINCT jsonb_object_keys(persistentvolume_labels)
@@ -515,10 +744,45 @@ class OCPReportDBAccessorTest(MasuTestCase):
         )
 
         expected_tag_keys = self.accessor._cursor.fetchall()
-        expected_tag_keys = [tag[0] for tag in expected_tag_keys]
+        expected_tag_keys = sorted(tag[0] for tag in expected_tag_keys)
 
         self.assertEqual(tag_keys, expected_tag_keys)
 
+    def test_summary_sql_date_predicates_are_sargable(self):
+        """Test that no summary SQL wraps a filtered timestamp column in date()."""
+        sql_dir = os.path.join(os.path.dirname(masu.database.__file__), 'sql')
+        for file_name in os.listdir(sql_dir):
+            sql = get_sql_template(file_name)
+            self.assertIsNone(re.search(r'date\([\w.]+\)\s*[<>]=?\s*%\(', sql), file_name)
+
+    def test_summary_sql_date_predicates_use_index(self):
+        """Test that the report interval range filter is answered by the index."""
+        today = DateAccessor().today_with_timezone('UTC')
+        period = self.creator.create_ocp_report_period(today)
+        cursor = self.accessor._cursor
+        cursor.execute(
+            """INSERT INTO reporting_ocpusagereport (report_period_id, interval_start, interval_end)
+                SELECT %(period_id)s, ts, ts + INTERVAL '1 hour'
+                FROM generate_series(%(today)s::timestamptz - INTERVAL '3 years',
+                                     %(today)s::timestamptz - INTERVAL '1 day',
+                                     INTERVAL '1 hour') AS ts
+                ON CONFLICT DO NOTHING""",
+            {'period_id': period.id, 'today': today}
+        )
+        cursor.execute('ANALYZE reporting_ocpusagereport')
+
+        sql = render_sql('reporting_ocpusagelineitem_daily.sql', uuid='explain')
+        predicate = re.search(r'WHERE (ur\.interval_start >= .*\n\s+AND ur\.interval_start < .*)\n', sql).group(1)
+        cursor.execute(
+            f'EXPLAIN SELECT ur.id FROM reporting_ocpusagereport AS ur WHERE {predicate}',
+            {'start_date': today.date(), 'end_date': today.date()}
+        )
+        plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.accessor._pg2_conn.rollback()
+
+        self.assertNotIn('Seq Scan', plan)
+        self.assertRegex(plan, r'Index Cond: .*interval_start')
+
     def test_get_usage_period_before_date(self):
         """Test that gets a query for usage report periods before a date."""
         table_name = OCP_REPORT_TABLE_MAP['report_period']
@@ -0,0 +1,44 @@
+#
+# Copyright 2018 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Test the SQL template loading."""
+import re
+
+from masu.database.sql_templates import get_sql_template, render_sql
+from tests import MasuTestCase
+
+
+class SQLTemplatesTest(MasuTestCase):
+    """Test Cases for the SQL templates."""
+
+    def test_get_sql_template_cached(self):
+        """Test that a template is loaded once."""
+        get_sql_template.cache_clear()
+        get_sql_template('reporting_ocpusagepodlabel_summary.sql')
+        get_sql_template('reporting_ocpusagepodlabel_summary.sql')
+        cache_info = get_sql_template.cache_info()
+        self.assertEqual(cache_info.misses, 1)
+        self.assertEqual(cache_info.hits, 1)
+
+    def test_render_sql_binds_values(self):
+        """Test that identifiers are substituted and values left as parameters."""
+        sql = render_sql('reporting_ocpusagelineitem_daily.sql', uuid='1234')
+
+        self.assertIn('1234', sql)
+        self.assertNotIn('{uuid}', sql)
+        self.assertEqual(set(re.findall(r'%\((\w+)\)s', sql)),
+                         {'start_date', 'end_date', 'cluster_id'})
+        self.assertNotIn("'{start_date}'", sql)
@@ -0,0 +1,59 @@
+#
+# Copyright 2018 Red Hat, Inc.
+#
+#    This program is free software: you can redistribute it and/or modify
+#    it under the terms of the GNU Affero General Public License as
+#    published by the Free Software Foundation, either version 3 of the
+#    License, or (at your option) any later version.
+#
+#    This program is distributed in the hope that it will be useful,
+#    but WITHOUT ANY WARRANTY; without even the implied warranty of
+#    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#    GNU Affero General Public License for more details.
+#
+#    You should have received a copy of the GNU Affero General Public License
+#    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""Test the deferred table maintenance."""
+from unittest.mock import Mock
+
+from masu.database.table_maintenance import (VACUUM_SCALE_FACTOR,
+                                             VACUUM_THRESHOLD,
+                                             get_maintenance_statements,
+                                             mark_tables_dirty,
+                                             needs_vacuum,
+                                             pop_dirty_tables)
+from tests import MasuTestCase
+
+
+class TableMaintenanceTest(MasuTestCase):
+    """Test Cases for the table maintenance helpers."""
+
+    def test_dirty_tables_coalesced(self):
+        """Test that tables marked repeatedly are maintained once."""
+        mark_tables_dirty('acct_test', 'table_a')
+        mark_tables_dirty('acct_test', 'table_a', 'table_b')
+        mark_tables_dirty('acct_other', 'table_c')
+
+        self.assertEqual(pop_dirty_tables('acct_test'), {'table_a', 'table_b'})
+        self.assertEqual(pop_dirty_tables('acct_test'), set())
+        self.assertEqual(pop_dirty_tables('acct_other'), {'table_c'})
+
+    def test_needs_vacuum(self):
+        """Test the dead tuple threshold."""
+        live_tuples = 100000
+        threshold = VACUUM_THRESHOLD + VACUUM_SCALE_FACTOR * live_tuples
+        self.assertFalse(needs_vacuum(live_tuples, threshold))
+        self.assertTrue(needs_vacuum(live_tuples, threshold + 1))
+
+    def test_get_maintenance_statements(self):
+        """Test that only tables past the threshold are vacuumed."""
+        cursor = Mock()
+        cursor.fetchall.return_value = [('table_a', 10, VACUUM_THRESHOLD + 2),
+                                        ('table_b', 10, 0)]
+
+        statements = get_maintenance_statements(cursor, 'acct_test',
+                                                {'table_b', 'table_a', 'table_c'})
+
+        self.assertEqual(statements, ['VACUUM ANALYZE table_a', 'ANALYZE table_b', 'ANALYZE table_c'])
+        self.assertEqual(cursor.execute.call_args[0][1], ['acct_test', ['table_a', 'table_b', 'table_c']])
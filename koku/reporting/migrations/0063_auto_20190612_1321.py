@@ -0,0 +1,112 @@
+# Generated by Django 2.2.1 on 2019-06-12 13:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0062_auto_20190604_1840'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AWSCostEntryLineItemMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField(null=True)),
+                ('usage_account_id', models.CharField(max_length=50)),
+                ('product_code', models.CharField(max_length=50)),
+                ('availability_zone', models.CharField(max_length=50, null=True)),
+                ('region', models.CharField(max_length=50, null=True)),
+                ('currency_code', models.CharField(max_length=10)),
+                ('unblended_cost', models.DecimalField(decimal_places=9, max_digits=17, null=True)),
+                ('account_alias', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='reporting.AWSAccountAlias')),
+                ('cost_entry_bill', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='reporting.AWSCostEntryBill')),
+            ],
+            options={
+                'db_table': 'reporting_awscostentrylineitem_monthly_summary',
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlyCostSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cluster_id', models.CharField(max_length=50, null=True)),
+                ('cluster_alias', models.CharField(max_length=256, null=True)),
+                ('namespace', models.CharField(max_length=253)),
+                ('node', models.CharField(max_length=253, null=True)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField()),
+                ('pod_charge_cpu_core_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('pod_charge_memory_gigabyte_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('persistentvolumeclaim_charge_gb_month', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('infra_cost', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('project_infra_cost', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+            ],
+            options={
+                'db_table': 'reporting_ocpcosts_monthly_summary',
+            },
+        ),
+        migrations.CreateModel(
+            name='OCPUsageLineItemMonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('cluster_id', models.CharField(max_length=50, null=True)),
+                ('cluster_alias', models.CharField(max_length=256, null=True)),
+                ('namespace', models.CharField(max_length=253)),
+                ('node', models.CharField(max_length=253)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField()),
+                ('pod_usage_cpu_core_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('pod_request_cpu_core_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('pod_limit_cpu_core_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('pod_charge_cpu_core_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('pod_usage_memory_gigabyte_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('pod_request_memory_gigabyte_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('pod_limit_memory_gigabyte_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('pod_charge_memory_gigabyte_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('cluster_capacity_cpu_core_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('cluster_capacity_memory_gigabyte_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('total_capacity_cpu_core_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('total_capacity_memory_gigabyte_hours', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+            ],
+            options={
+                'db_table': 'reporting_ocpusagelineitem_monthly_summary',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='awscostentrylineitemmonthlysummary',
+            index=models.Index(fields=['usage_start'], name='monthly_usage_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='awscostentrylineitemmonthlysummary',
+            index=models.Index(fields=['product_code'], name='monthly_product_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='awscostentrylineitemmonthlysummary',
+            index=models.Index(fields=['usage_account_id'], name='monthly_usage_account_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monthlycostsummary',
+            index=models.Index(fields=['usage_start'], name='monthly_ocpcosts_usage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='monthlycostsummary',
+            index=models.Index(fields=['namespace'], name='monthly_ocpcosts_namespace_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocpusagelineitemmonthlysummary',
+            index=models.Index(fields=['usage_start'], name='monthly_ocp_usage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocpusagelineitemmonthlysummary',
+            index=models.Index(fields=['namespace'], name='monthly_namespace_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocpusagelineitemmonthlysummary',
+            index=models.Index(fields=['node'], name='monthly_node_idx'),
+        ),
+    ]
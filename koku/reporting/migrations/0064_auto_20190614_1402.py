@@ -0,0 +1,190 @@
+# Generated by Django 2.2.1 on 2019-06-14 14:02
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0063_auto_20190612_1321'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='AWSTagsSummary',
+        ),
+        migrations.CreateModel(
+            name='AWSTagsSummary',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=253)),
+                ('values', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=253), size=None)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField()),
+                ('cost_entry_bill_id', models.IntegerField()),
+                ('usage_account_id', models.CharField(max_length=50)),
+                ('account_alias', models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='reporting.AWSAccountAlias')),
+            ],
+            options={
+                'db_table': 'reporting_awstags_summary',
+                'unique_together': {('key', 'usage_start', 'cost_entry_bill_id', 'usage_account_id')},
+            },
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO reporting_awstags_summary (
+                key, values, usage_start, usage_end, cost_entry_bill_id, usage_account_id, account_alias_id
+            )
+            SELECT l.key,
+                array_agg(DISTINCT l.value),
+                l.usage_start,
+                l.usage_start,
+                l.cost_entry_bill_id,
+                l.usage_account_id,
+                aa.id
+            FROM (
+                SELECT key,
+                    value,
+                    date(li.usage_start) as usage_start,
+                    li.cost_entry_bill_id,
+                    li.usage_account_id
+                FROM reporting_awscostentrylineitem_daily AS li,
+                    jsonb_each_text(li.tags) labels
+            ) l
+            LEFT JOIN reporting_awsaccountalias AS aa
+                ON l.usage_account_id = aa.account_id
+            GROUP BY l.key, l.usage_start, l.cost_entry_bill_id, l.usage_account_id, aa.id
+            """
+        ),
+        migrations.DeleteModel(
+            name='OCPUsagePodLabelSummary',
+        ),
+        migrations.CreateModel(
+            name='OCPUsagePodLabelSummary',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=253)),
+                ('values', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=253), size=None)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField()),
+                ('cluster_id', models.CharField(max_length=50)),
+                ('namespace', models.CharField(max_length=253)),
+            ],
+            options={
+                'db_table': 'reporting_ocpusagepodlabel_summary',
+                'unique_together': {('key', 'usage_start', 'cluster_id', 'namespace')},
+            },
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO reporting_ocpusagepodlabel_summary (
+                key, values, usage_start, usage_end, cluster_id, namespace
+            )
+            SELECT l.key,
+                array_agg(DISTINCT l.value),
+                l.usage_start,
+                l.usage_start,
+                l.cluster_id,
+                l.namespace
+            FROM (
+                SELECT key,
+                    value,
+                    date(li.usage_start) as usage_start,
+                    li.cluster_id,
+                    li.namespace
+                FROM reporting_ocpusagelineitem_daily AS li,
+                    jsonb_each_text(li.pod_labels) labels
+                WHERE li.cluster_id IS NOT NULL
+            ) l
+            GROUP BY l.key, l.usage_start, l.cluster_id, l.namespace
+            """
+        ),
+        migrations.DeleteModel(
+            name='OCPStorageVolumeClaimLabelSummary',
+        ),
+        migrations.CreateModel(
+            name='OCPStorageVolumeClaimLabelSummary',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=253)),
+                ('values', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=253), size=None)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField()),
+                ('cluster_id', models.CharField(max_length=50)),
+                ('namespace', models.CharField(max_length=253)),
+            ],
+            options={
+                'db_table': 'reporting_ocpstoragevolumeclaimlabel_summary',
+                'unique_together': {('key', 'usage_start', 'cluster_id', 'namespace')},
+            },
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO reporting_ocpstoragevolumeclaimlabel_summary (
+                key, values, usage_start, usage_end, cluster_id, namespace
+            )
+            SELECT l.key,
+                array_agg(DISTINCT l.value),
+                l.usage_start,
+                l.usage_start,
+                l.cluster_id,
+                l.namespace
+            FROM (
+                SELECT key,
+                    value,
+                    date(li.usage_start) as usage_start,
+                    li.cluster_id,
+                    li.namespace
+                FROM reporting_ocpstoragelineitem_daily AS li,
+                    jsonb_each_text(li.persistentvolumeclaim_labels) labels
+                WHERE li.cluster_id IS NOT NULL
+            ) l
+            GROUP BY l.key, l.usage_start, l.cluster_id, l.namespace
+            """
+        ),
+        migrations.DeleteModel(
+            name='OCPStorageVolumeLabelSummary',
+        ),
+        migrations.CreateModel(
+            name='OCPStorageVolumeLabelSummary',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=253)),
+                ('values', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=253), size=None)),
+                ('usage_start', models.DateTimeField()),
+                ('usage_end', models.DateTimeField()),
+                ('cluster_id', models.CharField(max_length=50)),
+                ('namespace', models.CharField(max_length=253)),
+            ],
+            options={
+                'db_table': 'reporting_ocpstoragevolumelabel_summary',
+                'unique_together': {('key', 'usage_start', 'cluster_id', 'namespace')},
+            },
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO reporting_ocpstoragevolumelabel_summary (
+                key, values, usage_start, usage_end, cluster_id, namespace
+            )
+            SELECT l.key,
+                array_agg(DISTINCT l.value),
+                l.usage_start,
+                l.usage_start,
+                l.cluster_id,
+                l.namespace
+            FROM (
+                SELECT key,
+                    value,
+                    date(li.usage_start) as usage_start,
+                    li.cluster_id,
+                    li.namespace
+                FROM reporting_ocpstoragelineitem_daily AS li,
+                    jsonb_each_text(li.persistentvolume_labels) labels
+                WHERE li.cluster_id IS NOT NULL
+            ) l
+            GROUP BY l.key, l.usage_start, l.cluster_id, l.namespace
+            """
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.1 on 2019-06-18 15:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0064_auto_20190614_1402'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OCPClusterCapacityDaily',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('cluster_id', models.CharField(max_length=50)),
+                ('usage_start', models.DateTimeField()),
+                ('cluster_capacity_cpu_core_seconds', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+                ('cluster_capacity_memory_byte_seconds', models.DecimalField(decimal_places=6, max_digits=24, null=True)),
+            ],
+            options={
+                'db_table': 'reporting_ocpclustercapacity_daily',
+                'unique_together': {('usage_start', 'cluster_id')},
+            },
+        ),
+        migrations.RunSQL(
+            """
+            INSERT INTO reporting_ocpclustercapacity_daily (
+                cluster_id,
+                usage_start,
+                cluster_capacity_cpu_core_seconds,
+                cluster_capacity_memory_byte_seconds
+            )
+            SELECT cluster_id,
+                usage_start,
+                max(cluster_capacity_cpu_core_seconds),
+                max(cluster_capacity_memory_byte_seconds)
+            FROM reporting_ocpusagelineitem_daily
+            WHERE cluster_id IS NOT NULL
+            GROUP BY cluster_id, usage_start
+            """
+        ),
+    ]
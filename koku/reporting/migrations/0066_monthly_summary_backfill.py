@@ -0,0 +1,130 @@
+# Generated by Django 2.2.1 on 2019-06-20 10:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0065_ocpclustercapacitydaily'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            """
+            DELETE FROM reporting_awscostentrylineitem_monthly_summary;
+
+            INSERT INTO reporting_awscostentrylineitem_monthly_summary (
+                cost_entry_bill_id, usage_start, usage_end, usage_account_id, account_alias_id,
+                product_code, availability_zone, region, currency_code, unblended_cost
+            )
+            SELECT li.cost_entry_bill_id,
+                date_trunc('month', li.usage_start),
+                max(li.usage_end),
+                li.usage_account_id,
+                li.account_alias_id,
+                li.product_code,
+                li.availability_zone,
+                li.region,
+                li.currency_code,
+                sum(li.unblended_cost)
+            FROM reporting_awscostentrylineitem_daily_summary AS li
+            GROUP BY li.cost_entry_bill_id,
+                date_trunc('month', li.usage_start),
+                li.usage_account_id,
+                li.account_alias_id,
+                li.product_code,
+                li.availability_zone,
+                li.region,
+                li.currency_code
+            """
+        ),
+        migrations.RunSQL(
+            """
+            DELETE FROM reporting_ocpusagelineitem_monthly_summary;
+
+            INSERT INTO reporting_ocpusagelineitem_monthly_summary (
+                cluster_id, cluster_alias, namespace, node, usage_start, usage_end,
+                pod_usage_cpu_core_hours, pod_request_cpu_core_hours, pod_limit_cpu_core_hours,
+                pod_charge_cpu_core_hours, pod_usage_memory_gigabyte_hours,
+                pod_request_memory_gigabyte_hours, pod_limit_memory_gigabyte_hours,
+                pod_charge_memory_gigabyte_hours, cluster_capacity_cpu_core_hours,
+                cluster_capacity_memory_gigabyte_hours, total_capacity_cpu_core_hours,
+                total_capacity_memory_gigabyte_hours
+            )
+            SELECT li.cluster_id,
+                li.cluster_alias,
+                li.namespace,
+                li.node,
+                date_trunc('month', li.usage_start),
+                max(li.usage_end),
+                sum(li.pod_usage_cpu_core_hours),
+                sum(li.pod_request_cpu_core_hours),
+                sum(li.pod_limit_cpu_core_hours),
+                sum(li.pod_charge_cpu_core_hours),
+                sum(li.pod_usage_memory_gigabyte_hours),
+                sum(li.pod_request_memory_gigabyte_hours),
+                sum(li.pod_limit_memory_gigabyte_hours),
+                sum(li.pod_charge_memory_gigabyte_hours),
+                max(cap.cluster_capacity_cpu_core_hours),
+                max(cap.cluster_capacity_memory_gigabyte_hours),
+                max(cap.total_capacity_cpu_core_hours),
+                max(cap.total_capacity_memory_gigabyte_hours)
+            FROM reporting_ocpusagelineitem_daily_summary AS li
+            JOIN (
+                SELECT date_trunc('month', daily.usage_start) AS usage_start,
+                    daily.cluster_id,
+                    sum(daily.cluster_capacity_cpu_core_hours) AS cluster_capacity_cpu_core_hours,
+                    sum(daily.cluster_capacity_memory_gigabyte_hours) AS cluster_capacity_memory_gigabyte_hours,
+                    sum(daily.total_capacity_cpu_core_hours) AS total_capacity_cpu_core_hours,
+                    sum(daily.total_capacity_memory_gigabyte_hours) AS total_capacity_memory_gigabyte_hours
+                FROM (
+                    SELECT usage_start,
+                        cluster_id,
+                        max(cluster_capacity_cpu_core_hours) AS cluster_capacity_cpu_core_hours,
+                        max(cluster_capacity_memory_gigabyte_hours) AS cluster_capacity_memory_gigabyte_hours,
+                        max(total_capacity_cpu_core_hours) AS total_capacity_cpu_core_hours,
+                        max(total_capacity_memory_gigabyte_hours) AS total_capacity_memory_gigabyte_hours
+                    FROM reporting_ocpusagelineitem_daily_summary
+                    GROUP BY usage_start, cluster_id
+                ) AS daily
+                GROUP BY date_trunc('month', daily.usage_start), daily.cluster_id
+            ) AS cap
+                ON date_trunc('month', li.usage_start) = cap.usage_start
+                    AND li.cluster_id = cap.cluster_id
+            GROUP BY date_trunc('month', li.usage_start),
+                li.cluster_id,
+                li.cluster_alias,
+                li.namespace,
+                li.node
+            """
+        ),
+        migrations.RunSQL(
+            """
+            DELETE FROM reporting_ocpcosts_monthly_summary;
+
+            INSERT INTO reporting_ocpcosts_monthly_summary (
+                cluster_id, cluster_alias, namespace, node, usage_start, usage_end,
+                pod_charge_cpu_core_hours, pod_charge_memory_gigabyte_hours,
+                persistentvolumeclaim_charge_gb_month, infra_cost, project_infra_cost
+            )
+            SELECT cs.cluster_id,
+                cs.cluster_alias,
+                cs.namespace,
+                cs.node,
+                date_trunc('month', cs.usage_start),
+                max(cs.usage_end),
+                sum(cs.pod_charge_cpu_core_hours),
+                sum(cs.pod_charge_memory_gigabyte_hours),
+                sum(cs.persistentvolumeclaim_charge_gb_month),
+                sum(cs.infra_cost),
+                sum(cs.project_infra_cost)
+            FROM reporting_ocpcosts_summary AS cs
+            GROUP BY date_trunc('month', cs.usage_start),
+                cs.cluster_id,
+                cs.cluster_alias,
+                cs.namespace,
+                cs.node
+            """
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.1 on 2019-06-21 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0066_monthly_summary_backfill'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ocpstoragelineitemdaily',
+            index=models.Index(fields=['usage_start'], name='ocp_storage_li_usage_start_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.1 on 2019-06-21 11:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reporting', '0067_ocpstoragelineitemdaily_usage_start_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='awstagssummary',
+            index=models.Index(fields=['usage_start', 'key'], name='aws_tags_usage_start_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocpusagepodlabelsummary',
+            index=models.Index(fields=['usage_start', 'key'], name='pod_label_usage_start_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocpstoragevolumelabelsummary',
+            index=models.Index(fields=['usage_start', 'key'], name='vol_label_usage_start_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ocpstoragevolumeclaimlabelsummary',
+            index=models.Index(fields=['usage_start', 'key'], name='pvc_label_usage_start_key_idx'),
+        ),
+    ]
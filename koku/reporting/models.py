@@ -24,16 +24,22 @@ from reporting.provider.aws.models import (AWSAccountAlias,                    #
                                            AWSCostEntryLineItem,               # noqa: F401
                                            AWSCostEntryLineItemDaily,          # noqa: F401
                                            AWSCostEntryLineItemDailySummary,   # noqa: F401
+                                           AWSCostEntryLineItemMonthlySummary,  # noqa: F401
                                            AWSCostEntryPricing,                # noqa: F401
                                            AWSCostEntryProduct,                # noqa: F401
-                                           AWSCostEntryReservation)            # noqa: F401
-from reporting.provider.ocp.costs.models import CostSummary                    # noqa: F401
-from reporting.provider.ocp.models import (OCPStorageLineItem,                 # noqa: F401
+                                           AWSCostEntryReservation,            # noqa: F401
+                                           AWSTagsSummary)                     # noqa: F401
+from reporting.provider.ocp.costs.models import CostSummary, MonthlyCostSummary  # noqa: F401
+from reporting.provider.ocp.models import (OCPClusterCapacityDaily,            # noqa: F401
+                                           OCPStorageLineItem,                 # noqa: F401
                                            OCPStorageLineItemDaily,            # noqa: F401
                                            OCPStorageLineItemDailySummary,     # noqa: F401
+                                           OCPStorageVolumeClaimLabelSummary,  # noqa: F401
+                                           OCPStorageVolumeLabelSummary,       # noqa: F401
                                            OCPUsageLineItem,                   # noqa: F401
                                            OCPUsageLineItemDaily,              # noqa: F401
                                            OCPUsageLineItemDailySummary,       # noqa: F401
+                                           OCPUsageLineItemMonthlySummary,     # noqa: F401
                                            OCPUsagePodLabelSummary,            # noqa: F401
                                            OCPUsageReport,                     # noqa: F401
                                            OCPUsageReportPeriod)               # noqa: F401
@@ -317,6 +317,56 @@ class AWSCostEntryLineItemDailySummary(models.Model):
     tags = JSONField(null=True)
 
 
+class AWSCostEntryLineItemMonthlySummary(models.Model):
+    """A monthly aggregation of the daily summary.
+
+    This table is aggregated by account, service, region and
+    availability zone and is used for monthly resolution cost reports.
+
+    """
+
+    class Meta:
+        """Meta for AWSCostEntryLineItemMonthlySummary."""
+
+        db_table = 'reporting_awscostentrylineitem_monthly_summary'
+
+        indexes = [
+            models.Index(
+                fields=['usage_start'],
+                name='monthly_usage_start_idx',
+            ),
+            models.Index(
+                fields=['product_code'],
+                name='monthly_product_code_idx',
+            ),
+            models.Index(
+                fields=['usage_account_id'],
+                name='monthly_usage_account_id_idx',
+            ),
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+
+    cost_entry_bill = models.ForeignKey('AWSCostEntryBill',
+                                        on_delete=models.PROTECT,
+                                        null=True)
+
+    # The following fields are used for grouping
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=True)
+    usage_account_id = models.CharField(max_length=50, null=False)
+    account_alias = models.ForeignKey('AWSAccountAlias',
+                                      on_delete=models.PROTECT,
+                                      null=True)
+    product_code = models.CharField(max_length=50, null=False)
+    availability_zone = models.CharField(max_length=50, null=True)
+    region = models.CharField(max_length=50, null=True)
+    # The following fields are aggregates
+    currency_code = models.CharField(max_length=10)
+    unblended_cost = models.DecimalField(max_digits=17, decimal_places=9,
+                                         null=True)
+
+
 class AWSCostEntryPricing(models.Model):
     """Pricing information for a cost entry line item."""
 
@@ -378,12 +428,31 @@ class AWSAccountAlias(models.Model):
 
 
 class AWSTagsSummary(models.Model):
-    """A collection of all current existing tag key and values."""
+    """A collection of all current existing tag key and values.
+
+    Values are kept per day, bill and usage account so tag listings can
+    be filtered by time scope and account.
+    """
 
     class Meta:
         """Meta for OCPUsageTagSummary."""
 
         db_table = 'reporting_awstags_summary'
+        unique_together = ('key', 'usage_start', 'cost_entry_bill_id', 'usage_account_id')
+        indexes = [
+            models.Index(
+                fields=['usage_start', 'key'],
+                name='aws_tags_usage_start_key_idx'
+            ),
+        ]
 
-    key = models.CharField(primary_key=True, max_length=253)
+    id = models.BigAutoField(primary_key=True)
+    key = models.CharField(max_length=253)
     values = ArrayField(models.CharField(max_length=253))
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=False)
+    # Not a foreign key so bills can be purged without touching the summary
+    cost_entry_bill_id = models.IntegerField(null=False)
+    usage_account_id = models.CharField(max_length=50, null=False)
+    account_alias = models.ForeignKey('AWSAccountAlias', on_delete=models.PROTECT,
+                                      null=True)
@@ -76,3 +76,72 @@ class CostSummary(models.Model):
     )
 
     pod_labels = JSONField(null=True)
+
+
+class MonthlyCostSummary(models.Model):
+    """A monthly aggregation of the OCP costs summary.
+
+    This table is aggregated by cluster, namespace and node and is
+    used for monthly resolution reports.
+
+    """
+
+    class Meta:
+        """Meta for MonthlyCostSummary."""
+
+        db_table = 'reporting_ocpcosts_monthly_summary'
+
+        indexes = [
+            models.Index(
+                fields=['usage_start'],
+                name='monthly_ocpcosts_usage_idx',
+            ),
+            models.Index(
+                fields=['namespace'],
+                name='monthly_ocpcosts_namespace_idx',
+            ),
+        ]
+
+    cluster_id = models.CharField(max_length=50, null=True)
+
+    cluster_alias = models.CharField(max_length=256, null=True)
+
+    # Kubernetes objects by convention have a max name length of 253 chars
+    namespace = models.CharField(max_length=253, null=False)
+
+    node = models.CharField(max_length=253, null=True)
+
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=False)
+
+    pod_charge_cpu_core_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    pod_charge_memory_gigabyte_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    persistentvolumeclaim_charge_gb_month = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    infra_cost = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    # This field is used in place of infrastructure_cost when
+    # grouping by project
+    project_infra_cost = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
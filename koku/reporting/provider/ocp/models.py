@@ -452,16 +452,179 @@ class OCPUsageLineItemDailySummary(models.Model):
     )
 
 
+class OCPUsageLineItemMonthlySummary(models.Model):
+    """A monthly aggregation of the daily summary.
+
+    This table is aggregated by cluster, namespace and node and is
+    used for monthly resolution reports.
+
+    """
+
+    class Meta:
+        """Meta for OCPUsageLineItemMonthlySummary."""
+
+        db_table = 'reporting_ocpusagelineitem_monthly_summary'
+
+        indexes = [
+            models.Index(
+                fields=['usage_start'],
+                name='monthly_ocp_usage_idx',
+            ),
+            models.Index(
+                fields=['namespace'],
+                name='monthly_namespace_idx',
+            ),
+            models.Index(
+                fields=['node'],
+                name='monthly_node_idx',
+            ),
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+
+    cluster_id = models.CharField(max_length=50, null=True)
+
+    cluster_alias = models.CharField(max_length=256, null=True)
+
+    # Kubernetes objects by convention have a max name length of 253 chars
+    namespace = models.CharField(max_length=253, null=False)
+
+    node = models.CharField(max_length=253, null=False)
+
+    # The first day of the month and the end of the latest day in the month
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=False)
+
+    pod_usage_cpu_core_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    pod_request_cpu_core_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    pod_limit_cpu_core_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    pod_charge_cpu_core_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    pod_usage_memory_gigabyte_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    pod_request_memory_gigabyte_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    pod_limit_memory_gigabyte_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    pod_charge_memory_gigabyte_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    # Capacity is the sum of the daily capacity over the month
+    cluster_capacity_cpu_core_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    cluster_capacity_memory_gigabyte_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    total_capacity_cpu_core_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    total_capacity_memory_gigabyte_hours = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+
 class OCPUsagePodLabelSummary(models.Model):
-    """A collection of all current existing tag key and values."""
+    """A collection of all current existing tag key and values.
+
+    Values are kept per day, cluster and namespace so that tag listings
+    can be filtered like the daily summary.
+    """
 
     class Meta:
         """Meta for OCPUsageTagSummary."""
 
         db_table = 'reporting_ocpusagepodlabel_summary'
+        unique_together = ('key', 'usage_start', 'cluster_id', 'namespace')
+        indexes = [
+            models.Index(
+                fields=['usage_start', 'key'],
+                name='pod_label_usage_start_key_idx'
+            ),
+        ]
 
-    key = models.CharField(primary_key=True, max_length=253)
+    id = models.BigAutoField(primary_key=True)
+    key = models.CharField(max_length=253)
     values = ArrayField(models.CharField(max_length=253))
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=False)
+    cluster_id = models.CharField(max_length=50, null=False)
+    namespace = models.CharField(max_length=253, null=False)
+
+
+class OCPClusterCapacityDaily(models.Model):
+    """The daily node capacity of each cluster.
+
+    Each cluster's row is replaced when that cluster is summarized, and the
+    total capacity across clusters is summed from this table.
+    """
+
+    class Meta:
+        """Meta for OCPClusterCapacityDaily."""
+
+        db_table = 'reporting_ocpclustercapacity_daily'
+        unique_together = ('usage_start', 'cluster_id')
+
+    id = models.BigAutoField(primary_key=True)
+    cluster_id = models.CharField(max_length=50, null=False)
+    usage_start = models.DateTimeField(null=False)
+
+    cluster_capacity_cpu_core_seconds = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
+
+    cluster_capacity_memory_byte_seconds = models.DecimalField(
+        max_digits=24,
+        decimal_places=6,
+        null=True
+    )
 
 
 class OCPStorageLineItem(models.Model):
@@ -530,6 +693,12 @@ class OCPStorageLineItemDaily(models.Model):
         """Meta for OCPUStorageLineItemDaily."""
 
         db_table = 'reporting_ocpstoragelineitem_daily'
+        indexes = [
+            models.Index(
+                fields=['usage_start'],
+                name='ocp_storage_li_usage_start_idx'
+            ),
+        ]
 
     id = models.BigAutoField(primary_key=True)
 
@@ -675,9 +844,21 @@ class OCPStorageVolumeLabelSummary(models.Model):
         """Meta for OCPStorageVolumeLabelSummary."""
 
         db_table = 'reporting_ocpstoragevolumelabel_summary'
+        unique_together = ('key', 'usage_start', 'cluster_id', 'namespace')
+        indexes = [
+            models.Index(
+                fields=['usage_start', 'key'],
+                name='vol_label_usage_start_key_idx'
+            ),
+        ]
 
-    key = models.CharField(primary_key=True, max_length=253)
+    id = models.BigAutoField(primary_key=True)
+    key = models.CharField(max_length=253)
     values = ArrayField(models.CharField(max_length=253))
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=False)
+    cluster_id = models.CharField(max_length=50, null=False)
+    namespace = models.CharField(max_length=253, null=False)
 
 
 class OCPStorageVolumeClaimLabelSummary(models.Model):
@@ -687,6 +868,18 @@ class OCPStorageVolumeClaimLabelSummary(models.Model):
         """Meta for OCPStorageVolumeClaimLabelSummary."""
 
         db_table = 'reporting_ocpstoragevolumeclaimlabel_summary'
+        unique_together = ('key', 'usage_start', 'cluster_id', 'namespace')
+        indexes = [
+            models.Index(
+                fields=['usage_start', 'key'],
+                name='pvc_label_usage_start_key_idx'
+            ),
+        ]
 
-    key = models.CharField(primary_key=True, max_length=253)
+    id = models.BigAutoField(primary_key=True)
+    key = models.CharField(max_length=253)
     values = ArrayField(models.CharField(max_length=253))
+    usage_start = models.DateTimeField(null=False)
+    usage_end = models.DateTimeField(null=False)
+    cluster_id = models.CharField(max_length=50, null=False)
+    namespace = models.CharField(max_length=253, null=False)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+#
+# Copyright 2019 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+This script benchmarks the OpenShift on AWS matching SQL on synthetic data.
+
+Synthetic AWS and OpenShift daily line items are generated in an existing,
+migrated tenant schema. The matching part of the OCP on AWS summary template,
+everything before the final summary tables, is then timed. All of the data is
+rolled back when the script finishes.
+
+An earlier revision of the template that binds its dates as query parameters
+can be timed against the current one:
+
+    git show <revision>:koku/masu/database/sql/reporting_ocpawscostlineitem_daily_summary.sql > /tmp/old.sql
+    ./benchmark_ocp_aws_matching.py --schema acct10001 --compare /tmp/old.sql
+
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+import uuid
+
+import psycopg2
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'koku', 'masu', 'database', 'sql',
+                        'reporting_ocpawscostlineitem_daily_summary.sql')
+SUMMARY_MARKER = '-- The full summary data for Openshift pod<->AWS and'
+
+CREATE_BILL_SQL = """
+    INSERT INTO reporting_awscostentrybill (billing_resource, bill_type, payer_account_id,
+                                            billing_period_start, billing_period_end)
+    VALUES ('aws', 'Anniversary', 'benchmark',
+            %(start_date)s::date, %(start_date)s::date + %(days)s)
+    RETURNING id
+"""
+
+CREATE_OCP_USAGE_SQL = """
+    INSERT INTO reporting_ocpusagelineitem_daily (
+        cluster_id, cluster_alias, namespace, pod, node, resource_id,
+        usage_start, usage_end, pod_usage_cpu_core_seconds, pod_request_cpu_core_seconds,
+        pod_limit_cpu_core_seconds, pod_usage_memory_byte_seconds, pod_request_memory_byte_seconds,
+        pod_limit_memory_byte_seconds, node_capacity_cpu_cores, node_capacity_cpu_core_seconds,
+        node_capacity_memory_bytes, node_capacity_memory_byte_seconds, cluster_capacity_cpu_core_seconds,
+        cluster_capacity_memory_byte_seconds, total_seconds, pod_labels
+    )
+    SELECT 'benchmark-' || c,
+        'Benchmark ' || c,
+        'project-' || p %% %(projects)s,
+        'pod-' || c || '-' || p,
+        'node-' || c || '-' || p %% %(nodes)s,
+        'i-' || c || '-' || p %% %(nodes)s,
+        d,
+        d,
+        random() * 3600, random() * 3600, random() * 3600,
+        random() * 1e9, random() * 1e9, random() * 1e9,
+        4, 345600, 16e9, 1382400e9, 345600 * %(nodes)s, 1382400e9 * %(nodes)s,
+        86400,
+        jsonb_build_object('app', 'app-' || p, 'environment', 'benchmark')
+    FROM generate_series(1, %(clusters)s) AS c,
+        generate_series(1, %(pods)s) AS p,
+        generate_series(%(start_date)s::date, %(start_date)s::date + %(days)s - 1, INTERVAL '1 day') AS d
+"""
+
+CREATE_OCP_STORAGE_SQL = """
+    INSERT INTO reporting_ocpstoragelineitem_daily (
+        cluster_id, cluster_alias, namespace, pod, node, persistentvolumeclaim, persistentvolume,
+        storageclass, usage_start, usage_end, persistentvolumeclaim_capacity_bytes,
+        persistentvolumeclaim_capacity_byte_seconds, volume_request_storage_byte_seconds,
+        persistentvolumeclaim_usage_byte_seconds, total_seconds,
+        persistentvolume_labels, persistentvolumeclaim_labels
+    )
+    SELECT cluster_id, cluster_alias, namespace, pod, node,
+        'pvc-' || pod, 'pv-' || pod, 'gp2', usage_start, usage_end,
+        1e10, 864e12, 864e12, random() * 864e12, 86400,
+        jsonb_build_object('volume', 'pv-' || pod),
+        pod_labels
+    FROM reporting_ocpusagelineitem_daily
+    WHERE cluster_id LIKE 'benchmark-%%'
+"""
+
+# Each AWS line item matches by resource id or by one of the tag kinds
+CREATE_AWS_SQL = """
+    INSERT INTO reporting_awscostentrylineitem_daily (
+        cost_entry_bill_id, line_item_type, usage_account_id, usage_start, usage_end,
+        product_code, resource_id, usage_amount, currency_code, unblended_rate, unblended_cost,
+        blended_rate, blended_cost, tags
+    )
+    SELECT %(bill_id)s,
+        'Usage',
+        'benchmark',
+        d,
+        d,
+        'AmazonEC2',
+        CASE WHEN i %% 5 = 0 THEN 'i-' || c || '-' || i %% %(nodes)s ELSE 'vol-' || i END,
+        1,
+        'USD',
+        1,
+        random(),
+        1,
+        random(),
+        CASE i %% 5
+            WHEN 0 THEN jsonb_build_object('environment', 'other')
+            WHEN 1 THEN jsonb_build_object('app', 'app-' || i %% %(pods)s, 'environment', 'benchmark')
+            WHEN 2 THEN jsonb_build_object('openshift_project', 'project-' || i %% %(projects)s)
+            WHEN 3 THEN jsonb_build_object('openshift_node', 'node-' || c || '-' || i %% %(nodes)s)
+            ELSE jsonb_build_object('openshift_cluster', 'benchmark-' || c)
+        END
+    FROM generate_series(1, %(clusters)s) AS c,
+        generate_series(1, %(aws_items)s) AS i,
+        generate_series(%(start_date)s::date, %(start_date)s::date + %(days)s - 1, INTERVAL '1 day') AS d
+"""
+
+
+def load_matching_sql(path):
+    """Return the matching statements of an OCP on AWS summary template."""
+    with open(path) as template:
+        sql = template.read()
+    return sql[:sql.index(SUMMARY_MARKER)]
+
+
+def create_data(cursor, args):
+    """Generate the synthetic AWS and OpenShift daily line items."""
+    params = vars(args).copy()
+    cursor.execute(CREATE_BILL_SQL, params)
+    params['bill_id'] = cursor.fetchone()[0]
+    for sql in (CREATE_OCP_USAGE_SQL, CREATE_OCP_STORAGE_SQL, CREATE_AWS_SQL):
+        cursor.execute(sql, params)
+    for table in ('reporting_ocpusagelineitem_daily', 'reporting_ocpstoragelineitem_daily',
+                  'reporting_awscostentrylineitem_daily'):
+        cursor.execute(f'ANALYZE {table}')
+
+
+def time_template(cursor, name, matching_sql, args):
+    """Time the matching statements of a template and print the results."""
+    run_uuid = uuid.uuid4().hex
+    sql = matching_sql.format(uuid=run_uuid, aws_where_clause='', ocp_where_clause='')
+    start_date = datetime.datetime.strptime(args.start_date, '%Y-%m-%d').date()
+    params = {'start_date': start_date,
+              'end_date': start_date + datetime.timedelta(days=args.days - 1)}
+
+    cursor.execute('SAVEPOINT benchmark')
+    started = time.perf_counter()
+    cursor.execute(sql, params)
+    elapsed = time.perf_counter() - started
+
+    counts = []
+    for table in ('reporting_ocpawsusagelineitem_daily', 'reporting_ocpawsstoragelineitem_daily'):
+        cursor.execute(f'SELECT count(*) FROM {table}_{run_uuid}')
+        counts.append(cursor.fetchone()[0])
+    cursor.execute('ROLLBACK TO SAVEPOINT benchmark')
+    print(f'{name:<10} {elapsed:>10.3f}s {counts[0]:>12} pod matches {counts[1]:>12} volume matches')
+    return elapsed
+
+
+def main():
+    """Generate the data and time each template."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dsn', default=os.environ.get('DATABASE_URL', ''),
+                        help='libpq connection string, defaults to DATABASE_URL')
+    parser.add_argument('--schema', required=True, help='A migrated tenant schema')
+    parser.add_argument('--start-date', default='2019-06-01')
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--clusters', type=int, default=2)
+    parser.add_argument('--pods', type=int, default=200)
+    parser.add_argument('--nodes', type=int, default=10)
+    parser.add_argument('--projects', type=int, default=20)
+    parser.add_argument('--aws-items', type=int, default=1000, help='AWS line items per cluster and day')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--compare', help='Another revision of the template to time')
+    args = parser.parse_args()
+
+    templates = [('current', load_matching_sql(TEMPLATE))]
+    if args.compare:
+        templates.append(('compare', load_matching_sql(args.compare)))
+
+    connection = psycopg2.connect(args.dsn)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f'SET search_path TO {args.schema}')
+        create_data(cursor, args)
+        best = {}
+        for _ in range(args.repeat):
+            for name, matching_sql in templates:
+                elapsed = time_template(cursor, name, matching_sql, args)
+                best[name] = min(elapsed, best.get(name, elapsed))
+        for name, elapsed in best.items():
+            print(f'best {name}: {elapsed:.3f}s')
+    finally:
+        connection.rollback()
+        connection.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+#
+# Copyright 2019 Red Hat, Inc.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+"""
+This script benchmarks the shaping of grouped report rows.
+
+Synthetic OpenShift CPU report rows are shaped into the nested response by
+shape_report_data and by the order_by, _apply_group_by and _transform_data
+methods of the report query handler. No database is used, but the Django
+settings must be importable:
+
+    DJANGO_SETTINGS_MODULE=koku.settings ./benchmark_report_shaping.py --rows 100000
+
+"""
+
+import argparse
+import copy
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'koku'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'koku.settings')
+
+import django  # noqa: E402 pylint: disable=wrong-import-position
+
+django.setup()
+
+from api.report.ocp.ocp_query_handler import OCPReportQueryHandler  # noqa: E402 pylint: disable=wrong-import-position
+from api.report.shaping import compile_packer, shape_report_data  # noqa: E402 pylint: disable=wrong-import-position
+
+GROUP_BY = ['project', 'node']
+ORDER_FIELDS = ['-date', '-cost']
+
+
+def make_rows(dates, args):
+    """Create report rows with a unique group key per date."""
+    generator = random.Random(args.seed)
+    keys = [(f'project_{project}', f'node_{node}' if node else None)
+            for project in range(args.projects) for node in range(args.nodes)]
+    rows = []
+    for index in range(args.rows):
+        date = dates[index % len(dates)]
+        project, node = keys[(index // len(dates)) % len(keys)]
+        rows.append({
+            'date': date,
+            'project': project,
+            'node': node,
+            'usage': Decimal(generator.randint(0, 1000)),
+            'cost': Decimal(generator.randint(0, 1000)),
+            'usage_units': 'Core-Hours',
+            'cost_units': 'USD',
+        })
+    return rows
+
+
+def legacy_shape(handler, rows):
+    """Shape rows with order_by, _apply_group_by and _transform_data."""
+    data = handler.order_by(rows, ORDER_FIELDS)
+    data = handler._apply_group_by(list(data), copy.deepcopy(GROUP_BY))
+    return handler._transform_data(['date'] + GROUP_BY, 0, data)
+
+
+def best_of(name, function, rows, repeat):
+    """Time a shaping function on copies of the rows and print the best run."""
+    timings = []
+    for _ in range(repeat):
+        data = copy.deepcopy(rows)
+        started = time.perf_counter()
+        function(data)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(f'best {name}: {best:.3f}s')
+    return best
+
+
+def main():
+    """Generate the rows and time each shaping path."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--projects', type=int, default=100)
+    parser.add_argument('--nodes', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    handler = OCPReportQueryHandler({}, '', None, **{'report_type': 'cpu'})
+    dates = [handler.date_to_string(item) for item in handler.time_interval]
+    packer = compile_packer(handler._mapper.PACK_DEFINITIONS)
+    rows = make_rows(dates, args)
+
+    best_of('legacy', lambda data: legacy_shape(handler, data), rows, args.repeat)
+    best_of('shaped', lambda data: shape_report_data(data, dates, GROUP_BY, ORDER_FIELDS, packer),
+            rows, args.repeat)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())